@@ -0,0 +1,129 @@
+"""Benchmark: batched update cycle vs updating people one by one.
+
+Runs full update cycles for many people spread over five long routes,
+once through FamilyTransportTracker.async_update, which snapshots the
+states and matches all riders of a route in one batch, and once calling
+async_update_person for everyone. People either jump to a random spot on
+their route every cycle (every fix needs a search of the whole route) or
+move a little (the incremental window match finds them).
+
+Run from the repository root:
+
+    python benchmarks/bench_bulk.py
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import State  # noqa: E402
+
+from custom_components.transport_family_tracker.tracker import (  # noqa: E402
+    FamilyTransportTracker,
+)
+from bench_event_loop import make_route, route_states  # noqa: E402
+from replay import FakeHass, FakeStates  # noqa: E402
+
+ROUTES = 5
+CYCLES = 10
+EVERY_DAY = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+class CountingStates(FakeStates):
+    """FakeStates counting state lookups."""
+
+    lookups = 0
+
+    def get(self, entity_id):
+        """Return a state or None."""
+        CountingStates.lookups += 1
+        return dict.get(self, entity_id)
+
+
+def setup(people: int) -> tuple[FakeHass, FamilyTransportTracker, list]:
+    """Create the fake hass, routes and people."""
+    hass = FakeHass()
+    hass.states = CountingStates()
+    routes = [make_route(i) for i in range(ROUTES)]
+    hass.states.update(route_states(routes, 0))
+    config = [
+        {
+            "person": f"device_tracker.person_{i}",
+            "morning_route": f"sensor.route_{i % ROUTES}",
+            "morning_days": EVERY_DAY,
+            "morning_exclude_holidays": False,
+        }
+        for i in range(people)
+    ]
+    entry = SimpleNamespace(entry_id="bench", data={
+        "people": config,
+        "station_radius": 100,
+        "route_tolerance": 500,
+        "departure_window": 5,
+        "executor_threshold": 0,
+    })
+    return hass, FamilyTransportTracker(hass, entry), routes
+
+
+def move(hass: FakeHass, routes: list, people: int, cycle: int, jump: bool) -> None:
+    """Give everyone a new fix on their route."""
+    rng = random.Random(cycle)
+    for i in range(people):
+        route = routes[i % ROUTES]
+        if jump:
+            position = rng.randrange(len(route))
+        else:
+            position = (i * 397 + cycle * 20) % len(route)
+        lat, lon = route[position]
+        person_entity = f"device_tracker.person_{i}"
+        hass.states[person_entity] = State(
+            person_entity, "not_home", {"latitude": lat, "longitude": lon, "speed": 20}
+        )
+
+
+async def run(people: int, jump: bool, batched: bool) -> tuple[float, float]:
+    """Return the milliseconds and state lookups per cycle."""
+    hass, tracker, routes = setup(people)
+    move(hass, routes, people, 0, jump)
+    await tracker.async_update(force=True)
+
+    elapsed = 0.0
+    CountingStates.lookups = 0
+    for cycle in range(1, CYCLES + 1):
+        move(hass, routes, people, cycle, jump)
+        start = time.perf_counter()
+        if batched:
+            await tracker.async_update(force=True)
+        else:
+            for person_config in tracker.config_entry.data["people"]:
+                await tracker.async_update_person(person_config["person"])
+        elapsed += time.perf_counter() - start
+    hass.executor.shutdown()
+    return elapsed / CYCLES * 1e3, CountingStates.lookups / CYCLES
+
+
+def main() -> None:
+    """Print a table of both update paths."""
+    print(
+        f"{'people':>6} {'fixes':>7} {'single ms':>10} {'batched ms':>11} "
+        f"{'speedup':>8} {'lookups':>8} {'batched':>8}"
+    )
+    for people in (20, 100, 500):
+        for jump in (True, False):
+            single, single_lookups = asyncio.run(run(people, jump, False))
+            batched, batched_lookups = asyncio.run(run(people, jump, True))
+            print(
+                f"{people:>6} {'jump' if jump else 'move':>7} {single:>10.1f} "
+                f"{batched:>11.1f} {single / batched:>7.1f}x "
+                f"{single_lookups:>8.0f} {batched_lookups:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark: car ETA error over ten replayed commutes.
+
+Replays two weeks of workday car commutes with a daily traffic jam in the
+middle third of the route and scores every car ETA against the actual
+arrival. The old estimate (straight line distance at 50 km/h) is scored
+on the same fixes for comparison. Segment times are learned as the days
+go by, so later days should score better.
+
+Run from the repository root:
+
+    python benchmarks/bench_eta.py
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from custom_components.transport_family_tracker.geometry import (  # noqa: E402
+    calculate_distance,
+)
+from replay import (  # noqa: E402
+    TIME_ZONE,
+    RouteSnapshot,
+    eta_errors,
+    replay,
+    synthetic_commute,
+)
+
+PERSON = "device_tracker.driver"
+DAYS = 10
+POINTS = 1000
+
+
+def make_road(points: int) -> list[list[float]]:
+    """Build a gently curving road from Amsterdam to Utrecht."""
+    rng = random.Random(0)
+    start, end = (52.3791, 4.9003), (52.0894, 5.1101)
+    return [
+        [
+            start[0] + (end[0] - start[0]) * i / (points - 1) + rng.uniform(-1e-4, 1e-4),
+            start[1] + (end[1] - start[1]) * i / (points - 1) + rng.uniform(-1e-4, 1e-4),
+        ]
+        for i in range(points)
+    ]
+
+
+def main() -> None:
+    """Replay the commutes and print the errors per day."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone(TIME_ZONE))
+    road = make_road(POINTS)
+    destination = road[-1]
+    rng = random.Random(1)
+
+    fixes = []
+    snapshots = []
+    day = datetime(2024, 12, 2, 8, 30, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    while len(snapshots) < DAYS:
+        if day.weekday() < 5:
+            jam = rng.uniform(0.3, 0.5)
+            snapshots.append(RouteSnapshot(
+                timestamp=day.replace(hour=7),
+                entity_id="sensor.road",
+                attributes={
+                    "origin": "Amsterdam",
+                    "destination": "Utrecht",
+                    "departure_time": "08:30",
+                    "arrival_time": "09:05",
+                    "delay": 0,
+                    "coordinates": road,
+                },
+            ))
+            fixes += synthetic_commute(
+                PERSON, road, day, by_car=True, trip_minutes=30,
+                seed=day.day, speed_profile=(1.0, jam, 1.0),
+            )
+        day += timedelta(days=1)
+
+    entry_data = {
+        "people": [{
+            "person": PERSON,
+            "morning_route": "sensor.road",
+            "morning_days": ["mon", "tue", "wed", "thu", "fri"],
+            "morning_exclude_holidays": False,
+        }],
+        "station_radius": 100,
+        "route_tolerance": 500,
+    }
+    result = asyncio.run(replay(entry_data, fixes, snapshots, record=True))
+
+    days: dict = {}
+    for timestamp, before, error, data in eta_errors(result):
+        # The old estimate: straight line at 50 km/h, only when moving
+        old = None
+        if data.get("driving_speed"):
+            location = data["current_location"]
+            distance = calculate_distance(
+                location["lat"], location["lon"], destination[0], destination[1]
+            )
+            old = distance / 1000 / 50 * 60 - before
+        days.setdefault(timestamp.date(), []).append((error, old))
+
+    print(f"{'day':>10} {'ETAs':>5} {'MAE min':>8} {'old MAE min':>12}")
+    for date, rows in days.items():
+        mae = sum(abs(error) for error, _ in rows) / len(rows)
+        olds = [abs(old) for _, old in rows if old is not None]
+        print(f"{date.isoformat():>10} {len(rows):>5} {mae:>8.1f} {sum(olds) / len(olds):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Benchmark: event loop blocking of a tracker update cycle.
+
+Runs FamilyTransportTracker.async_update for 20 people spread over five
+long routes while a heartbeat task measures how long the event loop is
+blocked. Compares evaluating everything inline (executor threshold 0)
+with offloading long routes to the executor.
+
+Run from the repository root:
+
+    python benchmarks/bench_event_loop.py
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import State  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from custom_components.transport_family_tracker.tracker import (  # noqa: E402
+    FamilyTransportTracker,
+)
+from replay import FakeHass  # noqa: E402
+
+PEOPLE = 20
+ROUTES = 5
+ROUTE_POINTS = 10000
+CYCLES = 5
+RUNS = 5
+EVERY_DAY = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def make_route(seed: int) -> list[list[float]]:
+    """Build a long wobbly route through the Randstad."""
+    rng = random.Random(seed)
+    lat, lon = 52.0 + rng.random() * 0.4, 4.3 + rng.random() * 0.6
+    route = []
+    for _ in range(ROUTE_POINTS):
+        lat += rng.uniform(-0.0005, 0.0008)
+        lon += rng.uniform(-0.0005, 0.0008)
+        route.append([lat, lon])
+    return route
+
+
+def setup(executor_threshold: int) -> tuple[FakeHass, FamilyTransportTracker, list]:
+    """Create the fake hass, routes and people."""
+    hass = FakeHass()
+    routes = [make_route(i) for i in range(ROUTES)]
+    people = []
+    for i in range(PEOPLE):
+        route_entity = f"sensor.route_{i % ROUTES}"
+        person_entity = f"device_tracker.person_{i}"
+        lat, lon = routes[i % ROUTES][(i * 397) % ROUTE_POINTS]
+        hass.states[person_entity] = State(
+            person_entity, "not_home",
+            {"latitude": lat + 0.01, "longitude": lon, "speed": 40 if i % 2 else 10},
+        )
+        people.append({
+            "person": person_entity,
+            "morning_route": route_entity,
+            "morning_days": EVERY_DAY,
+            "morning_exclude_holidays": False,
+        })
+    entry = SimpleNamespace(entry_id="bench", data={
+        "people": people,
+        "station_radius": 100,
+        "route_tolerance": 500,
+        "departure_window": 5,
+        "executor_threshold": executor_threshold,
+    })
+    return hass, FamilyTransportTracker(hass, entry), routes
+
+
+def route_states(routes: list, cycle: int) -> dict[str, State]:
+    """Build fresh route states with new geometry, the worst case."""
+    states = {}
+    for i, route in enumerate(routes):
+        entity_id = f"sensor.route_{i}"
+        states[entity_id] = State(
+            entity_id, "on_time",
+            {
+                "origin": f"Origin {i}",
+                "destination": f"Destination {i}",
+                "departure_time": "08:30",
+                "arrival_time": "09:15",
+                "delay": cycle,
+                "coordinates": [[lat + cycle * 1e-6, lon] for lat, lon in route],
+            },
+            last_updated=dt_util.utcnow() + timedelta(seconds=cycle),
+        )
+    return states
+
+
+async def heartbeat(lags: list[float], stop: asyncio.Event) -> None:
+    """Record how late a 1 ms sleep wakes up."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def run(executor_threshold: int) -> tuple[float, float, float]:
+    """Return total, max and summed loop blocking in ms."""
+    hass, tracker, routes = setup(executor_threshold)
+    # Built up front so only the tracker runs while the heartbeat measures
+    cycles = [route_states(routes, cycle) for cycle in range(CYCLES)]
+    # Keep full collections of the fixture data out of the measurement
+    gc.collect()
+    gc.freeze()
+    lags: list[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    for states in cycles:
+        hass.states.update(states)
+        await tracker.async_update(force=True)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    hass.executor.shutdown()
+    gc.unfreeze()
+    blocked = [lag for lag in lags if lag > 0.002]
+    return elapsed * 1e3, max(lags) * 1e3, sum(blocked) * 1e3
+
+
+def main() -> None:
+    """Compare inline and offloaded geometry, median of several runs."""
+    print(
+        f"{PEOPLE} people, {ROUTES} routes x {ROUTE_POINTS} points, "
+        f"{CYCLES} cycles, median of {RUNS} runs"
+    )
+    print(f"{'mode':>10} {'wall ms':>9} {'max block ms':>13} {'blocked ms':>11}")
+    for label, threshold in (("inline", 0), ("executor", 2000)):
+        results = [asyncio.run(run(threshold)) for _ in range(RUNS)]
+        elapsed, worst, blocked = (statistics.median(column) for column in zip(*results))
+        print(f"{label:>10} {elapsed:>9.1f} {worst:>13.1f} {blocked:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
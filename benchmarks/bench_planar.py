@@ -0,0 +1,91 @@
+"""Benchmark: planar distance and threshold tests vs calculate_distance.
+
+Measures the speed of planar_distance and within_distance against the
+haversine calculate_distance, and their largest error for random pairs
+of points in the Netherlands at increasing distances.
+
+Run from the repository root:
+
+    python benchmarks/bench_planar.py
+"""
+from __future__ import annotations
+
+from math import cos, pi, radians, sin
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.transport_family_tracker.geometry import (  # noqa: E402
+    METERS_PER_DEGREE,
+    calculate_distance,
+    planar_distance,
+    within_distance,
+)
+
+# Roughly the Netherlands
+BOUNDS = (50.75, 3.35, 53.55, 7.25)
+PAIRS = 20000
+
+
+def random_pairs(rng: random.Random, distance: float) -> list[tuple[float, float, float, float]]:
+    """Return pairs of points about distance meters apart, in any direction."""
+    pairs = []
+    for _ in range(PAIRS):
+        lat = rng.uniform(BOUNDS[0], BOUNDS[2])
+        lon = rng.uniform(BOUNDS[1], BOUNDS[3])
+        bearing = rng.uniform(0, 2 * pi)
+        meters = distance * rng.uniform(0.5, 1.0)
+        pairs.append((
+            lat,
+            lon,
+            lat + meters * cos(bearing) / METERS_PER_DEGREE,
+            lon + meters * sin(bearing) / (METERS_PER_DEGREE * cos(radians(lat))),
+        ))
+    return pairs
+
+
+def main() -> None:
+    """Print speed and accuracy tables."""
+    rng = random.Random(0)
+    pairs = random_pairs(rng, 1000)
+
+    haversine = min(timeit.repeat(
+        lambda: [calculate_distance(a, b, c, d) for a, b, c, d in pairs], number=1, repeat=5
+    )) / PAIRS
+    planar = min(timeit.repeat(
+        lambda: [planar_distance(a, b, c, d) for a, b, c, d in pairs], number=1, repeat=5
+    )) / PAIRS
+    within = min(timeit.repeat(
+        lambda: [within_distance(a, b, c, d, 100) for a, b, c, d in pairs], number=1, repeat=5
+    )) / PAIRS
+    print(f"{'function':>20} {'ns/call':>8} {'speedup':>8}")
+    for name, seconds in (
+        ("calculate_distance", haversine),
+        ("planar_distance", planar),
+        ("within_distance", within),
+    ):
+        print(f"{name:>20} {seconds * 1e9:>8.0f} {haversine / seconds:>7.1f}x")
+
+    print()
+    print(f"{'distance':>10} {'max error m':>12} {'max error %':>12} {'disagree':>9}")
+    for distance in (50, 100, 500, 1000, 10000, 100000, 300000):
+        pairs = random_pairs(rng, distance)
+        worst = worst_relative = 0.0
+        disagree = 0
+        threshold = distance * 0.75
+        for pair in pairs:
+            exact = calculate_distance(*pair)
+            error = abs(planar_distance(*pair) - exact)
+            worst = max(worst, error)
+            worst_relative = max(worst_relative, error / exact)
+            disagree += within_distance(*pair, threshold) != (exact <= threshold)
+        print(
+            f"{distance:>9}m {worst:>12.4f} {worst_relative * 100:>12.5f} {disagree:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Micro-benchmark: matching an ongoing trip against learned commute profiles.
+
+Run from the repository root:
+
+    python benchmarks/bench_profiles.py
+"""
+from __future__ import annotations
+
+import json
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.transport_family_tracker.geometry import RouteIndex  # noqa: E402
+from custom_components.transport_family_tracker.profiles import (  # noqa: E402
+    MAX_PROFILES,
+    CommuteProfiles,
+)
+from custom_components.transport_family_tracker.trips import Trip  # noqa: E402
+
+from bench_route_index import make_route  # noqa: E402
+
+PERSON = "device_tracker.commuter"
+QUERIES = 1000
+
+
+def make_trip(rng: random.Random, start: datetime) -> Trip:
+    """Build a trip of 20-60 km in a random direction around Utrecht."""
+    lat, lon = 52.09 + rng.uniform(-0.2, 0.2), 5.11 + rng.uniform(-0.3, 0.3)
+    steps = rng.randint(100, 300)
+    dlat, dlon = rng.uniform(-0.002, 0.002), rng.uniform(-0.003, 0.003)
+    track = [(lat + dlat * i, lon + dlon * i) for i in range(steps)]
+    return Trip(PERSON, start, start + timedelta(minutes=40), track=track)
+
+
+def main() -> None:
+    """Learn a full set of profiles and time matching against them."""
+    rng = random.Random(0)
+    profiles = CommuteProfiles()
+    route = make_route(5000)
+    routes = {"sensor.train": ("Amsterdam → Utrecht", RouteIndex(route))}
+
+    start = datetime(2024, 12, 2, 8, 0)
+    for day in range(MAX_PROFILES * 3):
+        profiles.learn(make_trip(rng, start + timedelta(days=day)), routes)
+
+    # An ongoing trip along the configured route
+    ongoing = Trip(PERSON, start, track=[])
+    for lat, lon in route[:1000:20]:
+        ongoing.track.append((lat, lon))
+        profiles.observe(PERSON, ongoing)
+
+    match = profiles.match(PERSON, routes, start)
+    seconds = min(timeit.repeat(
+        lambda: profiles.match(PERSON, routes, start), number=QUERIES, repeat=3,
+    )) / QUERIES
+    stored = json.dumps(profiles.as_dict())
+
+    print(f"profiles: {len(profiles.profiles[PERSON])}")
+    print(f"match: {match.label if match else None} ({seconds * 1e6:.1f} us)")
+    print(f"stored: {len(stored) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
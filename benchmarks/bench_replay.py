@@ -0,0 +1,113 @@
+"""Benchmark: replay synthetic commutes through the tracker.
+
+Replays a morning commute for 1, 10 and 100 people (half by train, half
+by car) against routes of 100 to 10,000 points, and reports throughput,
+per-update latency and the peak memory allocated during the replay.
+Timings and memory come from separate runs since tracemalloc slows
+everything down.
+
+Run from the repository root:
+
+    python benchmarks/bench_replay.py
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import sys
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from bench_route_index import make_route  # noqa: E402
+from replay import TIME_ZONE, RouteSnapshot, replay, synthetic_commute  # noqa: E402
+
+PEOPLE = (1, 10, 100)
+ROUTE_POINTS = (100, 1000, 10000)
+ROUTES = 5
+EVERY_DAY = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def scenario(people: int, points: int) -> tuple[dict, list, list]:
+    """Build the config, fixes and route snapshots of one scenario."""
+    departure = datetime(2024, 12, 9, 8, 30, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    route_count = min(people, ROUTES)
+    # Shift each route so people are spread over several indexes
+    routes = [
+        [[lat + i * 0.01, lon] for lat, lon in make_route(points)]
+        for i in range(route_count)
+    ]
+    snapshots = [
+        RouteSnapshot(
+            timestamp=departure.replace(hour=7),
+            entity_id=f"sensor.route_{i}",
+            attributes={
+                "origin": "Amsterdam Centraal",
+                "destination": "Utrecht Centraal",
+                "departure_time": "08:30",
+                "arrival_time": "09:05",
+                "delay": 0,
+                "coordinates": route,
+            },
+        )
+        for i, route in enumerate(routes)
+    ]
+
+    fixes = []
+    config_people = []
+    for i in range(people):
+        person = f"device_tracker.person_{i}"
+        config_people.append({
+            "person": person,
+            "morning_route": f"sensor.route_{i % route_count}",
+            "morning_days": EVERY_DAY,
+            "morning_exclude_holidays": False,
+        })
+        fixes += synthetic_commute(
+            person, routes[i % route_count], departure, by_car=bool(i % 2), seed=i
+        )
+
+    entry_data = {
+        "people": config_people,
+        "station_radius": 100,
+        "route_tolerance": 500,
+        "departure_window": 5,
+        # Offloading only adds overhead in a single threaded replay
+        "executor_threshold": 0,
+    }
+    return entry_data, fixes, snapshots
+
+
+def main() -> None:
+    """Run every scenario and print a table."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone(TIME_ZONE))
+    print(
+        f"{'people':>6} {'points':>7} {'updates':>8} {'updates/s':>10} "
+        f"{'p50 us':>8} {'p99 us':>8} {'peak MiB':>9}"
+    )
+    for people in PEOPLE:
+        for points in ROUTE_POINTS:
+            entry_data, fixes, snapshots = scenario(people, points)
+
+            gc.collect()
+            result = asyncio.run(replay(entry_data, fixes, snapshots))
+
+            gc.collect()
+            tracemalloc.start()
+            asyncio.run(replay(entry_data, fixes, snapshots))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            print(
+                f"{people:>6} {points:>7} {result.updates:>8} "
+                f"{result.throughput:>10.0f} {result.percentile(50) * 1e6:>8.0f} "
+                f"{result.percentile(99) * 1e6:>8.0f} {peak / 2**20:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
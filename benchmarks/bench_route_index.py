@@ -0,0 +1,78 @@
+"""Micro-benchmark: on-route check with the route index vs a linear scan.
+
+Run from the repository root:
+
+    python benchmarks/bench_route_index.py
+"""
+from __future__ import annotations
+
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.transport_family_tracker.geometry import (  # noqa: E402
+    RouteIndex,
+    calculate_distance,
+)
+
+ROUTE_TOLERANCE = 500  # meters
+QUERIES = 200
+
+
+def make_route(points: int) -> list[list[float]]:
+    """Build a wobbly route from Amsterdam Centraal to Utrecht Centraal."""
+    start = (52.3791, 4.9003)
+    end = (52.0894, 5.1101)
+    rng = random.Random(points)
+    return [
+        [
+            start[0] + (end[0] - start[0]) * i / (points - 1) + rng.uniform(-0.002, 0.002),
+            start[1] + (end[1] - start[1]) * i / (points - 1) + rng.uniform(-0.002, 0.002),
+        ]
+        for i in range(points)
+    ]
+
+
+def linear_scan(lat: float, lon: float, route: list) -> bool:
+    """The previous on-route check: haversine to every vertex."""
+    for coord in route:
+        if calculate_distance(lat, lon, coord[0], coord[1]) <= ROUTE_TOLERANCE:
+            return True
+    return False
+
+
+def main() -> None:
+    """Run the benchmark for a range of route sizes."""
+    rng = random.Random(0)
+    print(f"{'points':>8} {'build ms':>9} {'scan us':>9} {'index us':>9} {'speedup':>8}")
+    for points in (100, 1000, 5000, 10000):
+        route = make_route(points)
+        # Mix of on-route fixes and fixes a few kilometers off the line
+        queries = []
+        for _ in range(QUERIES):
+            lat, lon = rng.choice(route)
+            queries.append((lat + rng.uniform(-0.03, 0.03), lon + rng.uniform(-0.03, 0.03)))
+
+        build = min(timeit.repeat(lambda: RouteIndex(route), number=1, repeat=3))
+        index = RouteIndex(route)
+
+        scan = min(timeit.repeat(
+            lambda: [linear_scan(lat, lon, route) for lat, lon in queries],
+            number=1, repeat=3,
+        )) / QUERIES
+        indexed = min(timeit.repeat(
+            lambda: [index.is_near(lat, lon, ROUTE_TOLERANCE) for lat, lon in queries],
+            number=1, repeat=3,
+        )) / QUERIES
+
+        print(
+            f"{points:>8} {build * 1e3:>9.2f} {scan * 1e6:>9.1f} "
+            f"{indexed * 1e6:>9.1f} {scan / indexed:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
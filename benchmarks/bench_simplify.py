@@ -0,0 +1,104 @@
+"""Benchmark: route ingestion with compact storage and simplification.
+
+Builds dense, smooth routes like the shapes a route sensor reports, and
+compares the raw coordinate lists with the simplified polylines kept in
+the route cache: points, memory, build time, on-route lookups and how far
+the simplified line strays from the real one.
+
+Run from the repository root:
+
+    python benchmarks/bench_simplify.py
+"""
+from __future__ import annotations
+
+from math import cos, pi, sin
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.transport_family_tracker.geometry import (  # noqa: E402
+    Polyline,
+    RouteIndex,
+    simplify,
+)
+from custom_components.transport_family_tracker.route import SIMPLIFY_FRACTION  # noqa: E402
+
+ROUTE_TOLERANCE = 500  # meters
+QUERIES = 2000
+
+
+def make_shape(points: int) -> list[list[float]]:
+    """Build a smooth curving track from Amsterdam Centraal to Maastricht."""
+    start = (52.3791, 4.9003)
+    end = (50.8497, 5.7053)
+    return [
+        [
+            start[0] + (end[0] - start[0]) * i / (points - 1)
+            + 0.05 * sin(6 * pi * i / (points - 1)),
+            start[1] + (end[1] - start[1]) * i / (points - 1)
+            + 0.08 * cos(4 * pi * i / (points - 1)) - 0.08,
+        ]
+        for i in range(points)
+    ]
+
+
+def list_size(coordinates: list) -> int:
+    """Return the bytes held by a list of coordinate lists."""
+    return sys.getsizeof(coordinates) + sum(
+        sys.getsizeof(coord) + sum(sys.getsizeof(value) for value in coord)
+        for coord in coordinates
+    )
+
+
+def main() -> None:
+    """Ingest routes of several sizes and print a table."""
+    tolerance = ROUTE_TOLERANCE * SIMPLIFY_FRACTION
+    print(
+        f"{'points':>7} {'kept':>6} {'list KiB':>9} {'packed KiB':>11} "
+        f"{'simplify ms':>12} {'query us':>9} {'raw us':>7} {'max dev m':>10} {'disagree':>9}"
+    )
+    for points in (1000, 10000, 50000):
+        shape = make_shape(points)
+        polyline = Polyline.from_coordinates(shape)
+        simplify_time = min(timeit.repeat(lambda: simplify(polyline, tolerance), number=1, repeat=3))
+        kept = simplify(polyline, tolerance)
+        simplified = polyline.subset(kept)
+        lengths = polyline.path_lengths()
+
+        raw_index = RouteIndex(shape)
+        index = RouteIndex(simplified, [lengths[position] for position in kept])
+
+        # How far the real route strays from the simplified one
+        max_deviation = max(index.distance_to_route(lat, lon) for lat, lon in polyline)
+
+        rng = random.Random(points)
+        queries = []
+        for _ in range(QUERIES):
+            lat, lon = polyline[rng.randrange(len(polyline))]
+            queries.append((lat + rng.uniform(-0.008, 0.008), lon + rng.uniform(-0.012, 0.012)))
+        disagree = sum(
+            raw_index.is_near(lat, lon, ROUTE_TOLERANCE) != index.is_near(lat, lon, ROUTE_TOLERANCE)
+            for lat, lon in queries
+        )
+        query = min(timeit.repeat(
+            lambda: [index.is_near(lat, lon, ROUTE_TOLERANCE) for lat, lon in queries],
+            number=1, repeat=3,
+        )) / QUERIES
+        raw_query = min(timeit.repeat(
+            lambda: [raw_index.is_near(lat, lon, ROUTE_TOLERANCE) for lat, lon in queries],
+            number=1, repeat=3,
+        )) / QUERIES
+
+        print(
+            f"{points:>7} {len(simplified):>6} {list_size(shape) / 1024:>9.0f} "
+            f"{simplified.values.buffer_info()[1] * 8 / 1024:>11.1f} "
+            f"{simplify_time * 1000:>12.1f} {query * 1e6:>9.1f} {raw_query * 1e6:>7.1f} "
+            f"{max_deviation:>10.1f} {disagree / QUERIES:>9.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+"""Offline replay of recorded GPS traces through FamilyTransportTracker.
+
+Feeds device tracker fixes and route sensor snapshots into the tracker
+under a fake hass.states and a controllable clock, the way the coordinator
+does in event driven mode: every fix re-evaluates its person and every
+route snapshot re-evaluates the people on that route.
+
+Traces are CSV or JSONL with the columns timestamp, lat, lon, speed and
+driving, plus an optional person column naming the device tracker.
+Timestamps are ISO datetimes or Unix seconds. Route snapshots are JSONL
+objects with timestamp, entity_id, an optional state and the attributes
+of the route sensor.
+
+Run from the repository root:
+
+    python benchmarks/replay.py config.json trace.csv --routes routes.jsonl
+
+The config is the JSON data of a config entry. The status timeline is
+printed followed by per-update timing statistics. With --eval-eta the
+car ETAs are scored against the arrival times in the trace instead.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import State  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from custom_components.transport_family_tracker.geometry import (  # noqa: E402
+    calculate_distance,
+)
+from custom_components.transport_family_tracker.tracker import (  # noqa: E402
+    FamilyTransportTracker,
+)
+
+DEFAULT_PERSON = "device_tracker.replay"
+TIME_ZONE = "Europe/Amsterdam"
+
+
+@dataclass
+class Fix:
+    """One GPS fix of a device tracker."""
+
+    timestamp: datetime
+    person: str
+    lat: float
+    lon: float
+    speed: float = 0
+    driving: bool = False
+
+
+@dataclass
+class RouteSnapshot:
+    """The state of a route sensor from a point in time onwards."""
+
+    timestamp: datetime
+    entity_id: str
+    attributes: dict
+    state: str = "on_time"
+
+
+@dataclass
+class ReplayResult:
+    """Status timeline and timings of a replay."""
+
+    # (time, person, status) for every status change
+    timeline: list[tuple[datetime, str, str]] = field(default_factory=list)
+    # Seconds spent per person evaluation
+    timings: list[float] = field(default_factory=list)
+    # Final tracking data per person
+    people_data: dict[str, dict] = field(default_factory=dict)
+    # (time, person, data) for every evaluation, only when recording
+    records: list[tuple[datetime, str, dict]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def updates(self) -> int:
+        """Return the number of person evaluations."""
+        return len(self.timings)
+
+    @property
+    def throughput(self) -> float:
+        """Return the person evaluations per second of wall time."""
+        return self.updates / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Return a latency percentile in seconds (nearest rank)."""
+        if not self.timings:
+            return 0.0
+        ordered = sorted(self.timings)
+        rank = math.ceil(percent / 100 * len(ordered)) - 1
+        return ordered[max(0, rank)]
+
+
+class FakeStates(dict):
+    """Minimal stand-in for hass.states."""
+
+    def get(self, entity_id):
+        """Return a state or None."""
+        return dict.get(self, entity_id)
+
+    def async_all(self, domain: str) -> list:
+        """Return the states of a domain."""
+        return [state for entity_id, state in self.items() if entity_id.startswith(f"{domain}.")]
+
+
+class FakeHass:
+    """Just enough of Home Assistant to run the tracker."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.states = FakeStates()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def async_add_executor_job(self, target, *args):
+        """Run a job in the thread pool."""
+        return asyncio.get_running_loop().run_in_executor(self.executor, target, *args)
+
+
+class Clock:
+    """Controllable replacement for dt_util.now and dt_util.utcnow."""
+
+    def __init__(self, start: datetime) -> None:
+        """Initialize the clock at a time."""
+        self.current = dt_util.as_utc(start)
+
+    def set(self, current: datetime) -> None:
+        """Move the clock to a time."""
+        self.current = dt_util.as_utc(current)
+
+    def now(self, time_zone=None) -> datetime:
+        """Return the clock time in a time zone, local by default."""
+        return self.current.astimezone(time_zone or dt_util.DEFAULT_TIME_ZONE)
+
+    def utcnow(self) -> datetime:
+        """Return the clock time in UTC."""
+        return self.current
+
+    @contextmanager
+    def patched(self):
+        """Make Home Assistant's time helpers read this clock."""
+        with patch.object(dt_util, "now", self.now), patch.object(
+            dt_util, "utcnow", self.utcnow
+        ):
+            yield self
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """Parse an ISO datetime or Unix seconds into an aware datetime."""
+    if isinstance(value, (int, float)) or str(value).replace(".", "", 1).isdigit():
+        return dt_util.utc_from_timestamp(float(value))
+    parsed = dt_util.parse_datetime(str(value))
+    if parsed is None:
+        raise ValueError(f"Invalid timestamp: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return parsed
+
+
+def _parse_bool(value: Any) -> bool:
+    """Parse a CSV or JSON boolean."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def load_trace(path: str | Path, person: str = DEFAULT_PERSON) -> list[Fix]:
+    """Load GPS fixes from a CSV or JSONL file."""
+    path = Path(path)
+    with path.open(newline="") as file:
+        if path.suffix == ".csv":
+            rows = list(csv.DictReader(file))
+        else:
+            rows = [json.loads(line) for line in file if line.strip()]
+
+    return [
+        Fix(
+            timestamp=parse_timestamp(row["timestamp"]),
+            person=row.get("person") or person,
+            lat=float(row["lat"]),
+            lon=float(row["lon"]),
+            speed=float(row.get("speed") or 0),
+            driving=_parse_bool(row.get("driving", False)),
+        )
+        for row in rows
+    ]
+
+
+def load_route_snapshots(path: str | Path) -> list[RouteSnapshot]:
+    """Load route sensor snapshots from a JSONL file."""
+    with Path(path).open() as file:
+        return [
+            RouteSnapshot(
+                timestamp=parse_timestamp(row["timestamp"]),
+                entity_id=row["entity_id"],
+                attributes=row.get("attributes", {}),
+                state=row.get("state", "on_time"),
+            )
+            for line in file
+            if line.strip() and (row := json.loads(line))
+        ]
+
+
+def make_entry(data: dict) -> SimpleNamespace:
+    """Wrap config entry data for the tracker."""
+    return SimpleNamespace(entry_id="replay", data=data)
+
+
+async def replay(
+    entry_data: dict,
+    fixes: list[Fix],
+    snapshots: list[RouteSnapshot],
+    hass: FakeHass | None = None,
+    record: bool = False,
+) -> ReplayResult:
+    """Replay fixes and route snapshots in time order through a tracker.
+
+    Like the coordinator, a fix of a person who has no route scheduled is
+    skipped until their idle cadence expires. With record set, the data
+    of every evaluation is kept in the result.
+    """
+    own_hass = hass is None
+    hass = hass or FakeHass()
+    tracker = FamilyTransportTracker(hass, make_entry(entry_data))
+    people_by_entity = tracker.get_tracked_entities()
+    result = ReplayResult()
+    last_status: dict[str, str] = {}
+
+    # Route snapshots sort before fixes at the same instant
+    events = sorted(
+        [(snapshot.timestamp, 0, index, snapshot) for index, snapshot in enumerate(snapshots)]
+        + [(fix.timestamp, 1, index, fix) for index, fix in enumerate(fixes)],
+        key=lambda event: event[:3],
+    )
+    if not events:
+        return result
+
+    clock = Clock(events[0][0])
+    with clock.patched():
+        start = time.perf_counter()
+        for timestamp, _, _, event in events:
+            clock.set(timestamp)
+            now = clock.now()
+            if isinstance(event, RouteSnapshot):
+                hass.states[event.entity_id] = State(
+                    event.entity_id, event.state, event.attributes,
+                    last_updated=clock.utcnow(),
+                )
+                people = people_by_entity.get(event.entity_id, ())
+            else:
+                hass.states[event.person] = State(
+                    event.person, "not_home",
+                    {
+                        "latitude": event.lat,
+                        "longitude": event.lon,
+                        "speed": event.speed,
+                        "driving": event.driving,
+                    },
+                    last_updated=clock.utcnow(),
+                )
+                # The engine's filter: geofence crossings and expired cadences
+                crossed = tracker.crossed_geofence(event.person, hass.states[event.person], now)
+                if not crossed and not tracker.is_due(event.person, now):
+                    continue
+                people = (event.person,)
+
+            for person in people:
+                update_start = time.perf_counter()
+                data = await tracker.async_update_person(person)
+                result.timings.append(time.perf_counter() - update_start)
+                if record and data:
+                    result.records.append((now, person, data))
+                if data and data.get("status") != last_status.get(person):
+                    last_status[person] = data.get("status")
+                    result.timeline.append((now, person, data.get("status")))
+        result.elapsed = time.perf_counter() - start
+
+    if own_hass:
+        hass.executor.shutdown()
+    result.people_data = dict(tracker.people_data)
+    return result
+
+
+def _cumulative_distances(route: list) -> list[float]:
+    """Return the distance along a route to each of its points."""
+    distances = [0.0]
+    for (lat1, lon1), (lat2, lon2) in zip(route, route[1:]):
+        distances.append(distances[-1] + calculate_distance(lat1, lon1, lat2, lon2))
+    return distances
+
+
+def _point_along(route: list, cumulative: list[float], distance: float) -> tuple[float, float]:
+    """Interpolate the point a distance along a route."""
+    distance = min(max(distance, 0.0), cumulative[-1])
+    low, high = 0, len(cumulative) - 1
+    while low < high - 1:
+        middle = (low + high) // 2
+        if cumulative[middle] <= distance:
+            low = middle
+        else:
+            high = middle
+    span = cumulative[high] - cumulative[low]
+    fraction = (distance - cumulative[low]) / span if span else 0.0
+    lat = route[low][0] + (route[high][0] - route[low][0]) * fraction
+    lon = route[low][1] + (route[high][1] - route[low][1]) * fraction
+    return lat, lon
+
+
+def synthetic_commute(
+    person: str,
+    route: list,
+    departure: datetime,
+    by_car: bool = False,
+    trip_minutes: float = 35,
+    interval: float = 30,
+    seed: int = 0,
+    speed_profile: Sequence[float] = (1.0,),
+) -> list[Fix]:
+    """Generate the fixes of one commute along a route.
+
+    The person walks 1 km to the origin station from 15 minutes before the
+    departure, waits there and then covers the route in trip_minutes at a
+    steady pace with GPS noise. The trip takes the same time however
+    detailed the route geometry is. speed_profile splits the route into
+    equally long sections travelled at those fractions of the pace, e.g.
+    (1, 0.3, 1) for a traffic jam halfway.
+    """
+    rng = random.Random(seed)
+    cumulative = _cumulative_distances(route)
+    origin_lat, origin_lon = route[0]
+    fixes = []
+
+    def add(timestamp: datetime, lat: float, lon: float, speed: float) -> None:
+        fixes.append(Fix(
+            timestamp=timestamp,
+            person=person,
+            lat=lat + rng.gauss(0, 0.00005),
+            lon=lon + rng.gauss(0, 0.00005),
+            speed=max(0.0, speed + rng.gauss(0, 2)) if speed else 0.0,
+            driving=by_car and speed > 0,
+        ))
+
+    timestamp = departure - timedelta(minutes=15)
+    # Walk (or drive to the on-ramp) from 1 km north of the station
+    walked = 1000.0
+    while walked > 0 and timestamp < departure:
+        add(timestamp, origin_lat + walked / 111_320, origin_lon, 5)
+        walked -= 5 / 3.6 * interval
+        timestamp += timedelta(seconds=interval)
+    while timestamp < departure:
+        add(timestamp, origin_lat, origin_lon, 0)
+        timestamp += timedelta(seconds=interval)
+
+    speed = 80 if by_car else 60
+    section_length = cumulative[-1] / len(speed_profile)
+    section_seconds = trip_minutes * 60 / len(speed_profile)
+    elapsed = 0.0
+    for section, factor in enumerate(speed_profile):
+        duration = section_seconds / factor
+        while elapsed < duration:
+            distance = section_length * (section + elapsed / duration)
+            add(timestamp, *_point_along(route, cumulative, distance), speed * factor)
+            elapsed += interval
+            timestamp += timedelta(seconds=interval)
+        elapsed -= duration
+    add(timestamp, *route[-1], 0)
+    return fixes
+
+
+def write_trace(path: str | Path, fixes: list[Fix]) -> None:
+    """Write fixes as a CSV trace that load_trace reads back."""
+    with Path(path).open("w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["timestamp", "person", "lat", "lon", "speed", "driving"])
+        for fix in fixes:
+            writer.writerow([
+                fix.timestamp.isoformat(), fix.person, fix.lat, fix.lon,
+                fix.speed, int(fix.driving),
+            ])
+
+
+def eta_errors(
+    result: ReplayResult, arrival_distance: float = 200
+) -> list[tuple[datetime, float, float, dict]]:
+    """Score the car ETAs of a recorded replay against the actual arrivals.
+
+    Trips are split per person and local day, and a trip arrives at the
+    first update with less than arrival_distance left along the route
+    after one with more. Only ETAs in between are scored.
+    Returns (time, minutes before arrival, ETA error in minutes, tracking
+    data) for every car ETA given before arrival. Errors are positive when the
+    ETA was too late.
+    """
+    trips: dict[tuple[str, Any], list[tuple[datetime, dict]]] = {}
+    for timestamp, person, data in result.records:
+        trips.setdefault((person, timestamp.date()), []).append((timestamp, data))
+
+    scores = []
+    for updates in trips.values():
+        arrival = departed = None
+        for timestamp, data in updates:
+            remaining = data.get("distance_remaining")
+            if remaining is None:
+                continue
+            if remaining >= arrival_distance:
+                departed = departed or timestamp
+            elif departed:
+                arrival = timestamp
+                break
+        if arrival is None:
+            continue
+        for timestamp, data in updates:
+            if not departed <= timestamp < arrival or not data.get("car_eta"):
+                continue
+            before = (arrival - timestamp).total_seconds() / 60
+            error = (parse_timestamp(data["car_eta"]) - arrival).total_seconds() / 60
+            scores.append((timestamp, before, error, data))
+    return scores
+
+
+def print_eta_scores(scores: list[tuple[datetime, float, float, dict]]) -> None:
+    """Print the mean absolute ETA error per time before arrival."""
+    print(f"{'before arrival':>16} {'ETAs':>6} {'MAE min':>8} {'bias min':>9}")
+    for low, high in ((0, 10), (10, 30), (30, math.inf)):
+        errors = [error for _, before, error, _ in scores if low <= before < high]
+        if not errors:
+            continue
+        label = f"{low}-{high} min" if high != math.inf else f">{low} min"
+        print(
+            f"{label:>16} {len(errors):>6} "
+            f"{sum(map(abs, errors)) / len(errors):>8.1f} {sum(errors) / len(errors):>9.1f}"
+        )
+
+
+def main() -> None:
+    """Replay a trace file and print the status timeline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", help="JSON file with the config entry data")
+    parser.add_argument("trace", help="CSV or JSONL file with GPS fixes")
+    parser.add_argument("--routes", help="JSONL file with route sensor snapshots")
+    parser.add_argument("--person", default=DEFAULT_PERSON, help="Person of rows without one")
+    parser.add_argument(
+        "--eval-eta", action="store_true", help="Score car ETAs against the actual arrivals"
+    )
+    args = parser.parse_args()
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone(TIME_ZONE))
+    entry_data = json.loads(Path(args.config).read_text())
+    fixes = load_trace(args.trace, args.person)
+    snapshots = load_route_snapshots(args.routes) if args.routes else []
+
+    result = asyncio.run(replay(entry_data, fixes, snapshots, record=args.eval_eta))
+    if args.eval_eta:
+        print_eta_scores(eta_errors(result))
+        return
+    for timestamp, person, status in result.timeline:
+        print(f"{timestamp.isoformat()}  {person}  {status}")
+    print(
+        f"\n{result.updates} updates in {result.elapsed * 1e3:.1f} ms, "
+        f"{result.throughput:.0f} updates/s, "
+        f"p50 {result.percentile(50) * 1e6:.0f} us, "
+        f"p99 {result.percentile(99) * 1e6:.0f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
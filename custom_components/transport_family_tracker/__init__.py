@@ -2,66 +2,344 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
+from collections.abc import Awaitable
+from datetime import datetime, time, timedelta
+from time import perf_counter
+from typing import Any, TypeVar
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_point_in_time
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
 
-from .const import DOMAIN
+from .const import (
+    CONF_EVENT_DRIVEN,
+    CONF_PROFILE_CYCLES,
+    CONF_QUIET_HOURS_END,
+    CONF_QUIET_HOURS_START,
+    DEFAULT_EVENT_DRIVEN,
+    DEFAULT_PROFILE_CYCLES,
+    DOMAIN,
+)
+from .engine import TrackerEngine
+from .history import TripHistory, TripStats
+from .instrumentation import CycleProfiler
+from .notifications import NotificationDispatcher, TargetKey
+from .storage import TrackerStore
 from .tracker import FamilyTransportTracker
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
+_T = TypeVar("_T")
+
+SERVICE_TRIP_STATISTICS = "trip_statistics"
+TRIP_STATISTICS_SCHEMA = vol.Schema({
+    vol.Optional("person"): cv.entity_id,
+    vol.Optional("days", default=7): vol.All(vol.Coerce(int), vol.Range(min=1, max=3660)),
+    vol.Optional("group_by", default="day"): vol.In(["day", "route"]),
+})
+
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Family Transport Tracker component."""
     hass.data.setdefault(DOMAIN, {})
+
+    async def async_trip_statistics(call: ServiceCall) -> ServiceResponse:
+        """Return trip statistics of the last days from the trip history."""
+        since = dt_util.start_of_local_day() - timedelta(days=call.data["days"] - 1)
+        # Only the entry owning a person records their trips
+        histories: dict[str, TripHistory] = {}
+        for entry_data in hass.data[DOMAIN].values():
+            coordinator = entry_data["coordinator"]
+            for person_entity in coordinator.tracker.schedules:
+                if coordinator.owns(person_entity):
+                    histories.setdefault(person_entity, entry_data["history"])
+        if person := call.data.get("person"):
+            histories = {person: histories[person]} if person in histories else {}
+
+        statistics: dict[str, TripStats] = {}
+        for person_entity, history in histories.items():
+            groups = await history.async_aggregate(
+                person_entity, since, None, call.data["group_by"]
+            )
+            for key, stats in groups.items():
+                statistics.setdefault(key, TripStats()).merge(stats)
+        return {
+            "statistics": {key: stats.as_dict() for key, stats in sorted(statistics.items())}
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_TRIP_STATISTICS,
+        async_trip_statistics,
+        schema=TRIP_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Family Transport Tracker from a config entry."""
     hass.data.setdefault(DOMAIN, {})
-    
-    tracker = FamilyTransportTracker(hass, entry)
-    
-    coordinator = FamilyTransportCoordinator(hass, tracker)
+
+    engine = TrackerEngine.async_get(hass)
+    tracker = FamilyTransportTracker(hass, entry, engine)
+    store = TrackerStore(hass, entry.entry_id, tracker)
+    await store.async_restore()
+    history = TripHistory(hass, entry.entry_id)
+
+    event_driven = entry.data.get(CONF_EVENT_DRIVEN, DEFAULT_EVENT_DRIVEN)
+    coordinator = FamilyTransportCoordinator(
+        hass, tracker, event_driven, store, history, engine
+    )
+    if profile_cycles := entry.data.get(CONF_PROFILE_CYCLES, DEFAULT_PROFILE_CYCLES):
+        coordinator.profiler = CycleProfiler(
+            profile_cycles, hass.config.path(f"{DOMAIN}.{entry.entry_id}.prof")
+        )
     await coordinator.async_config_entry_first_refresh()
-    
+
+    engine.async_add(entry.entry_id, coordinator)
+    entry.async_on_unload(lambda: engine.async_remove(entry.entry_id))
+    entry.async_on_unload(coordinator.async_cancel_timers)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    notifications = NotificationDispatcher(
+        hass,
+        entry.data.get("people", []),
+        _parse_time(entry.data.get(CONF_QUIET_HOURS_START)),
+        _parse_time(entry.data.get(CONF_QUIET_HOURS_END)),
+        coordinator.notified_elsewhere,
+    )
+    coordinator.notifications = notifications
+    if notifications.enabled:
+        notifications.async_update(coordinator.data)
+        notifications.async_start(entry)
+        entry.async_on_unload(
+            coordinator.async_add_listener(
+                lambda: notifications.async_update(coordinator.data)
+            )
+        )
+        entry.async_on_unload(notifications.async_stop)
+
     hass.data[DOMAIN][entry.entry_id] = {
         "tracker": tracker,
         "coordinator": coordinator,
+        "store": store,
+        "history": history,
+        "notifications": notifications,
     }
-    
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["store"].async_flush()
+        await entry_data["coordinator"].async_record_trips()
+        await entry_data["history"].async_close()
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored tracker state and trip history of a deleted entry."""
+    await TrackerStore(hass, entry.entry_id, None).async_remove()
+    await TripHistory(hass, entry.entry_id).async_remove()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so edited people and schedules are recompiled."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 class FamilyTransportCoordinator(DataUpdateCoordinator):
-    """Coordinator to manage family transport tracking."""
+    """Coordinator to manage family transport tracking.
+
+    Refreshes are driven by the shared TrackerEngine rather than by an
+    update interval of its own. In event driven mode people are
+    re-evaluated as soon as their device tracker or one of their route
+    sensors changes, and the full refresh only runs as a slow fallback. A
+    one-off refresh is scheduled for the next schedule window boundary so
+    routes become active on time.
+
+    Every person also gets their own timer from the adaptive cadence in
+    cadence.py, so people near a station are checked every few seconds while
+    idle people back off to minutes.
 
-    def __init__(self, hass: HomeAssistant, tracker: FamilyTransportTracker) -> None:
+    Listeners are registered with their person as context and are only
+    called when that person's output fingerprint changed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        tracker: FamilyTransportTracker,
+        event_driven: bool = DEFAULT_EVENT_DRIVEN,
+        store: TrackerStore | None = None,
+        history: TripHistory | None = None,
+        engine: TrackerEngine | None = None,
+    ) -> None:
         """Initialize coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=timedelta(seconds=30),
-        )
+        super().__init__(hass, _LOGGER, name=DOMAIN)
         self.tracker = tracker
+        self.event_driven = event_driven
+        self.engine = engine
+        self.last_full_update: datetime | None = None
+        self.store = store
+        self.history = history
+        self.notifications: NotificationDispatcher | None = None
+        self.profiler: CycleProfiler | None = None
+        self._person_timers: dict[str, CALLBACK_TYPE] = {}
+        self.fingerprints: dict[str, int] = {}
+        self._changed_people: set[str] | None = None
+        self._notified_success: bool | None = None
+        self.state_writes = 0
+        self.state_writes_avoided = 0
 
     async def _async_update_data(self):
         """Fetch data from tracker."""
-        return await self.tracker.async_update()
\ No newline at end of file
+        self.last_full_update = dt_util.utcnow()
+        data = await self._async_timed(self.tracker.async_update())
+        self._changed_people = self._async_diff(data)
+        if self.store:
+            self.store.async_changed()
+        await self.async_record_trips()
+        for person_entity in data:
+            self._async_schedule_person(person_entity)
+        if self.engine and self.event_driven:
+            self.engine.async_schedule_wakeup()
+        return data
+
+    @callback
+    def _async_diff(self, data: dict[str, Any]) -> set[str]:
+        """Update fingerprints and return the people whose data changed."""
+        changed = set()
+        for person_entity, person_data in data.items():
+            fingerprint = hash(_freeze(person_data))
+            if self.fingerprints.get(person_entity) != fingerprint:
+                self.fingerprints[person_entity] = fingerprint
+                changed.add(person_entity)
+        return changed
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners of people whose data changed."""
+        changed, self._changed_people = self._changed_people, None
+        if self._notified_success != self.last_update_success:
+            # Availability changed, every entity has to be written
+            self._notified_success = self.last_update_success
+            changed = None
+
+        for update_callback, person_entity in list(self._listeners.values()):
+            if changed is None or person_entity is None or person_entity in changed:
+                update_callback()
+            else:
+                self.state_writes_avoided += 1
+
+    @callback
+    def _async_schedule_person(self, person_entity: str) -> None:
+        """Schedule a person's next evaluation from their cadence."""
+        if unsub := self._person_timers.pop(person_entity, None):
+            unsub()
+        if next_update := self.tracker.next_update.get(person_entity):
+
+            async def _async_person_due(_now) -> None:
+                self._person_timers.pop(person_entity, None)
+                await self.async_refresh_person(person_entity)
+
+            self._person_timers[person_entity] = async_track_point_in_time(
+                self.hass, _async_person_due, next_update
+            )
+
+    @callback
+    def async_cancel_timers(self) -> None:
+        """Cancel all per-person timers."""
+        for unsub in self._person_timers.values():
+            unsub()
+        self._person_timers.clear()
+
+    async def async_refresh_person(self, person_entity: str) -> None:
+        """Refresh a single person and notify listeners."""
+        person_data = await self._async_timed(
+            self.tracker.async_update_person(person_entity)
+        )
+        if person_data is None:
+            return
+        # Update in place rather than via async_set_updated_data so the
+        # fallback refresh keeps its schedule for everyone else.
+        self.data = {**(self.data or {}), person_entity: person_data}
+        self._changed_people = self._async_diff({person_entity: person_data})
+        self.async_update_listeners()
+        if self.store:
+            self.store.async_changed()
+        await self.async_record_trips()
+        self._async_schedule_person(person_entity)
+
+    async def _async_timed(self, update: Awaitable[_T]) -> _T:
+        """Run a tracker update, recording its duration and profiling it if enabled."""
+        profiling = self.profiler is not None and self.profiler.start()
+        start = perf_counter()
+        try:
+            return await update
+        finally:
+            self.tracker.stats.record_cycle(perf_counter() - start)
+            if profiling and (stats := self.profiler.stop()):
+                self.hass.async_add_executor_job(self.profiler.dump, stats)
+
+    @callback
+    def owns(self, person_entity: str) -> bool:
+        """Return True if this entry records the person's trips."""
+        owner = self.engine.async_owner(person_entity) if self.engine else None
+        return owner is None or owner is self
+
+    @callback
+    def notified_elsewhere(self, person_entity: str, target: TargetKey) -> bool:
+        """Return True if the entry owning a person notifies a target of them."""
+        if self.owns(person_entity):
+            return False
+        owner = self.engine.async_owner(person_entity)
+        return owner.notifications is not None and owner.notifications.has_target(
+            person_entity, target
+        )
+
+    async def async_record_trips(self) -> None:
+        """Append the trips of the people this entry owns to the history."""
+        trips = [
+            trip for trip in self.tracker.pop_finished_trips() if self.owns(trip.person)
+        ]
+        if not trips or not self.history:
+            return
+        try:
+            await self.history.async_record(trips)
+        except OSError as err:
+            _LOGGER.error("Could not write %s trips to the history: %s", len(trips), err)
+
+
+def _parse_time(value: str | None) -> time | None:
+    """Parse an optional time of day from the settings."""
+    return dt_util.parse_time(value) if value else None
+
+
+def _freeze(value: Any) -> Any:
+    """Convert tracking data into a hashable value for fingerprinting."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
@@ -5,10 +5,10 @@ from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import FamilyTransportCoordinator
 from .const import DOMAIN, STATUS_ON_ROUTE
+from .entity import PersonEntity
 
 
 async def async_setup_entry(
@@ -27,27 +27,25 @@ async def async_setup_entry(
     async_add_entities(sensors)
 
 
-class OnPlannedRouteSensor(CoordinatorEntity, BinarySensorEntity):
+class OnPlannedRouteSensor(PersonEntity, BinarySensorEntity):
     """Binary sensor for on planned route."""
 
     def __init__(self, coordinator: FamilyTransportCoordinator, person_entity: str) -> None:
         """Initialize sensor."""
-        super().__init__(coordinator)
-        self._person_entity = person_entity
         self._attr_unique_id = f"{DOMAIN}_{person_entity}_on_route"
         self._attr_name = f"{person_entity.split('.')[-1].title()} On Planned Route"
+        super().__init__(coordinator, person_entity)
 
     @property
-    def is_on(self):
-        """Return true if on planned route."""
-        data = self.coordinator.data.get(self._person_entity, {})
-        return data.get("status") == STATUS_ON_ROUTE
+    def _value(self) -> bool | None:
+        """Return whether the sensor is on."""
+        return self._attr_is_on
 
-    @property
-    def extra_state_attributes(self):
-        """Return attributes."""
+    def _update_from_data(self) -> None:
+        """Set state and attributes from the coordinator data."""
         data = self.coordinator.data.get(self._person_entity, {})
-        return {
+        self._attr_is_on = data.get("status") == STATUS_ON_ROUTE
+        self._attr_extra_state_attributes = {
             "confidence": data.get("confidence"),
             "planned_route": data.get("planned_route"),
         }
@@ -0,0 +1,54 @@
+"""Adaptive per-person update cadence."""
+from __future__ import annotations
+
+from .const import (
+    SPEED_THRESHOLD_STOPPED,
+    STATUS_AT_STATION,
+    STATUS_BY_CAR,
+    STATUS_DETOURED,
+    STATUS_STOPPED,
+)
+
+MIN_UPDATE_INTERVAL = 10  # seconds - near a station
+MOVING_UPDATE_INTERVAL = 60  # seconds - en route, far from any station
+CAR_UPDATE_INTERVAL = 30  # seconds - driving
+STOPPED_UPDATE_INTERVAL = 120  # seconds - stopped or parked
+IDLE_UPDATE_INTERVAL = 600  # seconds - no route scheduled
+
+WALKING_SPEED = 5  # km/h - assumed speed when the tracker reports none
+
+
+def update_interval(
+    status: str,
+    route_active: bool,
+    speed: float,
+    distance_to_station: float | None,
+    station_radius: float,
+) -> float:
+    """Return the seconds until a person should be evaluated again.
+
+    The interval is about half the time the person needs to reach the
+    nearest station of their route at their current speed, so the moment
+    they enter the station radius is never missed by more than that.
+    """
+    if not route_active:
+        return IDLE_UPDATE_INTERVAL
+    if status == STATUS_AT_STATION:
+        return MIN_UPDATE_INTERVAL
+    if status == STATUS_STOPPED:
+        return STOPPED_UPDATE_INTERVAL
+
+    if status in (STATUS_BY_CAR, STATUS_DETOURED):
+        interval = CAR_UPDATE_INTERVAL
+    elif speed < SPEED_THRESHOLD_STOPPED:
+        # Re-check before a new stop becomes reportable
+        interval = STOPPED_UPDATE_INTERVAL
+    else:
+        interval = MOVING_UPDATE_INTERVAL
+
+    if distance_to_station is not None:
+        speed_ms = max(speed or 0, WALKING_SPEED) / 3.6
+        seconds_to_station = max(distance_to_station - station_radius, 0) / speed_ms
+        interval = min(interval, seconds_to_station / 2)
+
+    return max(MIN_UPDATE_INTERVAL, interval)
@@ -18,9 +18,19 @@ from .const import (
     CONF_STATION_RADIUS,
     CONF_ROUTE_TOLERANCE,
     CONF_DEPARTURE_WINDOW,
+    CONF_EVENT_DRIVEN,
+    CONF_EXECUTOR_THRESHOLD,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_PROFILE_CYCLES,
+    CONF_QUIET_HOURS_START,
+    CONF_QUIET_HOURS_END,
     DEFAULT_STATION_RADIUS,
     DEFAULT_ROUTE_TOLERANCE,
     DEFAULT_DEPARTURE_WINDOW,
+    DEFAULT_EVENT_DRIVEN,
+    DEFAULT_EXECUTOR_THRESHOLD,
+    DEFAULT_DIAGNOSTIC_SENSORS,
+    DEFAULT_PROFILE_CYCLES,
 )
 
 
@@ -120,6 +130,7 @@ class FamilyTransportTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN)
                 "station_radius": DEFAULT_STATION_RADIUS,
                 "route_tolerance": DEFAULT_ROUTE_TOLERANCE,
                 "departure_window": DEFAULT_DEPARTURE_WINDOW,
+                "event_driven": DEFAULT_EVENT_DRIVEN,
             },
         )
 
@@ -280,6 +291,9 @@ class FamilyTransportTrackerOptionsFlow(config_entries.OptionsFlow):
                 self._config_entry,
                 data={
                     **self._config_entry.data,
+                    # Cleared quiet hours are left out of user_input
+                    CONF_QUIET_HOURS_START: None,
+                    CONF_QUIET_HOURS_END: None,
                     **user_input,
                 },
             )
@@ -300,5 +314,29 @@ class FamilyTransportTrackerOptionsFlow(config_entries.OptionsFlow):
                     CONF_DEPARTURE_WINDOW,
                     default=self._config_entry.data.get("departure_window", DEFAULT_DEPARTURE_WINDOW),
                 ): int,
+                vol.Optional(
+                    CONF_EVENT_DRIVEN,
+                    default=self._config_entry.data.get("event_driven", DEFAULT_EVENT_DRIVEN),
+                ): bool,
+                vol.Optional(
+                    CONF_EXECUTOR_THRESHOLD,
+                    default=self._config_entry.data.get("executor_threshold", DEFAULT_EXECUTOR_THRESHOLD),
+                ): int,
+                vol.Optional(
+                    CONF_DIAGNOSTIC_SENSORS,
+                    default=self._config_entry.data.get("diagnostic_sensors", DEFAULT_DIAGNOSTIC_SENSORS),
+                ): bool,
+                vol.Optional(
+                    CONF_PROFILE_CYCLES,
+                    default=self._config_entry.data.get("profile_cycles", DEFAULT_PROFILE_CYCLES),
+                ): int,
+                vol.Optional(
+                    CONF_QUIET_HOURS_START,
+                    description={"suggested_value": self._config_entry.data.get(CONF_QUIET_HOURS_START)},
+                ): selector.TimeSelector(),
+                vol.Optional(
+                    CONF_QUIET_HOURS_END,
+                    description={"suggested_value": self._config_entry.data.get(CONF_QUIET_HOURS_END)},
+                ): selector.TimeSelector(),
             }),
         )
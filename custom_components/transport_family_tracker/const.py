@@ -1,6 +1,7 @@
 """Constants for Family Transport Tracker."""
 
 DOMAIN = "transport_family_tracker"
+DATA_ENGINE = f"{DOMAIN}_engine"  # hass.data key of the shared TrackerEngine
 
 CONF_PERSON = "person"
 CONF_MORNING_ROUTE = "morning_route"
@@ -9,10 +10,23 @@ CONF_NOTIFY = "notify_entities"
 CONF_STATION_RADIUS = "station_radius"
 CONF_ROUTE_TOLERANCE = "route_tolerance"
 CONF_DEPARTURE_WINDOW = "departure_window"
+CONF_EVENT_DRIVEN = "event_driven"
+CONF_EXECUTOR_THRESHOLD = "executor_threshold"
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+CONF_PROFILE_CYCLES = "profile_cycles"
+CONF_QUIET_HOURS_START = "quiet_hours_start"
+CONF_QUIET_HOURS_END = "quiet_hours_end"
 
 DEFAULT_STATION_RADIUS = 100  # meters
 DEFAULT_ROUTE_TOLERANCE = 500  # meters
 DEFAULT_DEPARTURE_WINDOW = 5  # minutes
+DEFAULT_EVENT_DRIVEN = True
+DEFAULT_EXECUTOR_THRESHOLD = 2000  # route points, 0 disables offloading
+DEFAULT_DIAGNOSTIC_SENSORS = False
+DEFAULT_PROFILE_CYCLES = 0  # update cycles per profile dump, 0 disables profiling
+
+UPDATE_INTERVAL = 30  # seconds - polling interval when not event driven
+FALLBACK_UPDATE_INTERVAL = 300  # seconds - safety net when event driven
 
 STATUS_ON_ROUTE = "On Route"
 STATUS_MISSED = "Missed"
@@ -36,9 +50,16 @@ ATTR_TRAVEL_MODE = "travel_mode"
 ATTR_CAR_ETA = "car_eta"
 ATTR_STOP_ADDRESS = "stop_address"
 ATTR_STOP_DURATION = "stop_duration"
+ATTR_STOP_PLACE = "stop_place"
+ATTR_UNEXPECTED_STOP = "unexpected_stop"
 ATTR_DETOUR_LOCATION = "detour_location"
 ATTR_LEFT_ON_TIME = "left_on_time"
 ATTR_DRIVING_SPEED = "driving_speed"
+ATTR_DISTANCE_TRAVELLED = "distance_travelled"
+ATTR_DISTANCE_REMAINING = "distance_remaining"
+ATTR_ROUTE_PROGRESS = "route_progress"
+ATTR_DETECTED_ROUTE = "detected_route"
 
 SPEED_THRESHOLD_DRIVING = 30  # km/h - above this is considered driving
 SPEED_THRESHOLD_STOPPED = 5  # km/h - below this is considered stopped
+DETOUR_DISTANCE = 1000  # meters - further from the route is a detour
@@ -0,0 +1,88 @@
+"""Missed and delayed departure detection."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from .const import STATUS_DELAYED, STATUS_MISSED
+
+# Speed assumed for someone not yet heading to the station, e.g. about to
+# cycle there. Anyone who cannot make it even at this speed will miss it.
+ASSUMED_APPROACH_SPEED = 15  # km/h
+MISS_MARGIN = 60  # seconds - predicted lateness before reporting Missed
+
+
+class DepartureMonitor:
+    """Missed/Delayed state machine of one person for their next departure.
+
+    The state is kept per scheduled departure and reset when it changes.
+    Before the deadline (departure plus delay plus departure_window) the
+    time needed to reach the station at the person's speed toward it is
+    compared with the time left, so a miss is reported as soon as it can
+    no longer be made. Once boarded or missed that sticks until the next
+    departure. next_deadline is when the outcome may flip without any new
+    fix, so the tracker only needs to re-evaluate then.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without a departure."""
+        self.departure: datetime | None = None
+        self.boarded = False
+        self.missed = False
+        self.next_deadline: datetime | None = None
+
+    def evaluate(
+        self,
+        now: datetime,
+        departure: datetime | None,
+        delay: int,
+        window: float,
+        at_station: bool,
+        left_station: bool,
+        distance_to_station: float,
+        station_radius: float,
+        closing_speed: float,
+    ) -> str | None:
+        """Return Missed or Delayed when it overrides the location status.
+
+        left_station is True when the person is on the route beyond the
+        station, closing_speed is their speed toward the station in km/h.
+        """
+        if departure is None:
+            self.departure = self.next_deadline = None
+            return None
+        if departure != self.departure:
+            self.departure = departure
+            self.boarded = self.missed = False
+
+        leaves = departure + timedelta(minutes=delay)
+        deadline = leaves + timedelta(minutes=window)
+        delayed = STATUS_DELAYED if delay > 0 else None
+        self.next_deadline = None
+
+        if self.boarded or (left_station and now >= leaves - timedelta(minutes=window)):
+            self.boarded = True
+            return delayed
+
+        if at_station:
+            if now > deadline:
+                self.missed = True
+                return STATUS_MISSED
+            # A later delay update can still change the outcome
+            self.next_deadline = deadline
+            self.missed = False
+            return delayed
+
+        if self.missed or now >= deadline:
+            self.missed = True
+            return STATUS_MISSED
+
+        speed = max(closing_speed, ASSUMED_APPROACH_SPEED) / 3.6
+        needed = timedelta(seconds=max(distance_to_station - station_radius, 0) / speed)
+        latest_start = deadline - needed
+        if now > latest_start + timedelta(seconds=MISS_MARGIN):
+            # Still recoverable by reaching the station before the deadline
+            self.next_deadline = deadline
+            return STATUS_MISSED
+
+        self.next_deadline = latest_start + timedelta(seconds=MISS_MARGIN)
+        return None
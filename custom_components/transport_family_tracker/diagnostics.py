@@ -0,0 +1,31 @@
+"""Diagnostics support for Family Transport Tracker."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = entry_data["coordinator"]
+    engine = coordinator.engine
+
+    return {
+        "state_writes": coordinator.state_writes,
+        "state_writes_avoided": coordinator.state_writes_avoided,
+        "tracker": coordinator.tracker.diagnostics(),
+        "notifications": entry_data["notifications"].diagnostics(),
+        # Shared by all config entries
+        "engine": {
+            "entries": len(engine.coordinators),
+            "people": len(engine.position_filters),
+            "routes": len(engine.routes),
+        },
+    }
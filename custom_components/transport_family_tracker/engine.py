@@ -0,0 +1,185 @@
+"""Tracking engine shared by all config entries."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import (
+    async_track_point_in_time,
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_ENGINE, FALLBACK_UPDATE_INTERVAL, UPDATE_INTERVAL
+from .route import RouteCache
+from .smoothing import PositionFilter
+
+if TYPE_CHECKING:
+    from . import FamilyTransportCoordinator
+
+
+class TrackerEngine:
+    """Scheduling and caches shared by the config entries of one hass.
+
+    Every entry registers its coordinator. The route cache and position
+    filters are shared, so a route sensor is parsed and a fix smoothed
+    once however many entries use them. One state listener covers the
+    input entities of all event driven entries and fans changes out to
+    the coordinators tracking them, and a single poll timer and schedule
+    boundary wakeup replace the per entry ones. A person in several
+    entries is owned by the first, which keeps their trip history. The
+    engine is reference counted by its entries and removes itself with
+    the last one.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize without entries."""
+        self.hass = hass
+        self.routes = RouteCache()
+        self.position_filters: dict[str, PositionFilter] = {}
+        self.coordinators: dict[str, FamilyTransportCoordinator] = {}
+        self._unsub_state: CALLBACK_TYPE | None = None
+        self._unsub_poll: CALLBACK_TYPE | None = None
+        self._unsub_wakeup: CALLBACK_TYPE | None = None
+
+    @classmethod
+    def async_get(cls, hass: HomeAssistant) -> TrackerEngine:
+        """Return the engine of a hass instance, creating it if needed."""
+        if (engine := hass.data.get(DATA_ENGINE)) is None:
+            engine = hass.data[DATA_ENGINE] = cls(hass)
+        return engine
+
+    @callback
+    def async_add(self, entry_id: str, coordinator: FamilyTransportCoordinator) -> None:
+        """Register the coordinator of a config entry."""
+        self.coordinators[entry_id] = coordinator
+        self._async_track_entities()
+        if self._unsub_poll is None:
+            self._unsub_poll = async_track_time_interval(
+                self.hass, self._async_poll, timedelta(seconds=UPDATE_INTERVAL)
+            )
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Unregister a config entry, releasing what no other entry uses."""
+        self.coordinators.pop(entry_id, None)
+        if not self.coordinators:
+            self._async_cancel()
+            self.hass.data.pop(DATA_ENGINE, None)
+            return
+
+        tracked = set().union(*(
+            coordinator.tracker.get_tracked_entities()
+            for coordinator in self.coordinators.values()
+        ))
+        for person_entity in set(self.position_filters) - tracked:
+            del self.position_filters[person_entity]
+        self.routes.retain(tracked)
+        self._async_track_entities()
+        self.async_schedule_wakeup()
+
+    @callback
+    def async_owner(self, person_entity: str) -> FamilyTransportCoordinator | None:
+        """Return the coordinator of the first entry tracking a person.
+
+        Every entry evaluates its people, but a person tracked by several
+        entries has their trips recorded by this entry only.
+        """
+        for coordinator in self.coordinators.values():
+            if person_entity in coordinator.tracker.schedules:
+                return coordinator
+        return None
+
+    @callback
+    def _async_cancel(self) -> None:
+        """Cancel the listener and timers."""
+        for unsub in (self._unsub_state, self._unsub_poll, self._unsub_wakeup):
+            if unsub:
+                unsub()
+        self._unsub_state = self._unsub_poll = self._unsub_wakeup = None
+
+    @callback
+    def _async_track_entities(self) -> None:
+        """Listen to the input entities of all event driven entries."""
+        if self._unsub_state:
+            self._unsub_state()
+            self._unsub_state = None
+
+        entity_map: dict[str, list[tuple[FamilyTransportCoordinator, str]]] = {}
+        for coordinator in self.coordinators.values():
+            if not coordinator.event_driven:
+                continue
+            for entity_id, people in coordinator.tracker.get_tracked_entities().items():
+                entity_map.setdefault(entity_id, []).extend(
+                    (coordinator, person_entity) for person_entity in people
+                )
+        if not entity_map:
+            return
+
+        @callback
+        def _async_state_changed(event: Event) -> None:
+            entity_id = event.data["entity_id"]
+            now = dt_util.now()
+            for coordinator, person_entity in entity_map.get(entity_id, ()):
+                tracker = coordinator.tracker
+                if entity_id == person_entity:
+                    # Evaluate a fix only when it enters or leaves a station
+                    # or the route corridor, or the person's cadence expired
+                    crossed = tracker.crossed_geofence(
+                        person_entity, event.data["new_state"], now
+                    )
+                    if not crossed and not tracker.is_due(person_entity, now):
+                        tracker.fixes_skipped += 1
+                        continue
+                self.hass.async_create_task(
+                    coordinator.async_refresh_person(person_entity)
+                )
+
+        self._unsub_state = async_track_state_change_event(
+            self.hass, list(entity_map), _async_state_changed
+        )
+
+    async def _async_poll(self, now: datetime) -> None:
+        """Refresh the entries whose polling interval has passed."""
+        due = []
+        for coordinator in self.coordinators.values():
+            interval = FALLBACK_UPDATE_INTERVAL if coordinator.event_driven else UPDATE_INTERVAL
+            last = coordinator.last_full_update
+            # A little slack so a poll landing just short still counts
+            if last is None or (now - last).total_seconds() >= interval - 1:
+                due.append(coordinator.async_refresh())
+        await asyncio.gather(*due)
+
+    @callback
+    def async_schedule_wakeup(self) -> None:
+        """Schedule a refresh at the next schedule boundary of any entry."""
+        if self._unsub_wakeup:
+            self._unsub_wakeup()
+            self._unsub_wakeup = None
+        now = dt_util.now()
+        boundaries = [
+            boundary
+            for coordinator in self.coordinators.values()
+            if coordinator.event_driven
+            and (boundary := coordinator.tracker.next_schedule_boundary(now))
+        ]
+        if boundaries:
+            self._unsub_wakeup = async_track_point_in_time(
+                self.hass, self._async_wakeup, min(boundaries)
+            )
+
+    async def _async_wakeup(self, now: datetime) -> None:
+        """Refresh the entries whose schedule window opened or closed."""
+        self._unsub_wakeup = None
+        due = []
+        for coordinator in self.coordinators.values():
+            last = coordinator.last_full_update
+            boundary = coordinator.tracker.next_schedule_boundary(last) if last else None
+            if coordinator.event_driven and (last is None or (boundary and boundary <= now)):
+                coordinator.tracker.reset_cadence()
+                due.append(coordinator.async_refresh())
+        await asyncio.gather(*due)
+        self.async_schedule_wakeup()
@@ -0,0 +1,47 @@
+"""Base entity for Family Transport Tracker."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import FamilyTransportCoordinator
+
+
+class PersonEntity(CoordinatorEntity, ABC):
+    """Base for entities showing one person's tracking data.
+
+    Only updated for coordinator updates that changed the person's data.
+    State and attributes are rebuilt once per update and only written when
+    they differ from what was last written, counted in the coordinator.
+    """
+
+    def __init__(self, coordinator: FamilyTransportCoordinator, person_entity: str) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator, context=person_entity)
+        self._person_entity = person_entity
+        self._written: tuple | None = None
+        self._update_from_data()
+
+    @property
+    @abstractmethod
+    def _value(self) -> Any:
+        """Return the value written as the entity state."""
+
+    @abstractmethod
+    def _update_from_data(self) -> None:
+        """Set the _attr_ values from the coordinator data."""
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if something visible changed."""
+        self._update_from_data()
+        written = (self.available, self._value, self._attr_extra_state_attributes)
+        if written == self._written:
+            self.coordinator.state_writes_avoided += 1
+            return
+        self._written = written
+        self.coordinator.state_writes += 1
+        self.async_write_ha_state()
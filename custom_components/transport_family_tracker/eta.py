@@ -0,0 +1,182 @@
+"""Car ETA estimation from live speed and learned route segment times."""
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from math import ceil, exp, isnan, nan
+
+from .progress import ProgressInfo
+from .route import RouteInfo
+
+BIN_LENGTH = 500  # meters of route per learned segment time
+SPEED_TIME_CONSTANT = 120  # seconds - memory of the speed average
+DEFAULT_SPEED = 50  # km/h - assumed far ahead on routes without history
+MIN_SPEED = 10  # km/h - floor, so a red light does not push the ETA to infinity
+LEARNING_RATE = 0.3  # weight of a new trip in the learned segment times
+MIN_OBSERVATION = 100  # meters driven before a pace is recorded
+MAX_GAP = 300  # seconds - longer gaps or waits are not learned from
+LIVE_DISTANCE = 2000  # meters ahead where the live speed is blended in
+
+
+class SegmentTimes:
+    """Learned pace of one route, in seconds per meter per BIN_LENGTH bin.
+
+    Stored as a float array, NaN where nothing has been learned yet.
+    """
+
+    def __init__(self, bins: int, paces: list[float | None] | None = None) -> None:
+        """Initialize, optionally from stored paces."""
+        self.paces = array("f", [nan] * bins)
+        if paces and len(paces) == bins:
+            for position, pace in enumerate(paces):
+                if pace is not None:
+                    self.paces[position] = pace
+
+    def __len__(self) -> int:
+        """Return the number of bins."""
+        return len(self.paces)
+
+    def learn(self, start: float, end: float, pace: float) -> None:
+        """Blend an observed pace into the bins between two route distances."""
+        last = min(ceil(end / BIN_LENGTH), len(self.paces))
+        for position in range(int(start // BIN_LENGTH), last):
+            old = self.paces[position]
+            self.paces[position] = pace if isnan(old) else old + LEARNING_RATE * (pace - old)
+
+    def as_list(self) -> list[float | None]:
+        """Return the paces for storage, None where unknown."""
+        return [None if isnan(pace) else round(pace, 4) for pace in self.paces]
+
+
+@dataclass
+class _Trip:
+    """Progress of the ongoing trip of one person."""
+
+    route: str
+    time: datetime
+    speed: float  # m/s, exponentially weighted
+    pending_from: float
+    pending_time: datetime
+
+
+class EtaEstimator:
+    """Estimate car arrival times.
+
+    The remaining distance is measured along the route. Each bin of it is
+    covered at the pace learned from earlier trips on that route, blended
+    with the person's exponentially weighted speed for the next
+    LIVE_DISTANCE. Where nothing is learned yet the live speed is used,
+    but no less than DEFAULT_SPEED beyond LIVE_DISTANCE, so waiting at a
+    light or walking to the car does not stretch the whole trip.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without history."""
+        self.segment_times: dict[str, SegmentTimes] = {}
+        self._trips: dict[str, _Trip] = {}
+        self.version = 0  # counts the changes to the segment times
+
+    def update(
+        self,
+        person_entity: str,
+        route: RouteInfo,
+        progress: ProgressInfo | None,
+        straight_distance: float,
+        speed: float,
+        now: datetime,
+    ) -> datetime:
+        """Record a car fix and return the estimated arrival time.
+
+        Without a route match (a detour) the straight line distance to the
+        destination is used instead of the distance along the route.
+        """
+        speed_ms = max(speed, 0) / 3.6
+        trip = self._trips.get(person_entity)
+        if trip is None or trip.route != route.entity_id:
+            trip = self._trips[person_entity] = _Trip(
+                route.entity_id, now, speed_ms or DEFAULT_SPEED / 3.6, 0.0, now
+            )
+        elif (elapsed := (now - trip.time).total_seconds()) > 0:
+            # Time based weight, so irregular fixes average correctly
+            weight = 1 - exp(-elapsed / SPEED_TIME_CONSTANT)
+            trip.speed += weight * (speed_ms - trip.speed)
+
+        if progress is None:
+            trip.time = now
+            trip.pending_time = now
+            return now + timedelta(seconds=straight_distance / max(trip.speed, MIN_SPEED / 3.6))
+
+        self._learn(trip, route, progress.travelled, now)
+        seconds = self._remaining_seconds(
+            self._segment_times(route), progress.travelled, progress.remaining, trip.speed
+        )
+        return now + timedelta(seconds=seconds)
+
+    def _segment_times(self, route: RouteInfo) -> SegmentTimes:
+        """Return the learned times of a route, resetting on a new geometry."""
+        bins = max(ceil(route.index.length / BIN_LENGTH), 1)
+        times = self.segment_times.get(route.entity_id)
+        if times is None or len(times) != bins:
+            times = self.segment_times[route.entity_id] = SegmentTimes(bins)
+            self.version += 1
+        return times
+
+    def _learn(self, trip: _Trip, route: RouteInfo, travelled: float, now: datetime) -> None:
+        """Learn the pace over the distance driven since the last record."""
+        gap = (now - trip.time).total_seconds()
+        trip.time = now
+        if (
+            travelled < trip.pending_from
+            or gap > MAX_GAP
+            or (now - trip.pending_time).total_seconds() > MAX_GAP
+        ):
+            # Went backwards (a new trip), lost track or waited before
+            # setting off: start over here
+            trip.pending_from = travelled
+            trip.pending_time = now
+            return
+
+        driven = travelled - trip.pending_from
+        if driven >= MIN_OBSERVATION:
+            pace = (now - trip.pending_time).total_seconds() / driven
+            self._segment_times(route).learn(trip.pending_from, travelled, pace)
+            self.version += 1
+            trip.pending_from = travelled
+            trip.pending_time = now
+
+    @staticmethod
+    def _remaining_seconds(
+        times: SegmentTimes, travelled: float, remaining: float, speed: float
+    ) -> float:
+        """Add up the time to cover the remaining bins."""
+        live_pace = 1 / max(speed, MIN_SPEED / 3.6)
+        far_pace = min(live_pace, 3.6 / DEFAULT_SPEED)
+        end = travelled + remaining
+        seconds = 0.0
+        position = travelled
+        while position < end:
+            bin_end = min((position // BIN_LENGTH + 1) * BIN_LENGTH, end)
+            learned = times.paces[min(int(position // BIN_LENGTH), len(times) - 1)]
+            near = position - travelled < LIVE_DISTANCE
+            if isnan(learned):
+                pace = live_pace if near else far_pace
+            elif near:
+                pace = (learned + live_pace) / 2
+            else:
+                pace = learned
+            seconds += (bin_end - position) * pace
+            position = bin_end
+        return seconds
+
+    def restore(self, stored: dict[str, list[float | None]]) -> None:
+        """Load stored segment times."""
+        for route_entity, paces in stored.items():
+            self.segment_times[route_entity] = SegmentTimes(len(paces), paces)
+
+    def as_dict(self) -> dict[str, list[float | None]]:
+        """Return the segment times for storage."""
+        return {
+            route_entity: times.as_list()
+            for route_entity, times in self.segment_times.items()
+        }
@@ -0,0 +1,125 @@
+"""Station and route corridor geofences."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import cos, radians
+
+from .geometry import METERS_PER_DEGREE, BoundingBox, within_distance
+from .route import RouteInfo
+
+
+def _expand(bbox: BoundingBox, meters: float) -> BoundingBox:
+    """Grow a bounding box by a distance on every side."""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    lat_margin = meters / METERS_PER_DEGREE
+    lon_margin = lat_margin / max(cos(radians(max(abs(min_lat), abs(max_lat)))), 0.01)
+    return min_lat - lat_margin, min_lon - lon_margin, max_lat + lat_margin, max_lon + lon_margin
+
+
+def _in_bbox(bbox: BoundingBox, lat: float, lon: float) -> bool:
+    """Return True if a point lies within a bounding box."""
+    return bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]
+
+
+@dataclass(frozen=True)
+class StationFence:
+    """Circle of station_radius around a station."""
+
+    name: str
+    lat: float
+    lon: float
+    radius: float
+    bbox: BoundingBox
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """Return True if a point is inside the circle."""
+        return within_distance(lat, lon, self.lat, self.lon, self.radius)
+
+
+@dataclass(frozen=True)
+class CorridorFence:
+    """Every point within route_tolerance of a route line.
+
+    This is the route buffered by the tolerance; instead of building the
+    polygon, points are tested against the route index.
+    """
+
+    name: str
+    route: RouteInfo
+    tolerance: float
+    bbox: BoundingBox
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """Return True if a point is inside the corridor."""
+        return self.route.index.is_near(lat, lon, self.tolerance)
+
+
+class RouteGeofences:
+    """The origin and destination stations and the corridor of a route."""
+
+    def __init__(self, route: RouteInfo, station_radius: float, tolerance: float) -> None:
+        """Build the geofences of a parsed route."""
+        self.route = route
+        self.fences: list[StationFence | CorridorFence] = []
+        if route.bbox is None or route.index is None:
+            return
+
+        for name, (lat, lon) in (
+            ("origin", route.origin_coords[:2]),
+            ("destination", route.destination_coords[:2]),
+        ):
+            self.fences.append(StationFence(
+                name, lat, lon, station_radius, _expand((lat, lon, lat, lon), station_radius)
+            ))
+
+        self.fences.append(CorridorFence(
+            "corridor", route, tolerance, _expand(route.bbox, tolerance)
+        ))
+
+    def containing(self, lat: float, lon: float) -> frozenset[str]:
+        """Return the names of the geofences containing a point.
+
+        The bounding boxes are checked first, so a point far from the route
+        costs a few comparisons.
+        """
+        return frozenset(
+            fence.name
+            for fence in self.fences
+            if _in_bbox(fence.bbox, lat, lon) and fence.contains(lat, lon)
+        )
+
+
+class GeofenceMonitor:
+    """Which geofences of their expected route each person is in."""
+
+    def __init__(self, station_radius: float, tolerance: float) -> None:
+        """Initialize without geofences."""
+        self.station_radius = station_radius
+        self.tolerance = tolerance
+        self._routes: dict[str, RouteGeofences] = {}
+        # Person: (route entity, names of the geofences they are in)
+        self._inside: dict[str, tuple[str | None, frozenset[str]]] = {}
+
+    def update(
+        self, person_entity: str, route: RouteInfo | None, lat: float, lon: float
+    ) -> bool:
+        """Record a fix and return True if it entered or left a geofence.
+
+        A change of expected route counts as a crossing too.
+        """
+        inside: frozenset[str] = frozenset()
+        if route is not None:
+            inside = self._geofences(route).containing(lat, lon)
+        state = (route.entity_id if route else None, inside)
+        previous = self._inside.get(person_entity)
+        self._inside[person_entity] = state
+        return state != previous
+
+    def _geofences(self, route: RouteInfo) -> RouteGeofences:
+        """Return the geofences of a route, rebuilding them for a new geometry."""
+        geofences = self._routes.get(route.entity_id)
+        if geofences is None or geofences.route is not route:
+            geofences = self._routes[route.entity_id] = RouteGeofences(
+                route, self.station_radius, self.tolerance
+            )
+        return geofences
@@ -0,0 +1,539 @@
+"""Route geometry helpers for Family Transport Tracker."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator, Sequence
+from math import atan2, cos, degrees, inf, radians, sin, sqrt
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with Home Assistant
+    np = None
+
+EARTH_RADIUS = 6371000  # meters
+METERS_PER_DEGREE = radians(1) * EARTH_RADIUS
+
+# Grid cell size of the route index in degrees latitude (~1.1 km). Longitude
+# cells are the same size in degrees, which is ~0.7 km in the Netherlands.
+GRID_CELL_SIZE = 0.01
+
+# Below this many segments the per-call overhead of numpy outweighs the gain
+VECTORIZE_THRESHOLD = 64
+
+# (min lat, min lon, max lat, max lon)
+BoundingBox = tuple[float, float, float, float]
+
+
+class GeometryCounters:
+    """Running totals of distance computations, shown in the diagnostics."""
+
+    __slots__ = ("distances", "planar", "segments")
+
+    def __init__(self) -> None:
+        """Initialize at zero."""
+        self.distances = 0  # point to point (haversine)
+        self.planar = 0  # point to point (equirectangular)
+        self.segments = 0  # point to segment
+
+
+COUNTERS = GeometryCounters()
+
+
+def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate distance between two GPS coordinates in meters."""
+    COUNTERS.distances += 1
+    lat1_rad = radians(lat1)
+    lat2_rad = radians(lat2)
+    delta_lat = radians(lat2 - lat1)
+    delta_lon = radians(lon2 - lon1)
+
+    a = sin(delta_lat/2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+
+    return EARTH_RADIUS * c
+
+
+def planar_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate a short distance between two GPS coordinates in meters.
+
+    Uses an equirectangular projection at the mean latitude: one cosine
+    instead of the trigonometry of calculate_distance. Within the
+    Netherlands it differs from calculate_distance by under a centimeter up
+    to 10 km and by 0.01% (a few meters) up to 100 km; the error grows with
+    the square of the distance, so long distances use calculate_distance.
+    """
+    COUNTERS.planar += 1
+    dx = (lon2 - lon1) * cos(radians((lat1 + lat2) / 2))
+    dy = lat2 - lat1
+    return sqrt(dx * dx + dy * dy) * METERS_PER_DEGREE
+
+
+def within_distance(
+    lat1: float, lon1: float, lat2: float, lon2: float, meters: float
+) -> bool:
+    """Return True if two GPS coordinates are at most meters apart.
+
+    The planar_distance test on squared distances, without a square root.
+    """
+    COUNTERS.planar += 1
+    dx = (lon2 - lon1) * cos(radians((lat1 + lat2) / 2))
+    dy = lat2 - lat1
+    limit = meters / METERS_PER_DEGREE
+    return dx * dx + dy * dy <= limit * limit
+
+
+def calculate_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate the initial bearing from one coordinate to another.
+
+    Returns degrees clockwise from north.
+    """
+    lat1_rad = radians(lat1)
+    lat2_rad = radians(lat2)
+    delta_lon = radians(lon2 - lon1)
+
+    x = sin(delta_lon) * cos(lat2_rad)
+    y = cos(lat1_rad) * sin(lat2_rad) - sin(lat1_rad) * cos(lat2_rad) * cos(delta_lon)
+    return degrees(atan2(x, y)) % 360
+
+
+def _haversine_np(lat1, lon1, lat2, lon2):
+    """Vectorized haversine on radians, broadcasting numpy style."""
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distance_to_segment(
+    lat: float,
+    lon: float,
+    lat1: float,
+    lon1: float,
+    lat2: float,
+    lon2: float,
+    scale: float | None = None,
+) -> float:
+    """Calculate distance in meters from a point to a line segment.
+
+    Uses an equirectangular projection around the point, which is accurate
+    to well below a meter for segments of a few kilometers. Pass the
+    point's lon_scale as scale when testing many segments against one point.
+    """
+    return project_to_segment(lat, lon, lat1, lon1, lat2, lon2, scale)[0]
+
+
+def lon_scale(lat: float) -> float:
+    """Return the meters per degree of longitude at a latitude."""
+    return cos(radians(lat)) * METERS_PER_DEGREE
+
+
+def project_to_segment(
+    lat: float,
+    lon: float,
+    lat1: float,
+    lon1: float,
+    lat2: float,
+    lon2: float,
+    scale: float | None = None,
+) -> tuple[float, float]:
+    """Project a point onto a line segment.
+
+    Returns the distance in meters to the closest point of the segment and
+    where that point lies, as a fraction from the start (0) to the end (1).
+    """
+    COUNTERS.segments += 1
+    kx = scale or lon_scale(lat)
+    ky = METERS_PER_DEGREE
+
+    ax = (lon1 - lon) * kx
+    ay = (lat1 - lat) * ky
+    bx = (lon2 - lon) * kx
+    by = (lat2 - lat) * ky
+
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return sqrt(ax * ax + ay * ay), 0.0
+
+    # Project the point (origin) onto the segment and clamp to its ends
+    t = max(0.0, min(1.0, -(ax * dx + ay * dy) / length_sq))
+    px = ax + t * dx
+    py = ay + t * dy
+    return sqrt(px * px + py * py), t
+
+
+def _segment_distances_np(lat, lon, starts, ends):
+    """Vectorized distance_to_segment over arrays of segment end points.
+
+    lat and lon are one point or an array of points, one per segment.
+    """
+    COUNTERS.segments += len(starts)
+    kx = np.cos(np.radians(lat)) * METERS_PER_DEGREE
+    ky = METERS_PER_DEGREE
+
+    ax = (starts[:, 1] - lon) * kx
+    ay = (starts[:, 0] - lat) * ky
+    dx = (ends[:, 1] - lon) * kx - ax
+    dy = (ends[:, 0] - lat) * ky - ay
+
+    length_sq = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(length_sq > 0, -(ax * dx + ay * dy) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(ax + t * dx, ay + t * dy)
+
+
+class Polyline(Sequence):
+    """Route points as (lat, lon) pairs in one flat array of doubles.
+
+    Takes 16 bytes per point instead of the ~120 of a list of two float
+    lists, and numpy reads it without copying.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: array | None = None) -> None:
+        """Initialize from lat, lon, lat, lon... values."""
+        self.values = values if values is not None else array("d")
+
+    @classmethod
+    def from_coordinates(cls, coordinates: Sequence) -> Polyline:
+        """Pack [lat, lon, ...] coordinates, ignoring anything after lon."""
+        if isinstance(coordinates, Polyline):
+            return coordinates
+        values = array("d")
+        for coord in coordinates:
+            values.append(float(coord[0]))
+            values.append(float(coord[1]))
+        return cls(values)
+
+    def __len__(self) -> int:
+        """Return the number of points."""
+        return len(self.values) // 2
+
+    def __getitem__(self, position: int) -> tuple[float, float]:
+        """Return a point as a (lat, lon) tuple."""
+        values = self.values
+        if position < 0:
+            position += len(values) // 2
+        offset = 2 * position
+        if position < 0 or offset >= len(values):
+            raise IndexError("polyline index out of range")
+        return values[offset], values[offset + 1]
+
+    def __iter__(self) -> Iterator[tuple[float, float]]:
+        """Iterate over the points."""
+        values = self.values
+        return zip(values[::2], values[1::2])
+
+    def __eq__(self, other: object) -> bool:
+        """Return True for the same points."""
+        return isinstance(other, Polyline) and self.values == other.values
+
+    __hash__ = None
+
+    def as_numpy(self):
+        """Return the points as an (n, 2) numpy view of the array."""
+        return np.frombuffer(self.values, dtype=float).reshape(-1, 2)
+
+    def subset(self, positions: Sequence[int]) -> Polyline:
+        """Return the points at some positions."""
+        values = array("d")
+        for position in positions:
+            values.append(self.values[2 * position])
+            values.append(self.values[2 * position + 1])
+        return Polyline(values)
+
+    def bbox(self) -> BoundingBox | None:
+        """Return the bounding box of the points, None when empty."""
+        if not self.values:
+            return None
+        lats = self.values[::2]
+        lons = self.values[1::2]
+        return min(lats), min(lons), max(lats), max(lons)
+
+    def path_lengths(self) -> array:
+        """Return the distance along the line to every point in meters."""
+        if np is not None and len(self) > 1:
+            radians_ = np.radians(self.as_numpy())
+            steps = _haversine_np(*radians_[:-1].T, *radians_[1:].T)
+            return array("d", np.concatenate(([0.0], np.cumsum(steps))).tobytes())
+        lengths = array("d", [0.0] * len(self))
+        points = list(self)
+        for position in range(1, len(points)):
+            lengths[position] = lengths[position - 1] + calculate_distance(
+                *points[position - 1], *points[position]
+            )
+        return lengths
+
+
+def simplify(polyline: Polyline, tolerance: float) -> list[int]:
+    """Return the positions of the points kept by Douglas-Peucker.
+
+    Every dropped point is within tolerance meters of the line through the
+    kept ones, and the first and last point are always kept. Distances are
+    measured in an equirectangular projection around the middle of the
+    line, which is accurate enough at route scale.
+    """
+    count = len(polyline)
+    if count < 3 or tolerance <= 0:
+        return list(range(count))
+
+    values = polyline.values
+    bbox = polyline.bbox()
+    kx = cos(radians((bbox[0] + bbox[2]) / 2)) * METERS_PER_DEGREE
+    ky = METERS_PER_DEGREE
+    xs = [lon * kx for lon in values[1::2]]
+    ys = [lat * ky for lat in values[::2]]
+    if np is not None:
+        x_array = np.asarray(xs)
+        y_array = np.asarray(ys)
+
+    keep = bytearray(count)
+    keep[0] = keep[-1] = 1
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        ax, ay = xs[first], ys[first]
+        dx, dy = xs[last] - ax, ys[last] - ay
+        length_sq = dx * dx + dy * dy
+        if np is not None and last - first > VECTORIZE_THRESHOLD:
+            px = x_array[first + 1:last] - ax
+            py = y_array[first + 1:last] - ay
+            if length_sq:
+                t = np.clip((px * dx + py * dy) / length_sq, 0.0, 1.0)
+                px = px - t * dx
+                py = py - t * dy
+            distances = np.hypot(px, py)
+            farthest = int(distances.argmax())
+            distance = float(distances[farthest])
+            farthest += first + 1
+        else:
+            distance, farthest = -1.0, first
+            for position in range(first + 1, last):
+                px, py = xs[position] - ax, ys[position] - ay
+                if length_sq:
+                    t = max(0.0, min(1.0, (px * dx + py * dy) / length_sq))
+                    px -= t * dx
+                    py -= t * dy
+                point_distance = sqrt(px * px + py * py)
+                if point_distance > distance:
+                    distance, farthest = point_distance, position
+        if distance > tolerance:
+            keep[farthest] = 1
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    return [position for position in range(count) if keep[position]]
+
+
+def _cell(lat: float, lon: float) -> tuple[int, int]:
+    """Return the grid cell containing a coordinate."""
+    return int(lat // GRID_CELL_SIZE), int(lon // GRID_CELL_SIZE)
+
+
+class RouteIndex:
+    """Grid bucket index over the segments of a route polyline.
+
+    Every segment is registered in each grid cell its bounding box touches,
+    so a query only has to look at the segments in the cells around the
+    query point instead of scanning the whole route. Segment i runs from
+    point i to point i + 1; a single point route has one zero length segment.
+    cumulative[i] is the distance along the route to point i.
+    """
+
+    def __init__(self, coordinates: Sequence, cumulative: Sequence[float] | None = None) -> None:
+        """Compile the route coordinates into the index.
+
+        cumulative gives the distance along the route to every point when
+        it differs from the straight line one, e.g. for a simplified route.
+        """
+        self.points = Polyline.from_coordinates(coordinates)
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        self._starts = self._ends = None
+        self.cumulative = (
+            array("d", cumulative) if cumulative is not None else self.points.path_lengths()
+        )
+        self.length = self.cumulative[-1] if self.cumulative else 0.0
+
+        if np is not None and len(self.points) > 1:
+            # Views on the point array, no copies
+            points = self.points.as_numpy()
+            self.segment_count = len(points) - 1
+            self._starts = points[:-1]
+            self._ends = points[1:]
+            self._build_cells_np(points)
+            return
+
+        self.segment_count = max(len(self.points) - 1, 1) if self.points else 0
+        if np is not None and self.points:
+            self._starts = self._ends = self.points.as_numpy()
+
+        point_cells = [_cell(lat, lon) for lat, lon in self.points]
+        for segment_id in range(self.segment_count):
+            row1, col1 = point_cells[segment_id]
+            row2, col2 = point_cells[min(segment_id + 1, len(point_cells) - 1)]
+            self._add_segment(segment_id, row1, col1, row2, col2)
+
+    def _add_segment(self, segment_id: int, row1: int, col1: int, row2: int, col2: int) -> None:
+        """Register a segment in every cell of its bounding box."""
+        for row in range(min(row1, row2), max(row1, row2) + 1):
+            for col in range(min(col1, col2), max(col1, col2) + 1):
+                self.cells.setdefault((row, col), []).append(segment_id)
+
+    def _build_cells_np(self, array) -> None:
+        """Fill the grid with numpy, grouping the single cell segments."""
+        rows = np.floor_divide(array[:, 0], GRID_CELL_SIZE).astype(np.int64)
+        cols = np.floor_divide(array[:, 1], GRID_CELL_SIZE).astype(np.int64)
+        row1, col1, row2, col2 = rows[:-1], cols[:-1], rows[1:], cols[1:]
+        single = (row1 == row2) & (col1 == col2)
+
+        # Most segments are far shorter than a cell: sort them by cell and
+        # add each run of equal cells in one go
+        ids = np.flatnonzero(single)
+        if len(ids):
+            order = np.lexsort((col1[ids], row1[ids]))
+            ids = ids[order]
+            id_rows, id_cols = row1[ids], col1[ids]
+            starts = np.flatnonzero(
+                np.r_[True, (np.diff(id_rows) != 0) | (np.diff(id_cols) != 0)]
+            )
+            for run, row, col in zip(
+                np.split(ids, starts[1:]), id_rows[starts].tolist(), id_cols[starts].tolist()
+            ):
+                self.cells[(row, col)] = run.tolist()
+
+        for segment_id in np.flatnonzero(~single).tolist():
+            self._add_segment(
+                segment_id,
+                int(row1[segment_id]), int(col1[segment_id]),
+                int(row2[segment_id]), int(col2[segment_id]),
+            )
+
+    def segment(self, segment_id: int) -> tuple[float, float, float, float]:
+        """Return the start and end coordinates of a segment."""
+        values = self.points.values
+        start = 2 * segment_id
+        end = min(start + 2, len(values) - 2)
+        return values[start], values[start + 1], values[end], values[end + 1]
+
+    def __len__(self) -> int:
+        """Return the number of points in the route."""
+        return len(self.points)
+
+    def _candidates(self, lat: float, lon: float, max_distance: float) -> set[int]:
+        """Return the segments in the cells within max_distance of a point."""
+        lat_margin = max_distance / METERS_PER_DEGREE
+        lon_margin = lat_margin / max(cos(radians(lat)), 0.01)
+        min_row, min_col = _cell(lat - lat_margin, lon - lon_margin)
+        max_row, max_col = _cell(lat + lat_margin, lon + lon_margin)
+
+        candidates: set[int] = set()
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                candidates.update(self.cells.get((row, col), ()))
+        return candidates
+
+    def distance_to_route(
+        self, lat: float, lon: float, max_distance: float | None = None
+    ) -> float:
+        """Return the distance in meters from a point to the route line.
+
+        With max_distance set only nearby segments are checked and inf is
+        returned when the route is further away than that.
+        """
+        nearest = self.nearest_segment(lat, lon, max_distance)
+        return nearest[1] if nearest else inf
+
+    def nearest_segment(
+        self, lat: float, lon: float, max_distance: float | None = None
+    ) -> tuple[int, float] | None:
+        """Return the closest segment to a point and its distance in meters.
+
+        With max_distance set only nearby segments are checked and None is
+        returned when the route is further away than that.
+        """
+        if not self.points:
+            return None
+
+        if max_distance is None:
+            candidates = range(self.segment_count)
+        else:
+            candidates = self._candidates(lat, lon, max_distance)
+
+        if not candidates:
+            return None
+        if self._starts is not None and len(candidates) >= VECTORIZE_THRESHOLD:
+            ids = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+            distances = _segment_distances_np(lat, lon, self._starts[ids], self._ends[ids])
+            best = int(distances.argmin())
+            nearest = int(ids[best]), float(distances[best])
+        else:
+            scale = lon_scale(lat)
+            nearest = min(
+                (
+                    (segment_id, distance_to_segment(lat, lon, *self.segment(segment_id), scale))
+                    for segment_id in candidates
+                ),
+                key=lambda candidate: candidate[1],
+            )
+
+        if max_distance is not None and nearest[1] > max_distance:
+            return None
+        return nearest
+
+    def nearest_segments(
+        self, points: Sequence, max_distance: float | None = None
+    ) -> list[tuple[int, float] | None]:
+        """Return nearest_segment for many points at once.
+
+        The candidate segments of all points are measured in one vectorized
+        pass, so matching everyone on a route costs one numpy call.
+        """
+        if self._starts is None or len(points) < 2:
+            return [self.nearest_segment(lat, lon, max_distance) for lat, lon in points]
+
+        point_ids: list[int] = []
+        segment_ids: list[int] = []
+        for position, (lat, lon) in enumerate(points):
+            if max_distance is None:
+                candidates = range(self.segment_count)
+            else:
+                candidates = self._candidates(lat, lon, max_distance)
+            point_ids.extend([position] * len(candidates))
+            segment_ids.extend(candidates)
+
+        nearest: list[tuple[int, float] | None] = [None] * len(points)
+        if not segment_ids:
+            return nearest
+        pairs = np.asarray(point_ids, dtype=np.intp)
+        segments = np.asarray(segment_ids, dtype=np.intp)
+        coords = np.asarray(points, dtype=float)[pairs]
+        distances = _segment_distances_np(
+            coords[:, 0], coords[:, 1], self._starts[segments], self._ends[segments]
+        )
+
+        # The closest candidate of each point comes first in this order
+        order = np.lexsort((distances, pairs))
+        first = order[np.r_[True, pairs[order][1:] != pairs[order][:-1]]]
+        for position, segment_id, distance in zip(
+            pairs[first].tolist(), segments[first].tolist(), distances[first].tolist()
+        ):
+            if max_distance is None or distance <= max_distance:
+                nearest[position] = (segment_id, distance)
+        return nearest
+
+    def along_route(self, segment_id: int, lat: float, lon: float) -> float:
+        """Return the distance along the route of a point's projection on a segment."""
+        _, fraction = project_to_segment(lat, lon, *self.segment(segment_id))
+        end = min(segment_id + 1, len(self.cumulative) - 1)
+        start_distance = self.cumulative[segment_id]
+        return start_distance + fraction * (self.cumulative[end] - start_distance)
+
+    def is_near(self, lat: float, lon: float, tolerance: float) -> bool:
+        """Return True if a point is within tolerance meters of the route."""
+        return self.distance_to_route(lat, lon, tolerance) <= tolerance
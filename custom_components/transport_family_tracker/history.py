@@ -0,0 +1,405 @@
+"""Append-only trip history log."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+import mmap
+import os
+import struct
+import threading
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STATUS_MISSED
+from .trips import Trip
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"FTTRIPS1"
+RECORD = struct.Struct("<cI")  # kind, body length
+STRING = struct.Struct("<H")  # string id, followed by the UTF-8 text
+# start, end, person, route, mode, start address, end address, distance,
+# largest delay, flags, status changes, track points
+TRIP = struct.Struct("<ddHHHHHfHBHH")
+STATUS = struct.Struct("<fHH")  # seconds since the start, status, mode
+POINT = struct.Struct("<ii")  # lat, lon in microdegrees
+
+KIND_STRING = b"S"
+KIND_TRIP = b"T"
+FLAG_MISSED = 1
+NO_STRING = 0xFFFF
+
+
+@dataclass
+class TripSummary:
+    """The fixed size header of a logged trip."""
+
+    person: str
+    route: str | None
+    mode: str | None
+    start: datetime
+    end: datetime
+    distance: float
+    delay: int
+    missed: bool
+
+
+@dataclass
+class TripStats:
+    """Aggregate of a group of trips."""
+
+    trips: int = 0
+    duration: float = 0.0  # seconds
+    distance: float = 0.0  # meters
+    missed: int = 0
+    delay: int = 0  # minutes, summed
+
+    def add(self, summary: TripSummary) -> None:
+        """Add a trip to the aggregate."""
+        self.trips += 1
+        self.duration += (summary.end - summary.start).total_seconds()
+        self.distance += summary.distance
+        self.missed += summary.missed
+        self.delay += summary.delay
+
+    def merge(self, other: TripStats) -> None:
+        """Add the trips of another aggregate."""
+        self.trips += other.trips
+        self.duration += other.duration
+        self.distance += other.distance
+        self.missed += other.missed
+        self.delay += other.delay
+
+    def as_dict(self) -> dict:
+        """Return the aggregate with averages, rounded for display."""
+        return {
+            "trips": self.trips,
+            "average_duration_minutes": round(self.duration / self.trips / 60, 1),
+            "average_distance_km": round(self.distance / self.trips / 1000, 1),
+            "average_delay_minutes": round(self.delay / self.trips, 1),
+            "missed": self.missed,
+        }
+
+
+class TripLog:
+    """Trips of all people in one append-only binary file.
+
+    The file is a sequence of records: string records intern person,
+    route, mode, status and address names as 16 bit ids, trip records hold
+    a fixed size header followed by the status changes and the track.
+    Reads go through a memory map. Only the offsets, start times and
+    people of the trips are kept in memory, so aggregates unpack just the
+    headers of the trips they need. A record cut short by a crash is
+    dropped when the file is opened.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize without opening the file."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._map: mmap.mmap | None = None
+        self._end = len(MAGIC)  # offset up to which records are indexed
+        self._offsets = array("Q")
+        self._starts = array("d")
+        self._people = array("H")
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+
+    def append(self, trips: Iterable[Trip]) -> None:
+        """Write finished trips to the end of the log."""
+        with self._lock:
+            self._open()
+            known = len(self._strings)
+            records = bytearray()
+            for trip in trips:
+                records += self._encode(trip, records)
+            if not records:
+                return
+            try:
+                self._file.write(records)
+                self._file.flush()
+            except OSError:
+                # Forget the names that never made it to the file
+                for text in self._strings[known:]:
+                    del self._string_ids[text]
+                del self._strings[known:]
+                raise
+            self._scan()
+
+    def summaries(
+        self,
+        person: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[TripSummary]:
+        """Return the headers of the trips started in a period."""
+        with self._lock:
+            self._open()
+            return [
+                self._summary(self._offsets[position])
+                for position in self._positions(person, since, until)
+            ]
+
+    def aggregate(
+        self,
+        person: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        group_by: str = "day",
+    ) -> dict[str, TripStats]:
+        """Return trip statistics per local day or per route."""
+        groups: dict[str, TripStats] = {}
+        for summary in self.summaries(person, since, until):
+            if group_by == "route":
+                key = summary.route or "Unknown"
+            else:
+                key = dt_util.as_local(summary.start).date().isoformat()
+            groups.setdefault(key, TripStats()).add(summary)
+        return groups
+
+    def trips(
+        self,
+        person: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[Trip]:
+        """Return the full trips, with statuses and tracks, started in a period."""
+        with self._lock:
+            self._open()
+            return [
+                self._trip(self._offsets[position])
+                for position in self._positions(person, since, until)
+            ]
+
+    def close(self) -> None:
+        """Close the file and its memory map."""
+        with self._lock:
+            self._unmap()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self) -> None:
+        """Open the file, creating it or setting a damaged one aside."""
+        if self._file is not None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as file:
+                magic = file.read(len(MAGIC))
+            if magic and magic != MAGIC:
+                _LOGGER.warning("Trip history %s is not readable, starting a new one", self.path)
+                os.replace(self.path, f"{self.path}.bad")
+        self._file = open(self.path, "ab+")  # noqa: SIM115
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+        self._scan()
+        if self._end < self._file.tell():
+            # Drop a record cut short by a crash, so new ones follow on
+            self._unmap()
+            self._file.truncate(self._end)
+            self._file.seek(self._end)
+            self._remap(self._end)
+
+    def _positions(
+        self, person: str | None, since: datetime | None, until: datetime | None
+    ) -> list[int]:
+        """Return the index positions of the trips of a person started in a period."""
+        person_id = self._string_ids.get(person) if person else None
+        if person and person_id is None:
+            return []
+        first = since.timestamp() if since else float("-inf")
+        last = until.timestamp() if until else float("inf")
+        return [
+            position
+            for position, start in enumerate(self._starts)
+            if first <= start < last
+            and (person_id is None or self._people[position] == person_id)
+        ]
+
+    def _remap(self, size: int) -> None:
+        """Map the file again if it grew beyond the current map."""
+        if self._map is not None and len(self._map) >= size:
+            return
+        self._unmap()
+        if size:
+            self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+
+    def _unmap(self) -> None:
+        """Close the memory map."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _scan(self) -> None:
+        """Index the records written since the last scan."""
+        size = os.fstat(self._file.fileno()).st_size
+        self._remap(size)
+        offset = self._end
+        while offset + RECORD.size <= size:
+            kind, length = RECORD.unpack_from(self._map, offset)
+            body = offset + RECORD.size
+            if body + length > size:
+                break
+            if kind == KIND_STRING:
+                # Strings written by this process are known already
+                (string_id,) = STRING.unpack_from(self._map, body)
+                if string_id == len(self._strings):
+                    self._add_string(bytes(self._map[body + STRING.size:body + length]).decode())
+            elif kind == KIND_TRIP:
+                start, _, person = TRIP.unpack_from(self._map, body)[:3]
+                self._offsets.append(body)
+                self._starts.append(start)
+                self._people.append(person)
+            offset = body + length
+        self._end = offset
+
+    def _add_string(self, text: str) -> int:
+        """Add a string to the in-memory table and return its id."""
+        self._string_ids[text] = len(self._strings)
+        self._strings.append(text)
+        return self._string_ids[text]
+
+    def _string_id(self, text: str | None, records: bytearray) -> int:
+        """Return the id of a string, adding a string record for a new one."""
+        if text is None:
+            return NO_STRING
+        if (string_id := self._string_ids.get(text)) is not None:
+            return string_id
+        if len(self._strings) >= NO_STRING:
+            return NO_STRING
+        data = text.encode()
+        string_id = len(self._strings)
+        records += RECORD.pack(KIND_STRING, STRING.size + len(data))
+        records += STRING.pack(string_id) + data
+        return self._add_string(text)
+
+    def _encode(self, trip: Trip, records: bytearray) -> bytes:
+        """Encode a trip record, adding string records for new names."""
+
+        def string(text: str | None) -> int:
+            return self._string_id(text, records)
+
+        missed = any(status == STATUS_MISSED for _, status, _ in trip.statuses)
+        body = bytearray(TRIP.pack(
+            trip.start.timestamp(),
+            (trip.end or trip.start).timestamp(),
+            string(trip.person),
+            string(trip.route),
+            string(trip.mode),
+            string(trip.start_address),
+            string(trip.end_address),
+            trip.distance,
+            min(max(trip.delay, 0), 0xFFFF),
+            FLAG_MISSED if missed else 0,
+            len(trip.statuses),
+            len(trip.track),
+        ))
+        for time, status, mode in trip.statuses:
+            body += STATUS.pack(
+                (time - trip.start).total_seconds(), string(status), string(mode)
+            )
+        for lat, lon in trip.track:
+            body += POINT.pack(round(lat * 1e6), round(lon * 1e6))
+        return RECORD.pack(KIND_TRIP, len(body)) + body
+
+    def _name(self, string_id: int) -> str | None:
+        """Return the string of an id, None for no string."""
+        return None if string_id == NO_STRING else self._strings[string_id]
+
+    def _summary(self, offset: int) -> TripSummary:
+        """Unpack the header of the trip record at an offset."""
+        (
+            start, end, person, route, mode, _, _, distance, delay, flags, _, _
+        ) = TRIP.unpack_from(self._map, offset)
+        return TripSummary(
+            person=self._name(person),
+            route=self._name(route),
+            mode=self._name(mode),
+            start=dt_util.utc_from_timestamp(start),
+            end=dt_util.utc_from_timestamp(end),
+            distance=distance,
+            delay=delay,
+            missed=bool(flags & FLAG_MISSED),
+        )
+
+    def _trip(self, offset: int) -> Trip:
+        """Unpack the full trip record at an offset."""
+        (
+            start, end, person, route, mode, start_address, end_address,
+            distance, delay, _, statuses, points,
+        ) = TRIP.unpack_from(self._map, offset)
+        start_time = dt_util.utc_from_timestamp(start)
+        offset += TRIP.size
+        status_list = []
+        for _ in range(statuses):
+            seconds, status, status_mode = STATUS.unpack_from(self._map, offset)
+            status_list.append(
+                (start_time + timedelta(seconds=seconds), self._name(status), self._name(status_mode))
+            )
+            offset += STATUS.size
+        track = [
+            (lat / 1e6, lon / 1e6)
+            for lat, lon in POINT.iter_unpack(self._map[offset:offset + points * POINT.size])
+        ]
+        return Trip(
+            person=self._name(person),
+            start=start_time,
+            end=dt_util.utc_from_timestamp(end),
+            start_address=self._name(start_address),
+            end_address=self._name(end_address),
+            track=track,
+            distance=distance,
+            statuses=status_list,
+            route=self._name(route),
+            delay=delay,
+        )
+
+
+class TripHistory:
+    """The trip log of a config entry, with file access in the executor."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the history."""
+        self.hass = hass
+        self.log = TripLog(hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry_id}.trips"))
+
+    async def async_record(self, trips: list[Trip]) -> None:
+        """Append finished trips to the log."""
+        await self.hass.async_add_executor_job(self.log.append, trips)
+
+    async def async_aggregate(
+        self,
+        person: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        group_by: str = "day",
+    ) -> dict[str, TripStats]:
+        """Return trip statistics per day or per route."""
+        return await self.hass.async_add_executor_job(
+            self.log.aggregate, person, since, until, group_by
+        )
+
+    async def async_close(self) -> None:
+        """Close the log."""
+        await self.hass.async_add_executor_job(self.log.close)
+
+    async def async_remove(self) -> None:
+        """Close and delete the log."""
+        await self.async_close()
+        await self.hass.async_add_executor_job(_remove, self.log.path)
+
+
+def _remove(path: str) -> None:
+    """Delete a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -1,55 +1,76 @@
 """Dutch public holidays checker."""
-from datetime import date
+from __future__ import annotations
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+
+def easter_sunday(year: int) -> date:
+    """Calculate Easter Sunday for a year in the Gregorian calendar.
+
+    Uses the anonymous Gregorian algorithm (Meeus/Jones/Butcher).
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=8)
+def dutch_holidays(year: int) -> frozenset[date]:
+    """Return all Dutch public holidays in a year."""
+    easter = easter_sunday(year)
+
+    # King's Day (Queen's Day before 2014) moves to Saturday when on a Sunday
+    kings_day = date(year, 4, 27) if year >= 2014 else date(year, 4, 30)
+    if kings_day.weekday() == 6:
+        kings_day -= timedelta(days=1)
+
+    return frozenset({
+        date(year, 1, 1),                # New Year's Day
+        easter - timedelta(days=2),      # Good Friday
+        easter,                          # Easter Sunday
+        easter + timedelta(days=1),      # Easter Monday
+        kings_day,                       # King's Day
+        date(year, 5, 5),                # Liberation Day (every 5 years, but commonly celebrated)
+        easter + timedelta(days=39),     # Ascension Day
+        easter + timedelta(days=49),     # Whit Sunday
+        easter + timedelta(days=50),     # Whit Monday
+        date(year, 12, 25),              # Christmas Day
+        date(year, 12, 26),              # Second Christmas Day
+    })
 
 
 def is_dutch_holiday(check_date: date) -> bool:
     """Check if a date is a Dutch public holiday.
-    
+
     Args:
         check_date: The date to check
-        
+
     Returns:
         True if the date is a Dutch public holiday, False otherwise
     """
-    year = check_date.year
-    
-    # Fixed holidays
-    fixed_holidays = [
-        (1, 1),   # New Year's Day
-        (4, 27),  # King's Day
-        (5, 5),   # Liberation Day (every 5 years, but commonly celebrated)
-        (12, 25), # Christmas Day
-        (12, 26), # Second Christmas Day
-    ]
-    
-    if (check_date.month, check_date.day) in fixed_holidays:
-        return True
-    
-    # Easter-based holidays (simplified - using approximation)
-    # For accurate Easter calculation, you'd use a library, but this is a simple approximation
-    easter_dates = {
-        2024: (3, 31),
-        2025: (4, 20),
-        2026: (4, 5),
-        2027: (3, 28),
-        2028: (4, 16),
-        2029: (4, 1),
-        2030: (4, 21),
-    }
-    
-    if year in easter_dates:
-        easter_month, easter_day = easter_dates[year]
-        
-        # Easter Monday (Easter + 1 day)
-        if check_date.month == easter_month and check_date.day == easter_day + 1:
-            return True
-        
-        # Good Friday (Easter - 2 days) - approximation
-        if check_date.month == easter_month and check_date.day == easter_day - 2:
-            return True
-        
-        # Ascension Day (Easter + 39 days) - approximation
-        # Whit Monday (Easter + 50 days) - approximation
-        # These are more complex to calculate accurately, simplified here
-    
-    return False
+    return check_date in dutch_holidays(check_date.year)
+
+
+def next_dutch_holiday(after: date) -> date:
+    """Return the first Dutch public holiday strictly after a date.
+
+    Args:
+        after: The date to search from
+
+    Returns:
+        The date of the next public holiday
+    """
+    upcoming = [day for day in dutch_holidays(after.year) if day > after]
+    if not upcoming:
+        # New Year's Day is always a holiday, so the next year has one
+        upcoming = dutch_holidays(after.year + 1)
+    return min(upcoming)
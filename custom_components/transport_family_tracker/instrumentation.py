@@ -0,0 +1,147 @@
+"""Timing and profiling of the tracker's update cycles."""
+from __future__ import annotations
+
+from bisect import bisect_left
+import cProfile
+from collections import deque
+import logging
+import pstats
+from time import perf_counter
+
+_LOGGER = logging.getLogger(__name__)
+
+CYCLE_HISTORY = 500  # update cycles kept for the duration histogram
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)  # milliseconds
+
+
+class _Phase:
+    """Context manager adding its wall time to a phase of TrackerStats."""
+
+    __slots__ = ("_totals", "_start")
+
+    def __init__(self, totals: list[float]) -> None:
+        """Initialize for the totals of one phase."""
+        self._totals = totals
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        """Start timing."""
+        self._start = perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        """Add the elapsed time to the phase."""
+        elapsed = perf_counter() - self._start
+        totals = self._totals
+        totals[0] += 1
+        totals[1] += elapsed
+        if elapsed > totals[2]:
+            totals[2] = elapsed
+
+
+class TrackerStats:
+    """Per-phase timers and update cycle durations of a tracker.
+
+    Phases are timed in wall time, so phases that await the executor
+    include the wait. Cycle durations are kept for the last CYCLE_HISTORY
+    updates, full and single person alike.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty."""
+        # Phase name: [calls, total seconds, max seconds]
+        self.phases: dict[str, list[float]] = {}
+        self.cycles: deque[float] = deque(maxlen=CYCLE_HISTORY)
+        self.cycle_count = 0
+
+    def phase(self, name: str) -> _Phase:
+        """Return a context manager timing a phase."""
+        if (totals := self.phases.get(name)) is None:
+            totals = self.phases[name] = [0, 0.0, 0.0]
+        return _Phase(totals)
+
+    def record_cycle(self, seconds: float) -> None:
+        """Record the duration of an update cycle."""
+        self.cycles.append(seconds)
+        self.cycle_count += 1
+
+    def percentile(self, percent: float) -> float | None:
+        """Return a percentile of the recent cycle durations in milliseconds."""
+        if not self.cycles:
+            return None
+        ordered = sorted(self.cycles)
+        position = min(int(len(ordered) * percent / 100), len(ordered) - 1)
+        return round(ordered[position] * 1000, 2)
+
+    def histogram(self) -> dict[str, int]:
+        """Return the number of recent cycles per duration bucket."""
+        counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        for seconds in self.cycles:
+            counts[bisect_left(HISTOGRAM_BOUNDS, seconds * 1000)] += 1
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}ms"]
+        return dict(zip(labels, counts))
+
+    def as_dict(self) -> dict:
+        """Return the timings for the diagnostics download."""
+        return {
+            "cycles": self.cycle_count,
+            "cycle_ms": {
+                "p50": self.percentile(50),
+                "p95": self.percentile(95),
+                "p99": self.percentile(99),
+                "histogram": self.histogram(),
+            },
+            "phases": {
+                name: {
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 1),
+                    "average_ms": round(total / calls * 1000, 3) if calls else None,
+                    "max_ms": round(longest * 1000, 3),
+                }
+                for name, (calls, total, longest) in self.phases.items()
+            },
+        }
+
+
+class CycleProfiler:
+    """Profile update cycles and write the statistics every N cycles.
+
+    The profiler runs for the whole cycle, so other work on the event loop
+    during its awaits is included too. Only meant for debugging.
+    """
+
+    def __init__(self, every: int, path: str) -> None:
+        """Initialize for a dump every `every` cycles to path."""
+        self.every = every
+        self.path = path
+        self._profile = cProfile.Profile()
+        self._cycles = 0
+        self._active = 0  # cycles currently running
+
+    def start(self) -> bool:
+        """Start profiling a cycle, False if another profiler is active."""
+        if not self._active:
+            try:
+                self._profile.enable()
+            except ValueError:
+                return False
+        self._active += 1
+        return True
+
+    def stop(self) -> pstats.Stats | None:
+        """Stop profiling a started cycle, returning the statistics once N are profiled."""
+        self._active -= 1
+        self._cycles += 1
+        if self._active:
+            return None
+        self._profile.disable()
+        if self._cycles < self.every:
+            return None
+        stats = pstats.Stats(self._profile)
+        self._profile = cProfile.Profile()
+        self._cycles = 0
+        return stats
+
+    def dump(self, stats: pstats.Stats) -> None:
+        """Write statistics to the profile file (blocking)."""
+        stats.dump_stats(self.path)
+        _LOGGER.debug("Wrote the profile of %s update cycles to %s", self.every, self.path)
@@ -0,0 +1,310 @@
+"""Notifications on status changes."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, time
+from functools import partial
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_ENTITY_ID
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util, slugify
+import voluptuous as vol
+
+from .const import (
+    CONF_NOTIFY,
+    STATUS_ALTERNATIVE,
+    STATUS_DELAYED,
+    STATUS_DETOURED,
+    STATUS_MISSED,
+    STATUS_STOPPED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+COALESCE_WINDOW = 30  # seconds - changes within it go out as one message per target
+DEBOUNCE = 600  # seconds before a person's same status is sent to a target again
+QUEUE_SIZE = 20  # messages waiting to be sent, the oldest is dropped when full
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 5  # seconds, doubled after every failed attempt
+
+NOTIFY_DOMAIN = "notify"
+TITLE = "Family Transport"
+
+TargetKey = tuple[tuple[str, tuple[str, ...]], ...]
+
+
+def describe(name: str, person_data: dict[str, Any]) -> str | None:
+    """Return the message line for a status worth a notification."""
+    status = person_data.get("status")
+    route = person_data.get("planned_route") or "their route"
+    if status == STATUS_MISSED:
+        return f"{name} missed the {route}"
+    if status == STATUS_DELAYED:
+        return f"{name}'s {route} is {person_data.get('delay_minutes') or 0} minutes late"
+    if status == STATUS_ALTERNATIVE:
+        detected = person_data.get("detected_route")
+        return f"{name} is taking another route" + (f" ({detected})" if detected else "")
+    if status == STATUS_DETOURED:
+        return f"{name} left the {route}"
+    if status == STATUS_STOPPED and person_data.get("unexpected_stop"):
+        return f"{name} stopped unexpectedly for {person_data.get('stop_duration')} minutes"
+    return None
+
+
+def target_key(target: dict[str, Any]) -> TargetKey:
+    """Return a hashable key for a target selector value."""
+    return tuple(sorted(
+        (key, tuple(sorted([value] if isinstance(value, str) else value)))
+        for key, value in target.items()
+        if value
+    ))
+
+
+@dataclass
+class StatusEvent:
+    """A status change waiting to be sent."""
+
+    person: str
+    status: str
+    text: str
+
+
+class NotificationDispatcher:
+    """Send notifications when someone's status changes.
+
+    Only status transitions are considered, never the same status again,
+    and a person's status is not sent to a target twice within DEBOUNCE.
+    Changes are collected per target for COALESCE_WINDOW, so several
+    people delayed by the same train get one message, and a status that
+    returns to normal within the window is dropped. Messages go through a
+    bounded queue to one sender task that retries failed sends. Nothing is
+    sent during the quiet hours.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        people: list[dict],
+        quiet_start: time | None = None,
+        quiet_end: time | None = None,
+        notified_elsewhere: Callable[[str, TargetKey], bool] | None = None,
+    ) -> None:
+        """Initialize for the people of a config entry.
+
+        notified_elsewhere tells whether another entry tracking the same
+        person sends their changes to a target already.
+        """
+        self.hass = hass
+        self.quiet_start = quiet_start
+        self.quiet_end = quiet_end
+        self._notified_elsewhere = notified_elsewhere
+        self._targets: dict[str, list[tuple[TargetKey, dict]]] = {}
+        for person_config in people:
+            target = person_config.get(CONF_NOTIFY) or {}
+            if key := target_key(target):
+                self._targets[person_config["person"]] = [(key, target)]
+        self._statuses: dict[str, str | None] = {}
+        self._last_sent: dict[tuple[str, TargetKey], tuple[str, datetime]] = {}
+        self._pending: dict[TargetKey, dict[str, StatusEvent]] = {}
+        self._flush_timers: dict[TargetKey, CALLBACK_TYPE] = {}
+        self._queue: asyncio.Queue[
+            tuple[TargetKey, str, list[StatusEvent]]
+        ] = asyncio.Queue(QUEUE_SIZE)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if anyone has notification targets."""
+        return bool(self._targets)
+
+    @callback
+    def async_start(self, entry: ConfigEntry) -> None:
+        """Start the sender task, which stops when the entry unloads."""
+        entry.async_create_background_task(
+            self.hass, self._async_send_queued(), f"{entry.title} notifications"
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the pending messages."""
+        for unsub in self._flush_timers.values():
+            unsub()
+        self._flush_timers.clear()
+        self._pending.clear()
+
+    @callback
+    def async_update(self, data: dict[str, dict[str, Any]] | None) -> None:
+        """Look for status changes in new coordinator data."""
+        for person_entity, person_data in (data or {}).items():
+            if person_entity not in self._targets:
+                continue
+            status = person_data.get("status")
+            known = person_entity in self._statuses
+            previous = self._statuses.get(person_entity)
+            self._statuses[person_entity] = status
+            # The first status seen, e.g. after a restart, is no change
+            if known and status != previous:
+                self._async_status_changed(person_entity, person_data)
+
+    def has_target(self, person_entity: str, key: TargetKey) -> bool:
+        """Return True if a person's changes are sent to a target."""
+        return any(target == key for target, _ in self._targets.get(person_entity, ()))
+
+    def diagnostics(self) -> dict[str, Any]:
+        """Return the counters for the diagnostics download."""
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "pending": sum(len(events) for events in self._pending.values()),
+            "queued": self._queue.qsize(),
+        }
+
+    @callback
+    def _async_status_changed(self, person_entity: str, person_data: dict[str, Any]) -> None:
+        """Queue a status change for the person's targets."""
+        status = person_data.get("status")
+        state = self.hass.states.get(person_entity)
+        name = state.name if state else person_entity.split(".")[-1].title()
+        text = describe(name, person_data)
+        now = dt_util.utcnow()
+
+        for key, _ in self._targets[person_entity]:
+            pending = self._pending.get(key)
+            if text is None or self._is_quiet(dt_util.now()):
+                # Back to normal before the message went out
+                if pending:
+                    pending.pop(person_entity, None)
+                continue
+            if self._notified_elsewhere and self._notified_elsewhere(person_entity, key):
+                continue
+            last = self._last_sent.get((person_entity, key))
+            if last and last[0] == status and (now - last[1]).total_seconds() < DEBOUNCE:
+                continue
+            self._pending.setdefault(key, {})[person_entity] = StatusEvent(
+                person_entity, status, text
+            )
+            if key not in self._flush_timers:
+                self._flush_timers[key] = async_call_later(
+                    self.hass, COALESCE_WINDOW, partial(self._async_flush, key)
+                )
+
+    @callback
+    def _async_flush(self, key: TargetKey, _now: datetime) -> None:
+        """Queue one message with every change collected for a target."""
+        self._flush_timers.pop(key, None)
+        events = list(self._pending.pop(key, {}).values())
+        if not events or self._is_quiet(dt_util.now()):
+            return
+
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+            _LOGGER.debug("Notification queue full, dropped the oldest message")
+        self._queue.put_nowait((key, "\n".join(event.text for event in events), events))
+
+    async def _async_send_queued(self) -> None:
+        """Send queued messages, starting the debounce once one is delivered."""
+        while True:
+            key, message, events = await self._queue.get()
+            if await self._async_deliver(dict(key), message):
+                now = dt_util.utcnow()
+                for event in events:
+                    self._last_sent[(event.person, key)] = (event.status, now)
+
+    async def _async_deliver(self, target: dict, message: str) -> bool:
+        """Send a message, retrying failures with a growing delay."""
+        for attempt in range(MAX_ATTEMPTS):
+            last = attempt + 1 == MAX_ATTEMPTS
+            try:
+                sent = await self._async_send(target, message)
+            except (HomeAssistantError, vol.Invalid) as err:
+                if last:
+                    _LOGGER.warning("Could not send notification: %s", err)
+            except Exception:
+                # A broken notify platform must not stop the sender
+                if last:
+                    _LOGGER.exception("Unexpected error sending notification")
+            else:
+                if sent:
+                    self.sent += 1
+                return sent
+            if not last:
+                await asyncio.sleep(RETRY_DELAY * 2**attempt)
+        self.failed += 1
+        return False
+
+    async def _async_send(self, target: dict, message: str) -> bool:
+        """Send a message to the notify services of a target.
+
+        Return False if no notify service was found for it.
+        """
+        calls = self._resolve(target)
+        if not calls:
+            _LOGGER.warning("No notify service found for %s", target)
+            return False
+        for service, data in calls:
+            await self.hass.services.async_call(
+                NOTIFY_DOMAIN, service, {**data, "message": message}, blocking=True
+            )
+        return True
+
+    def _resolve(self, target: dict) -> list[tuple[str, dict]]:
+        """Return the notify services and their data for a target.
+
+        Notify entities use notify.send_message where it exists, without a
+        title as older versions don't take one; devices, and entities
+        belonging to a device, use their mobile app service. The app names
+        that service after the device name it reported, so a name given by
+        the user is only tried after it.
+        """
+        entity_ids = [target[ATTR_ENTITY_ID]] if isinstance(
+            target.get(ATTR_ENTITY_ID), str
+        ) else list(target.get(ATTR_ENTITY_ID) or [])
+        device_ids = [target[ATTR_DEVICE_ID]] if isinstance(
+            target.get(ATTR_DEVICE_ID), str
+        ) else list(target.get(ATTR_DEVICE_ID) or [])
+
+        calls = []
+        notify_entities = [
+            entity_id for entity_id in entity_ids if entity_id.startswith(f"{NOTIFY_DOMAIN}.")
+        ]
+        if notify_entities and self.hass.services.has_service(NOTIFY_DOMAIN, "send_message"):
+            calls.append(("send_message", {ATTR_ENTITY_ID: notify_entities}))
+
+        entity_registry = er.async_get(self.hass)
+        for entity_id in entity_ids:
+            entry = entity_registry.async_get(entity_id)
+            if entry and entry.device_id and entity_id not in notify_entities:
+                device_ids.append(entry.device_id)
+
+        device_registry = dr.async_get(self.hass)
+        for device_id in dict.fromkeys(device_ids):
+            device = device_registry.async_get(device_id)
+            if device is None:
+                continue
+            for name in dict.fromkeys(filter(None, (device.name, device.name_by_user))):
+                service = f"mobile_app_{slugify(name)}"
+                if self.hass.services.has_service(NOTIFY_DOMAIN, service):
+                    calls.append((service, {"title": TITLE}))
+                    break
+        return calls
+
+    def _is_quiet(self, now: datetime) -> bool:
+        """Return True during the quiet hours."""
+        if self.quiet_start is None or self.quiet_end is None:
+            return False
+        current = dt_util.as_local(now).time()
+        if self.quiet_start <= self.quiet_end:
+            return self.quiet_start <= current < self.quiet_end
+        return current >= self.quiet_start or current < self.quiet_end
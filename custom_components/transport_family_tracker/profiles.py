@@ -0,0 +1,255 @@
+"""Commute profiles learned from past trips."""
+from __future__ import annotations
+
+from array import array
+import base64
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from .geometry import GRID_CELL_SIZE, RouteIndex
+from .trips import Trip
+
+# Trip ends in the same cell (or a neighbouring one) are the same place
+PLACE_CELL_SIZE = 0.005  # degrees, ~550 m
+# Route fingerprints use the grid of the route index, so configured routes
+# can be matched straight against RouteIndex.cells
+ROUTE_CELL_SIZE = GRID_CELL_SIZE
+
+SAME_ROUTE = 0.6  # share of a trip's cells on a route for it to be that route
+MATCH_SCORE = 0.7  # share of the recent cells needed to detect a route
+MIN_MATCH_CELLS = 3  # cells travelled before a route is detected
+RECENT_CELLS = 20  # cells of the ongoing trip used for matching
+MAX_PROFILES = 20  # per person, the lowest scoring are dropped
+SCORE_HALF_LIFE = 30 * 86400  # seconds - trips count half as much a month later
+DEPARTURE_BINS = 96  # 15 minute bins of the day
+
+Cell = tuple[int, int]
+
+
+def place_cell(lat: float, lon: float) -> Cell:
+    """Return the place cell of a coordinate."""
+    return int(lat // PLACE_CELL_SIZE), int(lon // PLACE_CELL_SIZE)
+
+
+def route_cell(lat: float, lon: float) -> Cell:
+    """Return the route fingerprint cell of a coordinate."""
+    return int(lat // ROUTE_CELL_SIZE), int(lon // ROUTE_CELL_SIZE)
+
+
+def _near(cell: Cell, other: Cell) -> bool:
+    """Return True if two cells are the same or neighbours."""
+    return abs(cell[0] - other[0]) <= 1 and abs(cell[1] - other[1]) <= 1
+
+
+def _departure_bin(time: datetime) -> int:
+    """Return the 15 minute bin of the day of a time."""
+    return (time.hour * 60 + time.minute) // 15
+
+
+@dataclass
+class CommuteProfile:
+    """A route a person has travelled, with when they usually leave."""
+
+    origin: Cell
+    destination: Cell
+    cells: frozenset[Cell]
+    label: str
+    route_entity: str | None = None
+    trips: int = 0
+    departures: array = field(default_factory=lambda: array("H", [0] * DEPARTURE_BINS))
+    last_trip: float = 0.0  # timestamp of the start of the last trip
+
+    def departure_share(self, time: datetime) -> float:
+        """Return the share of trips that left within 15 minutes of a time."""
+        if not self.trips:
+            return 0.0
+        position = _departure_bin(time)
+        nearby = sum(
+            self.departures[(position + offset) % DEPARTURE_BINS] for offset in (-1, 0, 1)
+        )
+        return min(nearby / self.trips, 1.0)
+
+    def score(self, now: float) -> float:
+        """Return the trips, halved for every SCORE_HALF_LIFE since the last one."""
+        return self.trips * 0.5 ** ((now - self.last_trip) / SCORE_HALF_LIFE)
+
+    def encode(self) -> list:
+        """Encode the profile compactly, cells and histogram packed in base64."""
+        cells = array("i", [value for cell in sorted(self.cells) for value in cell])
+        return [
+            *self.origin, *self.destination, self.label, self.route_entity, self.trips,
+            base64.b64encode(cells.tobytes()).decode(),
+            base64.b64encode(self.departures.tobytes()).decode(),
+            round(self.last_trip),
+        ]
+
+    @classmethod
+    def decode(cls, data: list) -> CommuteProfile:
+        """Decode a profile encoded by encode."""
+        cells = array("i")
+        cells.frombytes(base64.b64decode(data[7]))
+        departures = array("H")
+        departures.frombytes(base64.b64decode(data[8]))
+        return cls(
+            origin=(data[0], data[1]),
+            destination=(data[2], data[3]),
+            label=data[4],
+            route_entity=data[5],
+            trips=data[6],
+            cells=frozenset(zip(cells[::2], cells[1::2])),
+            departures=departures,
+            last_trip=data[9] if len(data) > 9 else 0.0,
+        )
+
+
+@dataclass
+class RouteMatch:
+    """The route a person seems to be travelling."""
+
+    label: str
+    route_entity: str | None
+    score: float
+
+
+class CommuteProfiles:
+    """Learned commute profiles of all people with a cell index per person.
+
+    Each profile is fingerprinted by the grid cells its trips crossed. The
+    index maps a cell to the profiles crossing it, so scoring the cells of
+    an ongoing trip costs a few dict lookups per cell however many
+    profiles there are.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without profiles."""
+        self.profiles: dict[str, list[CommuteProfile]] = {}
+        self._index: dict[str, dict[Cell, list[int]]] = {}
+        self._recent: dict[str, deque[Cell]] = {}
+
+    def learn(self, trip: Trip, routes: dict[str, tuple[str, RouteIndex]]) -> CommuteProfile:
+        """Merge a finished trip into the profile of its route.
+
+        routes maps the configured route entities of the person to their
+        name and index, so trips along them are linked to those routes.
+        """
+        now = trip.start.timestamp()
+        cells = frozenset(route_cell(lat, lon) for lat, lon in trip.track)
+        origin = place_cell(*trip.track[0])
+        destination = place_cell(*trip.track[-1])
+
+        route_entity = None
+        label = f"{trip.start_address or 'Unknown'} → {trip.end_address or 'Unknown'}"
+        for entity_id, (name, index) in routes.items():
+            if sum(cell in index.cells for cell in cells) >= SAME_ROUTE * len(cells):
+                route_entity, label = entity_id, name
+                break
+
+        profiles = self.profiles.setdefault(trip.person, [])
+        for profile in profiles:
+            if (
+                _near(profile.origin, origin)
+                and _near(profile.destination, destination)
+                and len(profile.cells & cells) >= SAME_ROUTE * len(cells | profile.cells)
+            ):
+                profile.cells |= cells
+                break
+        else:
+            if len(profiles) >= MAX_PROFILES:
+                # Recent trips outweigh old ones, so a new commute gets
+                # the time to repeat before it can be dropped
+                profiles.remove(min(profiles, key=lambda profile: profile.score(now)))
+            profile = CommuteProfile(origin, destination, cells, label, route_entity)
+            profiles.append(profile)
+
+        profile.trips += 1
+        profile.last_trip = now
+        profile.departures[_departure_bin(trip.start)] += 1
+        if route_entity:
+            profile.route_entity, profile.label = route_entity, label
+        self._index.pop(trip.person, None)
+        return profile
+
+    def observe(self, person: str, trip: Trip | None) -> None:
+        """Keep the cells of a person's ongoing trip for matching."""
+        if trip is None:
+            self._recent.pop(person, None)
+            return
+        recent = self._recent.setdefault(person, deque(maxlen=RECENT_CELLS))
+        cell = route_cell(*trip.track[-1])
+        if not recent or recent[-1] != cell:
+            recent.append(cell)
+
+    def match(
+        self,
+        person: str,
+        routes: dict[str, tuple[str, RouteIndex]],
+        trip_start: datetime | None,
+    ) -> RouteMatch | None:
+        """Return the known route best matching the ongoing trip.
+
+        Configured routes are scored against their own route index, learned
+        profiles through the cell index; the share of the trip's start
+        time among a profile's departures breaks ties.
+        """
+        recent = self._recent.get(person)
+        if not recent or len(recent) < MIN_MATCH_CELLS:
+            return None
+
+        best: RouteMatch | None = None
+        for entity_id, (name, index) in routes.items():
+            score = sum(cell in index.cells for cell in recent) / len(recent)
+            if best is None or score > best.score:
+                best = RouteMatch(name, entity_id, score)
+
+        profiles = self.profiles.get(person, [])
+        hits = [0] * len(profiles)
+        cell_index = self._cell_index(person)
+        for cell in recent:
+            for position in cell_index.get(cell, ()):
+                hits[position] += 1
+        for profile, count in zip(profiles, hits):
+            score = count / len(recent)
+            if trip_start:
+                score += 0.01 * profile.departure_share(trip_start)
+            if best is None or score > best.score:
+                best = RouteMatch(profile.label, profile.route_entity, score)
+
+        if best is None or best.score < MATCH_SCORE:
+            return None
+        return best
+
+    def alternatives(
+        self, person: str, route_entity: str, destination: Cell | None
+    ) -> list[CommuteProfile]:
+        """Return learned routes to the same destination as a route."""
+        if destination is None:
+            return []
+        return [
+            profile
+            for profile in self.profiles.get(person, [])
+            if profile.route_entity != route_entity
+            and _near(profile.destination, destination)
+        ]
+
+    def _cell_index(self, person: str) -> dict[Cell, list[int]]:
+        """Return the cell index of a person's profiles, building it on change."""
+        if (index := self._index.get(person)) is None:
+            index = self._index[person] = {}
+            for position, profile in enumerate(self.profiles.get(person, [])):
+                for cell in profile.cells:
+                    index.setdefault(cell, []).append(position)
+        return index
+
+    def restore(self, stored: dict[str, list[list]]) -> None:
+        """Load stored profiles."""
+        for person, profiles in stored.items():
+            self.profiles[person] = [CommuteProfile.decode(data) for data in profiles]
+        self._index.clear()
+
+    def as_dict(self) -> dict[str, list[list]]:
+        """Return the profiles for storage."""
+        return {
+            person: [profile.encode() for profile in profiles]
+            for person, profiles in self.profiles.items()
+        }
@@ -0,0 +1,143 @@
+"""Incremental progress of a person along their route."""
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from .geometry import RouteIndex, distance_to_segment, lon_scale
+from .route import RouteInfo
+
+WINDOW_BACK = 2  # segments - a noisy fix may land just behind the last match
+WINDOW_DISTANCE = 3000  # meters - searched ahead, ~200 km/h for a minute
+MAX_WINDOW_SEGMENTS = 250  # bound on the window for very detailed routes
+
+
+@dataclass
+class ProgressInfo:
+    """Where a person is along their route."""
+
+    segment: int
+    distance: float  # meters from the route line
+    travelled: float  # meters along the route
+    remaining: float  # meters along the route
+    percent: float
+    next_station: str | None
+
+
+class RouteProgress:
+    """Map match the fixes of one person to their route incrementally.
+
+    The last matched segment is remembered and the next fix is matched
+    against a short window from just behind it to WINDOW_DISTANCE ahead,
+    so an update costs the same however long the route is. Only when the
+    window has no segment within tolerance, e.g. on the first fix, after a
+    detour or when the route geometry changed, is the whole route searched
+    through its grid index.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without a match."""
+        self._index: RouteIndex | None = None
+        self._segment: int | None = None
+        self._travelled = 0.0
+
+    def update(
+        self,
+        route: RouteInfo,
+        lat: float,
+        lon: float,
+        tolerance: float,
+        max_distance: float,
+    ) -> ProgressInfo | None:
+        """Match a fix to the route.
+
+        Returns None when the route is further than max_distance away. A
+        window match is only kept when it is within tolerance.
+        """
+        index = route.index
+        if index is None or not index.points:
+            return None
+        match = self.match_window(index, lat, lon, tolerance)
+        if match is None:
+            match = index.nearest_segment(lat, lon, max_distance)
+        return self.apply(route, lat, lon, match)
+
+    def match_window(
+        self, index: RouteIndex, lat: float, lon: float, tolerance: float
+    ) -> tuple[int, float] | None:
+        """Return the window match of a fix, None when the route must be searched."""
+        if index is not self._index or self._segment is None:
+            return None
+        match = self._match_window(index, lat, lon)
+        return match if match[1] <= tolerance else None
+
+    def apply(
+        self, route: RouteInfo, lat: float, lon: float, match: tuple[int, float] | None
+    ) -> ProgressInfo | None:
+        """Remember the segment a fix matched and return the progress."""
+        index = route.index
+        self._index = index
+        if match is None:
+            self._segment = None
+            return None
+
+        segment, distance = match
+        self._segment = segment
+        self._travelled = index.along_route(segment, lat, lon)
+        length = index.length
+        return ProgressInfo(
+            segment=segment,
+            distance=distance,
+            travelled=self._travelled,
+            remaining=max(length - self._travelled, 0.0),
+            percent=100 * self._travelled / length if length else 100.0,
+            next_station=route.next_stop(self._travelled),
+        )
+
+    def _match_window(self, index: RouteIndex, lat: float, lon: float) -> tuple[int, float]:
+        """Return the closest segment in the window around the last match."""
+        cumulative = index.cumulative
+        limit = self._travelled + WINDOW_DISTANCE
+        first = max(self._segment - WINDOW_BACK, 0)
+        last = min(first + MAX_WINDOW_SEGMENTS, index.segment_count)
+
+        scale = lon_scale(lat)
+        best = (self._segment, distance_to_segment(lat, lon, *index.segment(self._segment), scale))
+        for segment_id in range(first, last):
+            if cumulative[segment_id] > limit:
+                break
+            distance = distance_to_segment(lat, lon, *index.segment(segment_id), scale)
+            if distance < best[1]:
+                best = (segment_id, distance)
+        return best
+
+
+def update_riders(
+    route: RouteInfo,
+    riders: Sequence[tuple[RouteProgress, float, float]],
+    tolerance: float,
+    max_distance: float,
+) -> list[ProgressInfo | None]:
+    """Match the fixes of everyone on a route.
+
+    Riders are (progress, lat, lon). Window matches are tried first; the
+    fixes that need a search of the whole route are matched in one batch.
+    """
+    index = route.index
+    if index is None or not index.points:
+        return [None] * len(riders)
+
+    matches = [
+        progress.match_window(index, lat, lon, tolerance) for progress, lat, lon in riders
+    ]
+    searching = [position for position, match in enumerate(matches) if match is None]
+    if searching:
+        found = index.nearest_segments(
+            [riders[position][1:] for position in searching], max_distance
+        )
+        for position, match in zip(searching, found):
+            matches[position] = match
+    return [
+        progress.apply(route, lat, lon, match)
+        for (progress, lat, lon), match in zip(riders, matches)
+    ]
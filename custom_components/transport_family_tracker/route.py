@@ -0,0 +1,254 @@
+"""Parsed route sensor state shared by everyone on a route."""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from operator import itemgetter
+
+from homeassistant.core import HomeAssistant, State
+from homeassistant.util import dt as dt_util
+
+from .const import DEFAULT_ROUTE_TOLERANCE
+from .geometry import BoundingBox, Polyline, RouteIndex, simplify
+
+# Stops further than this from the route line are ignored
+STOP_MATCH_DISTANCE = 500  # meters
+
+# Route lines are simplified to this fraction of the route tolerance, so
+# the real route stays within about that distance of the simplified one
+SIMPLIFY_FRACTION = 0.1
+
+
+def parse_route_time(value, reference: datetime) -> datetime | None:
+    """Parse a route sensor time attribute.
+
+    Accepts full datetimes (ISO strings or datetime objects) and plain
+    "HH:MM" times, which are taken to be on the reference date.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return dt_util.as_local(value)
+
+    value = str(value)
+    if parsed := dt_util.parse_datetime(value):
+        return dt_util.as_local(parsed)
+    if parsed_time := dt_util.parse_time(value):
+        local_reference = dt_util.as_local(reference)
+        return local_reference.replace(
+            hour=parsed_time.hour,
+            minute=parsed_time.minute,
+            second=parsed_time.second,
+            microsecond=0,
+        )
+    return None
+
+
+@dataclass
+class RouteInfo:
+    """Route sensor attributes parsed once per state change."""
+
+    entity_id: str
+    last_updated: datetime
+    origin: str
+    destination: str
+    departure_time: str | None
+    arrival_time: str | None
+    delay: int
+    departure: datetime | None
+    arrival: datetime | None
+    # The simplified route line, stations first and last
+    coordinates: Polyline = field(default_factory=Polyline)
+    bbox: BoundingBox | None = None
+    index: RouteIndex | None = None
+    # Identifies the unsimplified geometry and simplification tolerance
+    geometry_key: tuple | None = None
+    # (distance along the route, name) of each stop, in route order
+    stops: list[tuple[float, str]] = field(default_factory=list)
+
+    @property
+    def planned_route(self) -> str:
+        """Return the human readable route name."""
+        return f"{self.origin} → {self.destination}"
+
+    @property
+    def origin_coords(self) -> tuple[float, float] | None:
+        """Return the coordinates of the departure station."""
+        return self.coordinates[0] if self.coordinates else None
+
+    @property
+    def destination_coords(self) -> tuple[float, float] | None:
+        """Return the coordinates of the arrival station."""
+        return self.coordinates[-1] if self.coordinates else None
+
+    def next_stop(self, travelled: float) -> str | None:
+        """Return the first stop beyond a distance along the route.
+
+        Without a stop list the destination is the only stop.
+        """
+        if not self.stops:
+            return self.destination or None
+        position = bisect_right(self.stops, travelled, key=itemgetter(0))
+        return self.stops[position][1] if position < len(self.stops) else None
+
+
+class RouteCache:
+    """Cache of parsed route states keyed on (entity_id, last_updated).
+
+    Route lines are packed into compact polylines and simplified to
+    simplify_tolerance meters when a route's geometry changes.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self.simplify_tolerance = DEFAULT_ROUTE_TOLERANCE * SIMPLIFY_FRACTION
+        self._routes: dict[str, RouteInfo] = {}
+        self._pending: dict[tuple[str, datetime], asyncio.Future[RouteInfo]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, state: State) -> RouteInfo:
+        """Return the parsed route for a state, parsing only on change."""
+        cached = self._routes.get(state.entity_id)
+        if cached and cached.last_updated == state.last_updated:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        route = self._build(state, cached, self.simplify_tolerance)
+        self._routes[state.entity_id] = route
+        return route
+
+    async def async_get(
+        self, hass: HomeAssistant, state: State, executor_threshold: int
+    ) -> RouteInfo:
+        """Return the parsed route, building long routes in the executor.
+
+        Routes with at least executor_threshold points are parsed and indexed
+        off the event loop; 0 disables offloading. Concurrent callers for the
+        same state share one build.
+        """
+        cached = self._routes.get(state.entity_id)
+        if cached and cached.last_updated == state.last_updated:
+            self.hits += 1
+            return cached
+
+        if not executor_threshold or len(_raw_coordinates(state)) < executor_threshold:
+            return self.get(state)
+
+        self.misses += 1
+        key = (state.entity_id, state.last_updated)
+        if (pending := self._pending.get(key)) is None:
+            pending = hass.async_add_executor_job(
+                self._build, state, cached, self.simplify_tolerance
+            )
+            self._pending[key] = pending
+        try:
+            route = await pending
+        finally:
+            self._pending.pop(key, None)
+
+        # Never replace a newer route that finished building first
+        current = self._routes.get(state.entity_id)
+        if current is None or current.last_updated <= route.last_updated:
+            self._routes[state.entity_id] = route
+        return route
+
+    def peek(self, entity_id: str) -> RouteInfo | None:
+        """Return the cached route without checking for a newer state."""
+        return self._routes.get(entity_id)
+
+    def invalidate(self, entity_id: str) -> None:
+        """Drop a route from the cache."""
+        self._routes.pop(entity_id, None)
+
+    def __len__(self) -> int:
+        """Return the number of cached routes."""
+        return len(self._routes)
+
+    def require_tolerance(self, route_tolerance: float) -> None:
+        """Simplify finely enough for a route tolerance.
+
+        With several config entries the smallest tolerance wins; cached
+        routes are rebuilt at their next state when it shrinks.
+        """
+        tolerance = route_tolerance * SIMPLIFY_FRACTION
+        if tolerance < self.simplify_tolerance:
+            self.simplify_tolerance = tolerance
+
+    def retain(self, entity_ids: set[str]) -> None:
+        """Drop the cached routes of all other entities."""
+        for entity_id in set(self._routes) - entity_ids:
+            del self._routes[entity_id]
+
+    @staticmethod
+    def _build(state: State, previous: RouteInfo | None, tolerance: float) -> RouteInfo:
+        """Parse a route state and index its simplified geometry.
+
+        Safe to run in the executor: it only reads the state and the
+        previous route, which are never mutated.
+        """
+        attributes = state.attributes
+        departure_time = attributes.get("departure_time")
+        arrival_time = attributes.get("arrival_time")
+        route = RouteInfo(
+            entity_id=state.entity_id,
+            last_updated=state.last_updated,
+            origin=attributes.get("origin", ""),
+            destination=attributes.get("destination", ""),
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+            delay=attributes.get("delay", 0),
+            departure=parse_route_time(departure_time, state.last_updated),
+            arrival=parse_route_time(arrival_time, state.last_updated),
+        )
+
+        polyline = Polyline.from_coordinates(_raw_coordinates(state))
+        if not polyline:
+            return route
+        key = (len(polyline), hash(polyline.values.tobytes()), tolerance)
+        if previous and previous.geometry_key == key:
+            # Timetable update only, the geometry did not change
+            route.coordinates = previous.coordinates
+            route.bbox = previous.bbox
+            route.index = previous.index
+        else:
+            # Distances along the simplified route stay those of the real one
+            lengths = polyline.path_lengths()
+            kept = simplify(polyline, tolerance)
+            route.coordinates = polyline.subset(kept)
+            route.bbox = route.coordinates.bbox()
+            route.index = RouteIndex(route.coordinates, [lengths[position] for position in kept])
+        route.geometry_key = key
+        route.stops = _locate_stops(state, route.index)
+        return route
+
+
+def _raw_coordinates(state: State) -> list:
+    """Return the unparsed coordinate list of a route sensor."""
+    # Dutch Public Transport uses 'coordinates', not 'route_coordinates'
+    return state.attributes.get("coordinates") or state.attributes.get("route_coordinates") or []
+
+
+def _locate_stops(state: State, index: RouteIndex) -> list[tuple[float, str]]:
+    """Place the stops of a route sensor along its route.
+
+    Stops are read from a "stops" attribute holding dicts with a name and
+    lat/lon (or latitude/longitude) keys.
+    """
+    stops = []
+    for stop in state.attributes.get("stops") or []:
+        if not isinstance(stop, dict):
+            continue
+        lat = stop.get("lat", stop.get("latitude"))
+        lon = stop.get("lon", stop.get("longitude"))
+        if lat is None or lon is None:
+            continue
+        if nearest := index.nearest_segment(lat, lon, STOP_MATCH_DISTANCE):
+            stops.append(
+                (index.along_route(nearest[0], lat, lon), stop.get("name", ""))
+            )
+    stops.sort(key=itemgetter(0))
+    return stops
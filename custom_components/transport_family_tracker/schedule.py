@@ -1,45 +1,187 @@
 """Schedule checking for routes."""
-from datetime import datetime, date
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+
 from .holidays import is_dutch_holiday
 
+DAY_MAP = {
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3,
+    "fri": 4, "sat": 5, "sun": 6
+}
+DEFAULT_DAYS = ["mon", "tue", "wed", "thu", "fri"]
 
-def should_show_route(route_config: dict, current_time: datetime) -> bool:
-    """Check if route should be shown based on schedule."""
-    
-    # Check day of week
-    days = route_config.get("days", [])
-    if days:
-        day_map = {
-            "mon": 0, "tue": 1, "wed": 2, "thu": 3,
-            "fri": 4, "sat": 5, "sun": 6
-        }
-        current_day = current_time.weekday()
-        allowed_days = [day_map[d] for d in days if d in day_map]
-        if current_day not in allowed_days:
-            return False
-    
-    # Check public holidays
-    if route_config.get("exclude_holidays", False):
-        if is_dutch_holiday(current_time.date()):
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Routes are only shown from 2 hours before to 2 hours after the departure hour
+WINDOW_HOURS = 2
+
+
+class RouteSchedule:
+    """A route schedule compiled from its config for cheap lookups."""
+
+    def __init__(
+        self,
+        route_entity: str | None,
+        days: list[str],
+        exclude_holidays: bool,
+        custom_exclude_dates: str,
+        departure_time: str | None,
+    ) -> None:
+        """Compile the schedule."""
+        self.route_entity = route_entity
+        self.exclude_holidays = exclude_holidays
+
+        # Bitmask of allowed weekdays, bit 0 is Monday. No days means every day.
+        self.weekday_mask = 0
+        for day in days or DAY_MAP:
+            if day in DAY_MAP:
+                self.weekday_mask |= 1 << DAY_MAP[day]
+
+        self.exclude_dates: frozenset[date] = frozenset(
+            parsed
+            for value in (custom_exclude_dates or "").split(",")
+            if (parsed := _parse_date(value.strip()))
+        )
+
+        # Active window within a day, in minutes since midnight [start, end)
+        self.start = 0
+        self.end = MINUTES_PER_DAY
+        if departure_time and isinstance(departure_time, str):
+            dep_hour = int(departure_time.split(":")[0])
+            self.start = max(0, (dep_hour - WINDOW_HOURS) * 60)
+            self.end = min(MINUTES_PER_DAY, (dep_hour + WINDOW_HOURS + 1) * 60)
+
+    @classmethod
+    def from_person_config(cls, person_config: dict, prefix: str) -> RouteSchedule:
+        """Compile the morning or evening schedule of a person."""
+        return cls(
+            person_config.get(f"{prefix}_route"),
+            person_config.get(f"{prefix}_days", DEFAULT_DAYS),
+            person_config.get(f"{prefix}_exclude_holidays", True),
+            person_config.get(f"{prefix}_custom_exclude_dates", ""),
+            person_config.get(f"{prefix}_departure_time"),
+        )
+
+    def windows(self) -> list[tuple[int, int]]:
+        """Return the active windows as minutes since Monday 00:00."""
+        return [
+            (day * MINUTES_PER_DAY + self.start, day * MINUTES_PER_DAY + self.end)
+            for day in range(7)
+            if self.weekday_mask & (1 << day)
+        ]
+
+    def is_excluded(self, check_date: date) -> bool:
+        """Return True if the route does not run on a date."""
+        if check_date in self.exclude_dates:
+            return True
+        return self.exclude_holidays and is_dutch_holiday(check_date)
+
+    def is_active(self, current_time: datetime) -> bool:
+        """Check if the route should be shown at a given time."""
+        if not self.weekday_mask & (1 << current_time.weekday()):
             return False
-    
-    # Check custom exclude dates
-    custom_dates = route_config.get("custom_exclude_dates", "")
-    if custom_dates:
-        exclude_list = [d.strip() for d in custom_dates.split(",")]
-        current_date_str = current_time.strftime("%Y-%m-%d")
-        if current_date_str in exclude_list:
+        minute = current_time.hour * 60 + current_time.minute
+        if not self.start <= minute < self.end:
             return False
-    
-    # Check departure time (if configured)
-    departure_time = route_config.get("departure_time")
-    if departure_time:
-        # Only show route within 2 hours of departure
-        if isinstance(departure_time, str):
-            parts = departure_time.split(":")
-            dep_hour = int(parts[0])
-            current_hour = current_time.hour
-            if not (dep_hour - 2 <= current_hour <= dep_hour + 2):
-                return False
-    
-    return True
+        return not self.is_excluded(current_time.date())
+
+
+class ScheduleTimeline:
+    """Weekly timeline of the route windows of one person.
+
+    The week is cut into intervals at every window start and end. Each
+    interval lists the schedules active in it in priority order, so the
+    active route is a bisect lookup plus a date exclusion check.
+    """
+
+    def __init__(self, schedules: list[RouteSchedule]) -> None:
+        """Compile the timeline from schedules in priority order."""
+        self.schedules = [schedule for schedule in schedules if schedule.route_entity]
+
+        boundaries = set()
+        for schedule in self.schedules:
+            for start, end in schedule.windows():
+                boundaries.update((start, end % MINUTES_PER_WEEK))
+        self.boundaries = sorted(boundaries)
+
+        self.intervals: list[tuple[RouteSchedule, ...]] = []
+        for start in self.boundaries:
+            self.intervals.append(tuple(
+                schedule
+                for schedule in self.schedules
+                if any(w_start <= start < w_end for w_start, w_end in schedule.windows())
+            ))
+
+    @classmethod
+    def from_person_config(cls, person_config: dict) -> ScheduleTimeline:
+        """Compile the morning and evening schedules of a person."""
+        return cls([
+            RouteSchedule.from_person_config(person_config, "morning"),
+            RouteSchedule.from_person_config(person_config, "evening"),
+        ])
+
+    def active_route(self, current_time: datetime) -> str | None:
+        """Return the route entity active at a given time, if any."""
+        if not self.boundaries:
+            return None
+
+        # Index -1 is the interval wrapping from Sunday night into Monday
+        index = bisect_right(self.boundaries, _week_minute(current_time)) - 1
+        for schedule in self.intervals[index]:
+            if not schedule.is_excluded(current_time.date()):
+                return schedule.route_entity
+        return None
+
+    def next_boundary(self, current_time: datetime) -> datetime | None:
+        """Return when the active route may next change."""
+        if not self.boundaries:
+            return None
+
+        week_minute = _week_minute(current_time)
+        index = bisect_right(self.boundaries, week_minute)
+        if index < len(self.boundaries):
+            delta_minutes = self.boundaries[index] - week_minute
+        else:
+            delta_minutes = MINUTES_PER_WEEK - week_minute + self.boundaries[0]
+
+        days, minute = divmod(
+            current_time.hour * 60 + current_time.minute + delta_minutes,
+            MINUTES_PER_DAY,
+        )
+        # Combine with the calendar date so DST changes keep wall clock times
+        return datetime.combine(
+            current_time.date() + timedelta(days=days),
+            time(minute // 60, minute % 60),
+            tzinfo=current_time.tzinfo,
+        )
+
+
+def _week_minute(current_time: datetime) -> int:
+    """Return the minutes since Monday 00:00."""
+    return (
+        current_time.weekday() * MINUTES_PER_DAY
+        + current_time.hour * 60
+        + current_time.minute
+    )
+
+
+def _parse_date(value: str) -> date | None:
+    """Parse a YYYY-MM-DD date, ignoring anything else."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def should_show_route(route_config: dict, current_time: datetime) -> bool:
+    """Check if route should be shown based on schedule."""
+    return RouteSchedule(
+        None,
+        route_config.get("days", []),
+        route_config.get("exclude_holidays", False),
+        route_config.get("custom_exclude_dates", ""),
+        route_config.get("departure_time"),
+    ).is_active(current_time)
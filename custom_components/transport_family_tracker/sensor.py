@@ -1,14 +1,21 @@
 """Sensor platform for Family Transport Tracker."""
 from __future__ import annotations
 
-from homeassistant.components.sensor import SensorEntity
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import FamilyTransportCoordinator
-from .const import DOMAIN
+from .const import CONF_DIAGNOSTIC_SENSORS, DEFAULT_DIAGNOSTIC_SENSORS, DOMAIN
+from .entity import PersonEntity
+from .geometry import COUNTERS
+from .tracker import FamilyTransportTracker
 
 
 async def async_setup_entry(
@@ -25,30 +32,83 @@ async def async_setup_entry(
         sensors.append(TransportStatusSensor(coordinator, person_entity))
         sensors.append(TransportETASensor(coordinator, person_entity))
     
+    if entry.data.get(CONF_DIAGNOSTIC_SENSORS, DEFAULT_DIAGNOSTIC_SENSORS):
+        sensors.extend(
+            TrackerDiagnosticSensor(coordinator, entry.entry_id, *description)
+            for description in DIAGNOSTIC_SENSORS
+        )
+    
     async_add_entities(sensors)
 
 
-class TransportStatusSensor(CoordinatorEntity, SensorEntity):
+def _cycle_attributes(tracker: FamilyTransportTracker) -> dict[str, Any]:
+    """Return the cycle duration percentiles and histogram."""
+    return {
+        "p50": tracker.stats.percentile(50),
+        "p99": tracker.stats.percentile(99),
+        "cycles": tracker.stats.cycle_count,
+        "histogram": tracker.stats.histogram(),
+    }
+
+
+def _route_cache_hit_rate(tracker: FamilyTransportTracker) -> float | None:
+    """Return the share of route lookups answered from the cache."""
+    lookups = tracker.routes.hits + tracker.routes.misses
+    return round(tracker.routes.hits / lookups * 100) if lookups else None
+
+
+# key, name, unit, state class, value, attributes
+DIAGNOSTIC_SENSORS: tuple[tuple, ...] = (
+    (
+        "cycle_duration",
+        "Update Cycle Duration",
+        UnitOfTime.MILLISECONDS,
+        SensorStateClass.MEASUREMENT,
+        lambda tracker: tracker.stats.percentile(95),
+        _cycle_attributes,
+    ),
+    (
+        "distance_computations",
+        "Distance Computations",
+        None,
+        SensorStateClass.TOTAL_INCREASING,
+        lambda tracker: COUNTERS.distances + COUNTERS.planar,
+        None,
+    ),
+    (
+        "route_cache_hit_rate",
+        "Route Cache Hit Rate",
+        PERCENTAGE,
+        SensorStateClass.MEASUREMENT,
+        _route_cache_hit_rate,
+        None,
+    ),
+)
+
+
+class PersonSensorEntity(PersonEntity, SensorEntity):
+    """Base for sensors showing one person's tracking data."""
+
+    @property
+    def _value(self) -> Any:
+        """Return the native value."""
+        return self._attr_native_value
+
+
+class TransportStatusSensor(PersonSensorEntity):
     """Transport status sensor."""
 
     def __init__(self, coordinator: FamilyTransportCoordinator, person_entity: str) -> None:
         """Initialize sensor."""
-        super().__init__(coordinator)
-        self._person_entity = person_entity
         self._attr_unique_id = f"{DOMAIN}_{person_entity}_status"
         self._attr_name = f"{person_entity.split('.')[-1].title()} Transport Status"
+        super().__init__(coordinator, person_entity)
 
-    @property
-    def native_value(self):
-        """Return the state."""
-        data = self.coordinator.data.get(self._person_entity, {})
-        return data.get("status", "Unknown")
-
-    @property
-    def extra_state_attributes(self):
-        """Return attributes."""
+    def _update_from_data(self) -> None:
+        """Set state and attributes."""
         data = self.coordinator.data.get(self._person_entity, {})
-        return {
+        self._attr_native_value = data.get("status", "Unknown")
+        self._attr_extra_state_attributes = {
             "planned_route": data.get("planned_route"),
             "departure_time": data.get("departure_time"),
             "expected_arrival": data.get("expected_arrival"),
@@ -60,13 +120,20 @@ class TransportStatusSensor(CoordinatorEntity, SensorEntity):
             "car_eta": data.get("car_eta"),
             "stop_duration": data.get("stop_duration"),
             "stop_address": data.get("address"),
+            "stop_place": data.get("stop_place"),
+            "unexpected_stop": data.get("unexpected_stop"),
             "detour_location": data.get("detour_location"),
+            "distance_travelled": data.get("distance_travelled"),
+            "distance_remaining": data.get("distance_remaining"),
+            "route_progress": data.get("route_progress"),
+            "detected_route": data.get("detected_route"),
+            "alternative_available": data.get("alternative_available"),
         }
 
     @property
     def icon(self):
         """Return icon."""
-        status = self.native_value
+        status = self._attr_native_value
         if status == "On Route":
             return "mdi:train-car"
         elif status == "Missed":
@@ -79,30 +146,25 @@ class TransportStatusSensor(CoordinatorEntity, SensorEntity):
             return "mdi:map-marker-alert"
         elif status == "Detoured":
             return "mdi:map-marker-question"
+        elif status == "Alternative Route":
+            return "mdi:swap-horizontal"
         return "mdi:help"
 
 
-class TransportETASensor(CoordinatorEntity, SensorEntity):
+class TransportETASensor(PersonSensorEntity):
     """Transport ETA sensor."""
 
     def __init__(self, coordinator: FamilyTransportCoordinator, person_entity: str) -> None:
         """Initialize sensor."""
-        super().__init__(coordinator)
-        self._person_entity = person_entity
         self._attr_unique_id = f"{DOMAIN}_{person_entity}_eta"
         self._attr_name = f"{person_entity.split('.')[-1].title()} Transport ETA"
+        super().__init__(coordinator, person_entity)
 
-    @property
-    def native_value(self):
-        """Return the state."""
-        data = self.coordinator.data.get(self._person_entity, {})
-        return data.get("expected_arrival")
-
-    @property
-    def extra_state_attributes(self):
-        """Return attributes."""
+    def _update_from_data(self) -> None:
+        """Set state and attributes."""
         data = self.coordinator.data.get(self._person_entity, {})
-        return {
+        self._attr_native_value = data.get("expected_arrival")
+        self._attr_extra_state_attributes = {
             "delay": data.get("delay_minutes"),
             "next_station": data.get("next_station"),
         }
@@ -111,3 +173,43 @@ class TransportETASensor(CoordinatorEntity, SensorEntity):
     def icon(self):
         """Return icon."""
         return "mdi:clock-outline"
+
+
+class TrackerDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor showing how much work the tracker does."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: FamilyTransportCoordinator,
+        entry_id: str,
+        key: str,
+        name: str,
+        unit: str | None,
+        state_class: SensorStateClass,
+        value: Callable[[FamilyTransportTracker], Any],
+        attributes: Callable[[FamilyTransportTracker], dict[str, Any]] | None,
+    ) -> None:
+        """Initialize sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{DOMAIN}_{entry_id}_{key}"
+        self._attr_name = f"Family Transport Tracker {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+        self._value = value
+        self._attributes = attributes
+        self._update_from_data()
+
+    def _update_from_data(self) -> None:
+        """Set state and attributes from the tracker."""
+        tracker = self.coordinator.tracker
+        self._attr_native_value = self._value(tracker)
+        if self._attributes:
+            self._attr_extra_state_attributes = self._attributes(tracker)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update from the tracker on every update."""
+        self._update_from_data()
+        self.async_write_ha_state()
@@ -0,0 +1,168 @@
+"""Streaming GPS smoothing and outlier rejection."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, replace
+from datetime import datetime
+from math import atan2, cos, degrees, hypot, radians
+
+from .geometry import METERS_PER_DEGREE
+
+DEFAULT_ACCURACY = 20  # meters - assumed when the tracker reports none
+MIN_ACCURACY = 5  # meters - floor, trackers tend to be overconfident
+ACCELERATION_NOISE = 0.05  # m/s² - white noise, tuned for fixes ~30 s apart
+MAX_SPEED = 250 / 3.6  # m/s - jumps implying more than this are outliers
+MAX_REJECTED = 3  # consecutive outliers after which the filter restarts
+SPEED_WINDOW = 3  # reported speeds in the median
+MIN_HEADING_SPEED = 1.0  # m/s - below this the heading is noise
+
+
+@dataclass
+class FilteredFix:
+    """A smoothed position with its speed and heading."""
+
+    lat: float
+    lon: float
+    speed: float  # km/h
+    heading: float | None  # degrees clockwise from north
+    rejected: bool = False
+
+
+class _Axis:
+    """Constant velocity Kalman filter along one axis, in meters."""
+
+    __slots__ = ("position", "velocity", "p_pp", "p_pv", "p_vv")
+
+    def __init__(self, position: float, variance: float) -> None:
+        """Start at a position with an unknown velocity."""
+        self.position = position
+        self.velocity = 0.0
+        self.p_pp = variance
+        self.p_pv = 0.0
+        self.p_vv = MAX_SPEED ** 2
+
+    def predict(self, dt: float) -> None:
+        """Advance the state by dt seconds."""
+        q = ACCELERATION_NOISE ** 2
+        self.position += self.velocity * dt
+        self.p_pp += dt * (2 * self.p_pv + dt * self.p_vv) + q * dt ** 4 / 4
+        self.p_pv += dt * self.p_vv + q * dt ** 3 / 2
+        self.p_vv += q * dt ** 2
+
+    def update(self, measurement: float, variance: float) -> None:
+        """Correct the state with a measured position."""
+        innovation = measurement - self.position
+        total = self.p_pp + variance
+        gain_p = self.p_pp / total
+        gain_v = self.p_pv / total
+        self.position += gain_p * innovation
+        self.velocity += gain_v * innovation
+        self.p_vv -= gain_v * self.p_pv
+        self.p_pp *= 1 - gain_p
+        self.p_pv *= 1 - gain_p
+
+
+class PositionFilter:
+    """Smooth the fixes of one device tracker in O(1) time and memory.
+
+    Positions go through a constant velocity Kalman filter in a local
+    planar frame, weighted by the reported GPS accuracy. A fix implying a
+    jump faster than MAX_SPEED is rejected, unless several in a row are,
+    in which case the person really moved and the filter restarts there.
+    Reported speeds are smoothed with a short running median; without
+    them the speed comes from the filter's velocity.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty filter."""
+        self._origin: tuple[float, float] | None = None
+        self._meters_per_lon = METERS_PER_DEGREE
+        self._x: _Axis | None = None
+        self._y: _Axis | None = None
+        self._timestamp: datetime | None = None  # of the last accepted fix
+        self._seen: datetime | None = None  # of the last fix, accepted or not
+        self._rejected = 0
+        self._speeds: deque[float] = deque(maxlen=SPEED_WINDOW)
+        self.estimate: FilteredFix | None = None
+
+    def update(
+        self,
+        lat: float,
+        lon: float,
+        timestamp: datetime,
+        speed: float | None = None,
+        accuracy: float | None = None,
+    ) -> FilteredFix:
+        """Feed a fix and return the smoothed estimate.
+
+        A fix that is not newer than the last one leaves the estimate as it
+        is, so polling an unchanged tracker state is harmless.
+        """
+        if self.estimate and timestamp <= self._seen:
+            return self.estimate
+        self._seen = timestamp
+
+        variance = max(accuracy or DEFAULT_ACCURACY, MIN_ACCURACY) ** 2
+        if self._x is None:
+            self._reset(lat, lon, variance)
+        else:
+            x, y = self._to_local(lat, lon)
+            dt = (timestamp - self._timestamp).total_seconds()
+            jump = hypot(x - self._x.position, y - self._y.position)
+            slack = 3 * (self._x.p_pp ** 0.5 + variance ** 0.5)
+            if jump - slack > MAX_SPEED * dt and self._rejected < MAX_REJECTED:
+                self._rejected += 1
+                return replace(self.estimate, rejected=True)
+
+            if self._rejected >= MAX_REJECTED:
+                self._reset(lat, lon, variance)
+            else:
+                for axis, measurement in ((self._x, x), (self._y, y)):
+                    axis.predict(dt)
+                    axis.update(measurement, variance)
+        self._rejected = 0
+        self._timestamp = timestamp
+
+        if speed is not None and speed >= 0:
+            self._speeds.append(speed)
+        self.estimate = self._estimate()
+        return self.estimate
+
+    def _reset(self, lat: float, lon: float, variance: float) -> None:
+        """Restart the filter at a fix."""
+        self._origin = (lat, lon)
+        self._meters_per_lon = cos(radians(lat)) * METERS_PER_DEGREE
+        self._x = _Axis(0.0, variance)
+        self._y = _Axis(0.0, variance)
+        self._speeds.clear()
+
+    def _to_local(self, lat: float, lon: float) -> tuple[float, float]:
+        """Project a coordinate to meters east and north of the origin."""
+        return (
+            (lon - self._origin[1]) * self._meters_per_lon,
+            (lat - self._origin[0]) * METERS_PER_DEGREE,
+        )
+
+    def _estimate(self) -> FilteredFix:
+        """Build the estimate from the filter state."""
+        velocity = hypot(self._x.velocity, self._y.velocity)
+        heading = None
+        if velocity >= MIN_HEADING_SPEED:
+            # atan2 is counterclockwise from east, headings clockwise from north
+            heading = round(
+                (90 - degrees(atan2(self._y.velocity, self._x.velocity))) % 360, 1
+            )
+        if self._speeds:
+            # Running median, cheaper by hand than statistics.median for 3 values
+            ordered = sorted(self._speeds)
+            middle = len(ordered) // 2
+            speed = ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+        else:
+            speed = velocity * 3.6
+        return FilteredFix(
+            lat=self._origin[0] + self._y.position / METERS_PER_DEGREE,
+            lon=self._origin[1] + self._x.position / self._meters_per_lon,
+            speed=speed,
+            heading=heading,
+        )
+
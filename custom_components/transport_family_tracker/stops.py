@@ -0,0 +1,228 @@
+"""Stop detection and the index of known places."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from math import cos, radians
+
+from homeassistant.core import State
+
+from .geometry import METERS_PER_DEGREE, planar_distance, within_distance
+
+STOP_RADIUS = 50  # meters - fixes this close to the stop's center are at the stop
+MIN_STOP_FIXES = 2  # fixes in a row within STOP_RADIUS to start a stop
+MIN_STOP_DURATION = 300  # seconds before a dwell counts as a stop
+MAX_OUTLIERS = 1  # fixes in a row away from a stop that are taken as GPS noise
+WINDOW_FIXES = 20  # recent fixes searched for a new stop
+
+PLACE_CELL_SIZE = 0.005  # degrees, ~550 m
+LEARNED_RADIUS = 100  # meters
+LEARN_DURATION = 600  # seconds at a stop before it is remembered
+MIN_VISITS = 2  # stops at a learned place before it is known
+MAX_LEARNED_PLACES = 100  # the least visited are dropped
+
+Cell = tuple[int, int]
+
+
+def _cell(lat: float, lon: float) -> Cell:
+    """Return the spatial hash cell of a coordinate."""
+    return int(lat // PLACE_CELL_SIZE), int(lon // PLACE_CELL_SIZE)
+
+
+@dataclass
+class Stop:
+    """A dwell: consecutive fixes close together."""
+
+    lat: float
+    lon: float
+    start: datetime
+    end: datetime
+    fixes: int = 1
+    address: str | None = None
+
+    @property
+    def duration(self) -> float:
+        """Return the seconds spent at the stop."""
+        return (self.end - self.start).total_seconds()
+
+    def add(self, now: datetime, lat: float, lon: float) -> None:
+        """Add a fix, moving the center to the mean of the fixes."""
+        self.fixes += 1
+        self.lat += (lat - self.lat) / self.fixes
+        self.lon += (lon - self.lon) / self.fixes
+        self.end = now
+
+
+class StopDetector:
+    """Cluster a person's fixes into stops as they come in.
+
+    Works like DBSCAN over a sliding window of recent fixes: a stop starts
+    once MIN_STOP_FIXES consecutive fixes lie within STOP_RADIUS of each
+    other and grows while new fixes stay within STOP_RADIUS of its center.
+    Up to MAX_OUTLIERS fixes in a row further away are treated as noise;
+    one more ends the stop.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without a stop."""
+        self._window: deque[tuple[datetime, float, float]] = deque(maxlen=WINDOW_FIXES)
+        self.stop: Stop | None = None
+        self._outliers = 0
+
+    @property
+    def dwelling(self) -> Stop | None:
+        """Return the current stop once it lasted MIN_STOP_DURATION."""
+        stop = self.stop
+        if stop and not self._outliers and stop.duration >= MIN_STOP_DURATION:
+            return stop
+        return None
+
+    def restore(self, lat: float, lon: float, start: datetime) -> None:
+        """Resume a stop saved before a restart."""
+        self.stop = Stop(lat, lon, start, start)
+
+    def update(
+        self, now: datetime, lat: float, lon: float, address: str | None = None
+    ) -> Stop | None:
+        """Feed a fix and return the stop it ended, if that was a real stop."""
+        self._window.append((now, lat, lon))
+        stop = self.stop
+        if stop:
+            if within_distance(lat, lon, stop.lat, stop.lon, STOP_RADIUS):
+                stop.add(now, lat, lon)
+                self._outliers = 0
+                return None
+            self._outliers += 1
+            if self._outliers <= MAX_OUTLIERS:
+                return None
+
+        ended = stop if stop and stop.duration >= MIN_STOP_DURATION else None
+        self.stop = None
+        self._outliers = 0
+
+        # The fixes just before this one that are its neighbours
+        neighbours = []
+        for fix in reversed(self._window):
+            if not within_distance(lat, lon, fix[1], fix[2], STOP_RADIUS):
+                break
+            neighbours.append(fix)
+        if len(neighbours) >= MIN_STOP_FIXES:
+            first, first_lat, first_lon = neighbours[-1]
+            self.stop = Stop(first_lat, first_lon, first, first, 1, address)
+            for time, fix_lat, fix_lon in reversed(neighbours[:-1]):
+                self.stop.add(time, fix_lat, fix_lon)
+        return ended
+
+
+@dataclass
+class Place:
+    """A zone or a place where people often stop."""
+
+    name: str
+    lat: float
+    lon: float
+    radius: float
+    zone: str | None = None  # entity id of a zone
+    visits: int = 0
+
+    @property
+    def known(self) -> bool:
+        """Return True for zones and places visited often enough."""
+        return self.zone is not None or self.visits >= MIN_VISITS
+
+    def encode(self) -> list:
+        """Encode a learned place compactly."""
+        return [round(self.lat, 6), round(self.lon, 6), self.visits, self.name]
+
+
+class PlaceIndex:
+    """Home Assistant zones and learned places in a spatial hash.
+
+    A place is registered in every cell its circle overlaps, so a lookup
+    only checks the places of the cell containing the point.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without places."""
+        self.zones: list[Place] = []
+        self.learned: list[Place] = []
+        self._cells: dict[Cell, list[Place]] = {}
+        self._zone_key: tuple | None = None
+
+    def sync_zones(self, states: Iterable[State]) -> None:
+        """Take the zones from their states, reindexing when they changed."""
+        zones = [
+            Place(
+                state.attributes.get("friendly_name", state.entity_id),
+                state.attributes["latitude"],
+                state.attributes["longitude"],
+                state.attributes.get("radius", 100),
+                zone=state.entity_id,
+            )
+            for state in states
+            if "latitude" in state.attributes and "longitude" in state.attributes
+        ]
+        key = tuple((zone.zone, zone.name, zone.lat, zone.lon, zone.radius) for zone in zones)
+        if key != self._zone_key:
+            self._zone_key = key
+            self.zones = zones
+            self._reindex()
+
+    def find(self, lat: float, lon: float) -> Place | None:
+        """Return the closest known place containing a point."""
+        return self._closest(lat, lon, known=True)
+
+    def learn(self, stop: Stop) -> None:
+        """Count a long stop outside zones as a visit to a learned place."""
+        if stop.duration < LEARN_DURATION:
+            return
+        place = self._closest(stop.lat, stop.lon, known=False)
+        if place and place.zone:
+            return
+        if place:
+            place.visits += 1
+            place.lat += (stop.lat - place.lat) / place.visits
+            place.lon += (stop.lon - place.lon) / place.visits
+        else:
+            if len(self.learned) >= MAX_LEARNED_PLACES:
+                self.learned.remove(min(self.learned, key=lambda learned: learned.visits))
+            name = stop.address or f"{stop.lat:.4f}, {stop.lon:.4f}"
+            self.learned.append(Place(name, stop.lat, stop.lon, LEARNED_RADIUS, visits=1))
+        self._reindex()
+
+    def restore(self, stored: list[list]) -> None:
+        """Load stored learned places."""
+        self.learned = [
+            Place(name, lat, lon, LEARNED_RADIUS, visits=visits)
+            for lat, lon, visits, name in stored
+        ]
+        self._reindex()
+
+    def as_dict(self) -> list[list]:
+        """Return the learned places for storage."""
+        return [place.encode() for place in self.learned]
+
+    def _closest(self, lat: float, lon: float, known: bool) -> Place | None:
+        """Return the closest place containing a point, optionally only known ones."""
+        best, best_distance = None, None
+        for place in self._cells.get(_cell(lat, lon), ()):
+            if known and not place.known:
+                continue
+            distance = planar_distance(lat, lon, place.lat, place.lon)
+            if distance <= place.radius and (best is None or distance < best_distance):
+                best, best_distance = place, distance
+        return best
+
+    def _reindex(self) -> None:
+        """Register every place in the cells its circle overlaps."""
+        self._cells.clear()
+        for place in (*self.zones, *self.learned):
+            lat_margin = place.radius / METERS_PER_DEGREE
+            lon_margin = lat_margin / max(cos(radians(place.lat)), 0.01)
+            min_row, min_col = _cell(place.lat - lat_margin, place.lon - lon_margin)
+            max_row, max_col = _cell(place.lat + lat_margin, place.lon + lon_margin)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    self._cells.setdefault((row, col), []).append(place)
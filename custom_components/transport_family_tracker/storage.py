@@ -0,0 +1,102 @@
+"""Persistent tracker state for Family Transport Tracker."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .tracker import FamilyTransportTracker
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30  # seconds - batches the writes of several update cycles
+
+# Tracker attributes holding {person: {"lat", "lon", "time"}} records
+PERSISTED_STATES = {
+    "stops": "stop_times",
+    "detours": "detour_locations",
+}
+
+
+class TrackerStore:
+    """Save and restore the in-memory state of a tracker.
+
+    Records are stored compactly as [lat, lon, timestamp] lists next to the
+    learned car segment times, commute profiles and places. A save is only
+    scheduled when the state version of the tracker moved since the last
+    one, and the state is encoded when the delayed save is written.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, tracker: FamilyTransportTracker | None
+    ) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        self._tracker = tracker
+        self._saved_version: int | None = None
+        self._save_pending = False
+
+    async def async_restore(self) -> None:
+        """Load the saved state into the tracker in one read."""
+        self._saved_version = self._tracker.state_version
+        if not (stored := await self._store.async_load()):
+            return
+
+        for key, attribute in PERSISTED_STATES.items():
+            records = getattr(self._tracker, attribute)
+            for person_entity, (lat, lon, timestamp) in stored.get(key, {}).items():
+                records[person_entity] = {
+                    "lat": lat,
+                    "lon": lon,
+                    "time": dt_util.utc_from_timestamp(timestamp),
+                }
+        self._tracker.eta.restore(stored.get("segment_times", {}))
+        self._tracker.profiles.restore(stored.get("profiles", {}))
+        self._tracker.places.restore(stored.get("places", []))
+
+    @callback
+    def async_changed(self) -> None:
+        """Schedule a save if the tracker state changed since the last one."""
+        if self._save_pending or self._tracker.state_version == self._saved_version:
+            return
+        # Not rescheduled while pending, so frequent changes cannot keep
+        # pushing the write back
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write the current state immediately, e.g. on unload."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Encode the state when a save is written."""
+        self._save_pending = False
+        self._saved_version = self._tracker.state_version
+        return self._encode()
+
+    async def async_remove(self) -> None:
+        """Remove the stored state."""
+        await self._store.async_remove()
+
+    def _encode(self) -> dict[str, Any]:
+        """Encode the tracker state compactly."""
+        encoded: dict[str, Any] = {
+            key: {
+                person_entity: [
+                    record["lat"],
+                    record["lon"],
+                    round(record["time"].timestamp(), 1),
+                ]
+                for person_entity, record in getattr(self._tracker, attribute).items()
+            }
+            for key, attribute in PERSISTED_STATES.items()
+        }
+        encoded["segment_times"] = self._tracker.eta.as_dict()
+        encoded["profiles"] = self._tracker.profiles.as_dict()
+        encoded["places"] = self._tracker.places.as_dict()
+        return encoded
@@ -1,18 +1,25 @@
 """Family transport tracking logic."""
 from __future__ import annotations
 
+import asyncio
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any
+from math import cos, radians
+from typing import TYPE_CHECKING, Any
 
-from homeassistant.core import HomeAssistant, State
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
 from homeassistant.util import dt as dt_util
 from homeassistant.components.zone import DOMAIN as ZONE_DOMAIN
 
 from .const import (
+    CONF_EXECUTOR_THRESHOLD,
+    DEFAULT_EXECUTOR_THRESHOLD,
+    DETOUR_DISTANCE,
     STATUS_ON_ROUTE,
     STATUS_MISSED,
+    STATUS_ALTERNATIVE,
     STATUS_DELAYED,
     STATUS_NOT_TRAVELING,
     STATUS_AT_STATION,
@@ -22,55 +29,326 @@ from .const import (
     SPEED_THRESHOLD_DRIVING,
     SPEED_THRESHOLD_STOPPED,
 )
-from .schedule import should_show_route
+from .cadence import update_interval
+from .departure import DepartureMonitor
+from .eta import EtaEstimator
+from .geofence import GeofenceMonitor
+from .geometry import (
+    COUNTERS,
+    RouteIndex,
+    calculate_bearing,
+    calculate_distance,
+    planar_distance,
+    within_distance,
+)
+from .instrumentation import TrackerStats
+from .profiles import CommuteProfiles, RouteMatch, place_cell
+from .progress import ProgressInfo, RouteProgress, update_riders
+from .route import RouteCache, RouteInfo
+from .schedule import ScheduleTimeline
+from .smoothing import FilteredFix, PositionFilter
+from .stops import PlaceIndex, StopDetector
+from .trips import Trip, TripSegmenter
+
+if TYPE_CHECKING:
+    from .engine import TrackerEngine
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two GPS coordinates in meters."""
-    from math import radians, sin, cos, sqrt, atan2
-    
-    R = 6371000  # Earth radius in meters
-    
-    lat1_rad = radians(lat1)
-    lat2_rad = radians(lat2)
-    delta_lat = radians(lat2 - lat1)
-    delta_lon = radians(lon2 - lon1)
-    
-    a = sin(delta_lat/2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    
-    return R * c
+@dataclass
+class _LocatedPerson:
+    """A person's smoothed fix and expected route, ready for route matching."""
+
+    person_config: dict
+    fix: FilteredFix
+    driving: bool
+    address: str
+    match: RouteMatch | None
+    route_entity: str
+
+    @property
+    def person(self) -> str:
+        """Return the person entity."""
+        return self.person_config["person"]
 
 
 class FamilyTransportTracker:
     """Track family members on transport routes."""
 
-    def __init__(self, hass: HomeAssistant, config_entry) -> None:
-        """Initialize the tracker."""
+    def __init__(
+        self, hass: HomeAssistant, config_entry, engine: TrackerEngine | None = None
+    ) -> None:
+        """Initialize the tracker, sharing the caches of an engine if given."""
         self.hass = hass
         self.config_entry = config_entry
         self.people_data = {}
-        self.previous_locations = {}
         self.stop_times = {}
+        self.stops: dict[str, StopDetector] = {}
+        self.places = PlaceIndex()
         self.detour_locations = {}
+        self.position_filters: dict[str, PositionFilter] = (
+            engine.position_filters if engine else {}
+        )
+        self.route_progress: dict[str, RouteProgress] = {}
+        self.eta = EtaEstimator()
+        self.departures: dict[str, DepartureMonitor] = {}
+        self.trips: dict[str, TripSegmenter] = {}
+        self.profiles = CommuteProfiles()
+        self.finished_trips: list[Trip] = []
+        self.routes = engine.routes if engine else RouteCache()
+        self.routes.require_tolerance(config_entry.data.get("route_tolerance", 500))
+        self.stats = TrackerStats()
+        self.next_update: dict[str, datetime] = {}
+        self.geofences = GeofenceMonitor(
+            config_entry.data.get("station_radius", 100),
+            config_entry.data.get("route_tolerance", 500),
+        )
+        self.fixes_skipped = 0
+        self.geofence_crossings = 0
+        self._changes = 0  # changes to the persisted state
+        self.schedules = {
+            person_config["person"]: ScheduleTimeline.from_person_config(person_config)
+            for person_config in config_entry.data.get("people", [])
+        }
+
+    async def async_update(self, force: bool = False) -> dict[str, Any]:
+        """Update tracking data for all people that are due.
 
-    async def async_update(self) -> dict[str, Any]:
-        """Update tracking data for all people."""
-        data = {}
+        People whose adaptive cadence has not expired keep their previous
+        data unless force is set. Everyone due is evaluated in one batch.
+        """
+        now = dt_util.now()
+        people = self.config_entry.data.get("people", [])
+        
+        due = [
+            person_config
+            for person_config in people
+            if force or self.is_due(person_config["person"], now)
+        ]
+        if due:
+            tracked = await self._track_people(due)
+            for person_config in due:
+                self._record_person(person_config, tracked[person_config["person"]], now)
         
+        return {
+            person_config["person"]: self.people_data[person_config["person"]]
+            for person_config in people
+        }
+
+    async def async_update_person(self, person_entity: str) -> dict[str, Any] | None:
+        """Update tracking data for a single person."""
+        for person_config in self.config_entry.data.get("people", []):
+            if person_config["person"] == person_entity:
+                return await self._evaluate_person(person_config, dt_util.now())
+        return None
+
+    def is_due(self, person_entity: str, now: datetime) -> bool:
+        """Return True if a person's next evaluation time has passed."""
+        next_update = self.next_update.get(person_entity)
+        return next_update is None or now >= next_update
+
+    def crossed_geofence(self, person_entity: str, person_state, now: datetime) -> bool:
+        """Return True if a new fix entered or left a geofence of the expected route.
+
+        The raw fix is tested against the station circles and the route
+        corridor, so jitter within or outside them is not evaluated.
+        """
+        lat = person_state.attributes.get("latitude") if person_state else None
+        lon = person_state.attributes.get("longitude") if person_state else None
+        if lat is None or lon is None:
+            return True
+        person_config = next(
+            (
+                person_config
+                for person_config in self.config_entry.data.get("people", [])
+                if person_config["person"] == person_entity
+            ),
+            None,
+        )
+        if person_config is None:
+            return True
+        route_entity = self._get_expected_route(person_config, now)
+        route = self.routes.peek(route_entity) if route_entity else None
+        crossed = self.geofences.update(person_entity, route, lat, lon)
+        if crossed:
+            self.geofence_crossings += 1
+        return crossed
+
+    def pop_finished_trips(self) -> list[Trip]:
+        """Return the trips finished since the last call."""
+        trips, self.finished_trips = self.finished_trips, []
+        return trips
+
+    def reset_cadence(self) -> None:
+        """Make everyone due, e.g. when a schedule window opens."""
+        self.next_update.clear()
+
+    async def _evaluate_person(self, person_config: dict, now: datetime) -> dict[str, Any]:
+        """Track a person and schedule their next evaluation."""
+        return self._record_person(person_config, await self._track_person(person_config), now)
+
+    def _record_person(
+        self, person_config: dict, person_data: dict[str, Any], now: datetime
+    ) -> dict[str, Any]:
+        """Store a person's new data and schedule their next evaluation."""
+        person_entity = person_config["person"]
+        self.people_data[person_entity] = person_data
+        segmenter = self.trips.get(person_entity)
+        if segmenter:
+            segmenter.record_status(now, person_data)
+        next_update = now + timedelta(
+            seconds=self._update_interval(person_config, person_data, now)
+        )
+        # Re-evaluate when a departure deadline may flip the status
+        monitor = self.departures.get(person_entity)
+        if monitor and monitor.next_deadline and now < monitor.next_deadline < next_update:
+            next_update = monitor.next_deadline
+        self.next_update[person_entity] = next_update
+        return person_data
+
+    def _update_interval(self, person_config: dict, person_data: dict, now: datetime) -> float:
+        """Return the seconds until a person should be evaluated again."""
+        location = person_data.get("current_location")
+        route_entity = self._get_expected_route(person_config, now)
+        route = self.routes.peek(route_entity) if route_entity else None
+
+        distance_to_station = None
+        if location and route and route.coordinates:
+            distance_to_station = min(
+                planar_distance(location["lat"], location["lon"], coord[0], coord[1])
+                for coord in (route.origin_coords, route.destination_coords)
+            )
+
+        position_filter = self.position_filters.get(person_config["person"])
+        speed = position_filter.estimate.speed if position_filter and position_filter.estimate else 0
+
+        return update_interval(
+            person_data.get("status"),
+            bool(person_data.get("planned_route")),
+            speed,
+            distance_to_station,
+            self.config_entry.data.get("station_radius", 100),
+        )
+
+    @property
+    def state_version(self) -> int:
+        """Return a counter that changes whenever the persisted state does."""
+        return self._changes + self.eta.version
+
+    def diagnostics(self) -> dict[str, Any]:
+        """Return timings and counters for the diagnostics download."""
+        lookups = self.routes.hits + self.routes.misses
+        return {
+            **self.stats.as_dict(),
+            "counters": {
+                # Shared by all config entries
+                "distance_computations": COUNTERS.distances,
+                "planar_distance_computations": COUNTERS.planar,
+                "segment_distance_computations": COUNTERS.segments,
+                "route_cache_hits": self.routes.hits,
+                "route_cache_misses": self.routes.misses,
+                "route_cache_hit_rate": round(self.routes.hits / lookups * 100, 1) if lookups else None,
+                "geofence_crossings": self.geofence_crossings,
+                "fixes_skipped": self.fixes_skipped,
+            },
+        }
+
+    def get_tracked_entities(self) -> dict[str, set[str]]:
+        """Map every input entity to the people whose status depends on it."""
+        entities: dict[str, set[str]] = {}
         for person_config in self.config_entry.data.get("people", []):
             person_entity = person_config["person"]
-            person_data = await self._track_person(person_config)
-            data[person_entity] = person_data
-        
-        return data
+            for entity_id in (
+                person_entity,
+                person_config.get("morning_route"),
+                person_config.get("evening_route"),
+            ):
+                if entity_id:
+                    entities.setdefault(entity_id, set()).add(person_entity)
+        return entities
+
+    async def _track_people(self, people: list[dict]) -> dict[str, dict[str, Any]]:
+        """Track several people, sharing the work per route.
+
+        The states of every entity involved are read once up front. People
+        are grouped by expected route: each route is parsed once and all
+        its riders are matched to it in one batch.
+        """
+        states = {
+            entity_id: self.hass.states.get(entity_id)
+            for entity_id in {
+                person_config[key]
+                for person_config in people
+                for key in ("person", "morning_route", "evening_route")
+                if person_config.get(key)
+            }
+        }
+
+        tracked: dict[str, dict[str, Any]] = {}
+        riders: dict[str, list[_LocatedPerson]] = {}
+        for person_config in people:
+            located = self._locate_person(person_config, states)
+            if isinstance(located, dict):
+                tracked[person_config["person"]] = located
+            elif states.get(located.route_entity) is None:
+                tracked[person_config["person"]] = self._get_default_data()
+            else:
+                riders.setdefault(located.route_entity, []).append(located)
+
+        with self.stats.phase("route"):
+            routes = await asyncio.gather(*(
+                self.routes.async_get(self.hass, states[route_entity], self._executor_threshold)
+                for route_entity in riders
+            ))
+
+        route_tolerance = self.config_entry.data.get("route_tolerance", 500)
+        for route, group in zip(routes, riders.values()):
+            with self.stats.phase("progress"):
+                progress = update_riders(
+                    route,
+                    [
+                        (self._route_progress(located.person), located.fix.lat, located.fix.lon)
+                        for located in group
+                    ],
+                    route_tolerance,
+                    max(route_tolerance, DETOUR_DISTANCE),
+                )
+            for located, person_progress in zip(group, progress):
+                tracked[located.person] = await self._person_status(
+                    located, route, person_progress
+                )
+        return tracked
 
     async def _track_person(self, person_config: dict) -> dict[str, Any]:
         """Track a single person."""
+        located = self._locate_person(person_config, self.hass.states)
+        if isinstance(located, dict):
+            return located
+
+        # Get route information
+        route_state = self.hass.states.get(located.route_entity)
+        if not route_state:
+            return self._get_default_data()
+        
+        with self.stats.phase("route"):
+            route = await self.routes.async_get(
+                self.hass, route_state, self._executor_threshold
+            )
+        with self.stats.phase("progress"):
+            progress = self._update_progress(
+                located.person, route, located.fix.lat, located.fix.lon
+            )
+        return await self._person_status(located, route, progress)
+
+    def _locate_person(self, person_config: dict, states) -> dict[str, Any] | _LocatedPerson:
+        """Smooth a person's fix and find their expected route.
+
+        states is the state machine or a snapshot of it. Returns the
+        person's data right away when there is no route to match.
+        """
         person_entity = person_config["person"]
-        person_state = self.hass.states.get(person_entity)
+        person_state = states.get(person_entity)
         
         if not person_state:
             return self._get_default_data()
@@ -78,149 +356,280 @@ class FamilyTransportTracker:
         # Get person's current location and movement data
         lat = person_state.attributes.get("latitude")
         lon = person_state.attributes.get("longitude")
-        speed = person_state.attributes.get("speed", 0)
         driving = person_state.attributes.get("driving", False)
         address = person_state.attributes.get("address", "Unknown")
         
         if not lat or not lon:
             return self._get_default_data()
         
+        # Status logic only ever sees the smoothed track
+        with self.stats.phase("smoothing"):
+            fix = self._smooth_position(person_entity, person_state)
+        
         # Determine which route they should be on based on time
         current_time = dt_util.now()
-        route_entity = self._get_expected_route(person_config, current_time)
+        with self.stats.phase("commute"):
+            match = self._match_commute(person_config, fix, address, current_time)
+        with self.stats.phase("schedule"):
+            route_entity = self._get_expected_route(person_config, current_time)
         
         if not route_entity:
             return {
                 "status": STATUS_NOT_TRAVELING,
                 "planned_route": None,
-                "current_location": {"lat": lat, "lon": lon},
+                "current_location": {"lat": fix.lat, "lon": fix.lon},
+                "detected_route": match.label if match else None,
                 "confidence": 100,
             }
-        
-        # Get route information
-        route_state = self.hass.states.get(route_entity)
-        if not route_state:
-            return self._get_default_data()
-        
-        origin = route_state.attributes.get("origin", "")
-        destination = route_state.attributes.get("destination", "")
-        planned_route = f"{origin} → {destination}"
+        return _LocatedPerson(person_config, fix, driving, address, match, route_entity)
+
+    async def _person_status(
+        self, located: _LocatedPerson, route: RouteInfo, progress: ProgressInfo | None
+    ) -> dict[str, Any]:
+        """Determine a person's status from their route match."""
+        person_config = located.person_config
+        person_entity = located.person
+        route_entity = located.route_entity
+        fix, match, address = located.fix, located.match, located.address
+        lat, lon, speed = fix.lat, fix.lon, fix.speed
+        planned_route = route.planned_route
+        alternative = match is not None and match.route_entity != route_entity
+        commute_data = {
+            "detected_route": match.label if match else None,
+            "alternative_available": bool(
+                route.destination_coords
+                and self.profiles.alternatives(
+                    person_entity, route_entity, place_cell(*route.destination_coords)
+                )
+            ),
+        }
         
         # Check if traveling by car instead of public transport
-        car_status = await self._check_car_travel(
-            person_entity, lat, lon, speed, driving, route_state
-        )
+        with self.stats.phase("car"):
+            car_status = await self._check_car_travel(
+                person_entity, lat, lon, speed, located.driving, route, progress, address
+            )
         
-        if car_status:
+        # Check if at station, en route, or missed
+        status = None
+        if not car_status or car_status["status"] == STATUS_STOPPED:
+            with self.stats.phase("status"):
+                status = await self._determine_status(
+                    lat, lon, route, person_config, progress, fix, alternative
+                )
+        
+        # A detour along another known route is that route, not a detour
+        if car_status and car_status["status"] == STATUS_DETOURED and alternative:
+            car_status = {**car_status, "status": STATUS_ALTERNATIVE}
+        
+        # Missing the departure matters more than where they stopped
+        if car_status and (status is None or status["status"] != STATUS_MISSED):
             return {
                 **car_status,
+                **self._progress_data(progress),
+                **commute_data,
                 "planned_route": planned_route,
                 "current_location": {"lat": lat, "lon": lon},
+                "heading": fix.heading,
                 "address": address,
             }
         
-        # Check if at station, en route, or missed
-        status = await self._determine_status(
-            lat, lon, route_state, person_config
-        )
-        
         return {
             "status": status["status"],
             "planned_route": planned_route,
             "current_location": {"lat": lat, "lon": lon},
-            "departure_time": route_state.attributes.get("departure_time"),
-            "expected_arrival": route_state.attributes.get("arrival_time"),
-            "delay_minutes": route_state.attributes.get("delay", 0),
+            "departure_time": route.departure_time,
+            "expected_arrival": route.arrival_time,
+            "delay_minutes": route.delay,
             "confidence": status["confidence"],
-            "next_station": status.get("next_station"),
+            **self._progress_data(progress),
+            **commute_data,
             "travel_mode": "public_transport",
+            "heading": fix.heading,
             "address": address,
         }
 
+    def _update_progress(
+        self, person_entity: str, route: RouteInfo, lat: float, lon: float
+    ) -> ProgressInfo | None:
+        """Match a person to their route, None when they are off it."""
+        route_tolerance = self.config_entry.data.get("route_tolerance", 500)
+        return self._route_progress(person_entity).update(
+            route, lat, lon, route_tolerance, max(route_tolerance, DETOUR_DISTANCE)
+        )
+
+    def _route_progress(self, person_entity: str) -> RouteProgress:
+        """Return the route matcher of a person."""
+        progress = self.route_progress.get(person_entity)
+        if progress is None:
+            progress = self.route_progress[person_entity] = RouteProgress()
+        return progress
+
+    @staticmethod
+    def _progress_data(progress: ProgressInfo | None) -> dict[str, Any]:
+        """Return the route progress attributes, rounded to limit state writes."""
+        if progress is None:
+            return {"next_station": None}
+        return {
+            "next_station": progress.next_station,
+            "distance_travelled": int(round(progress.travelled, -1)),
+            "distance_remaining": int(round(progress.remaining, -1)),
+            "route_progress": round(progress.percent, 1),
+        }
+
+    def _smooth_position(self, person_entity: str, person_state) -> FilteredFix:
+        """Feed the tracker state to the person's position filter."""
+        position_filter = self.position_filters.get(person_entity)
+        if position_filter is None:
+            position_filter = self.position_filters[person_entity] = PositionFilter()
+
+        attributes = person_state.attributes
+        speed = attributes.get("speed")
+        return position_filter.update(
+            attributes["latitude"],
+            attributes["longitude"],
+            person_state.last_updated,
+            float(speed) if speed is not None else None,
+            attributes.get("gps_accuracy"),
+        )
+
+    def _match_commute(
+        self, person_config: dict, fix: FilteredFix, address: str, now: datetime
+    ) -> RouteMatch | None:
+        """Follow the person's trips and match the ongoing one to a known route."""
+        person_entity = person_config["person"]
+        segmenter = self.trips.get(person_entity)
+        if segmenter is None:
+            segmenter = self.trips[person_entity] = TripSegmenter(person_entity)
+
+        routes = self._person_routes(person_config)
+        finished = segmenter.update(now, fix.lat, fix.lon, address)
+        if finished:
+            self.profiles.learn(finished, routes)
+            self.finished_trips.append(finished)
+            self._changes += 1
+        self.profiles.observe(person_entity, segmenter.trip)
+        return self.profiles.match(
+            person_entity, routes, segmenter.trip.start if segmenter.trip else None
+        )
+
+    def _person_routes(self, person_config: dict) -> dict[str, tuple[str, RouteIndex]]:
+        """Return the name and index of a person's configured routes seen so far."""
+        routes = {}
+        for key in ("morning_route", "evening_route"):
+            route_entity = person_config.get(key)
+            route = self.routes.peek(route_entity) if route_entity else None
+            if route and route.index:
+                routes[route_entity] = (route.planned_route, route.index)
+        return routes
+
     def _get_expected_route(self, person_config: dict, current_time: datetime) -> str | None:
         """Determine which route the person should be on."""
-        from datetime import time as dt_time
-        
-        current_time_only = current_time.time()
-        
-        # Check morning route
-        if person_config.get("morning_route"):
-            morning_schedule = {
-                "days": person_config.get("morning_days", ["mon", "tue", "wed", "thu", "fri"]),
-                "exclude_holidays": person_config.get("morning_exclude_holidays", True),
-                "custom_exclude_dates": person_config.get("morning_custom_exclude_dates", ""),
-                "departure_time": person_config.get("morning_departure_time"),
-            }
-            if should_show_route(morning_schedule, current_time):
-                return person_config["morning_route"]
-        
-        # Check evening route
-        if person_config.get("evening_route"):
-            evening_schedule = {
-                "days": person_config.get("evening_days", ["mon", "tue", "wed", "thu", "fri"]),
-                "exclude_holidays": person_config.get("evening_exclude_holidays", True),
-                "custom_exclude_dates": person_config.get("evening_custom_exclude_dates", ""),
-                "departure_time": person_config.get("evening_departure_time"),
-            }
-            if should_show_route(evening_schedule, current_time):
-                return person_config["evening_route"]
-        
-        return None
+        timeline = self.schedules.get(person_config["person"])
+        if timeline is None:
+            timeline = ScheduleTimeline.from_person_config(person_config)
+            self.schedules[person_config["person"]] = timeline
+        return timeline.active_route(current_time)
+
+    def next_schedule_boundary(self, current_time: datetime) -> datetime | None:
+        """Return the next time any person's expected route may change."""
+        boundaries = [
+            boundary
+            for timeline in self.schedules.values()
+            if (boundary := timeline.next_boundary(current_time))
+        ]
+        return min(boundaries, default=None)
 
     async def _determine_status(
-        self, lat: float, lon: float, route_state: State, person_config: dict
+        self,
+        lat: float,
+        lon: float,
+        route: RouteInfo,
+        person_config: dict,
+        progress: ProgressInfo | None,
+        fix: FilteredFix,
+        alternative: bool = False,
     ) -> dict:
         """Determine person's transport status."""
         # Get station coordinates from route
-        # Dutch Public Transport uses 'coordinates', not 'route_coordinates'
-        route_coords = route_state.attributes.get("coordinates") or route_state.attributes.get("route_coordinates", [])
-        
-        if not route_coords:
-            return {"status": STATUS_NOT_TRAVELING, "confidence": 50}
-        
-        origin_coords = route_coords[0] if route_coords else None
+        origin_coords = route.origin_coords
         
         if not origin_coords:
             return {"status": STATUS_NOT_TRAVELING, "confidence": 50}
         
         # Check if at station
         station_radius = self.config_entry.data.get("station_radius", 100)
-        distance_to_origin = calculate_distance(
+        distance_to_origin = planar_distance(
             lat, lon, origin_coords[0], origin_coords[1]
         )
         
         at_station = distance_to_origin <= station_radius
         
         # Get departure time
-        departure_str = route_state.attributes.get("departure_time")
+        departure_str = route.departure_time
         if not departure_str:
             return {"status": STATUS_NOT_TRAVELING, "confidence": 50}
         
-        # Check if transport departed
-        current_time = dt_util.now()
-        departure_window = self.config_entry.data.get("departure_window", 5)
+        on_route = progress is not None and progress.distance <= self.config_entry.data.get(
+            "route_tolerance", 500
+        )
+        
+        # Check if transport departed, or will have before they get there
+        person_entity = person_config["person"]
+        monitor = self.departures.get(person_entity)
+        if monitor is None:
+            monitor = self.departures[person_entity] = DepartureMonitor()
+        closing_speed = 0.0
+        if fix.heading is not None:
+            bearing = calculate_bearing(lat, lon, origin_coords[0], origin_coords[1])
+            closing_speed = fix.speed * cos(radians(fix.heading - bearing))
+        override = monitor.evaluate(
+            dt_util.now(),
+            route.departure,
+            self._delay_minutes(route),
+            self.config_entry.data.get("departure_window", 5),
+            at_station,
+            on_route and progress.travelled > station_radius,
+            distance_to_origin,
+            station_radius,
+            closing_speed,
+        )
+        if override == STATUS_MISSED:
+            return {"status": STATUS_MISSED, "confidence": 80}
+        if override == STATUS_DELAYED:
+            return {"status": STATUS_DELAYED, "confidence": 85}
         
-        # Simple logic for demo
         if at_station:
             return {
                 "status": STATUS_AT_STATION,
                 "confidence": 90,
             }
         
-        # Check if on route (simplified)
-        for coord in route_coords:
-            dist = calculate_distance(lat, lon, coord[0], coord[1])
-            if dist <= self.config_entry.data.get("route_tolerance", 500):
-                return {
-                    "status": STATUS_ON_ROUTE,
-                    "confidence": 85,
-                }
+        if on_route:
+            return {
+                "status": STATUS_ON_ROUTE,
+                "confidence": 85,
+            }
+        
+        if alternative:
+            return {
+                "status": STATUS_ALTERNATIVE,
+                "confidence": 75,
+            }
         
         return {
             "status": STATUS_NOT_TRAVELING,
             "confidence": 70,
         }
 
+    @staticmethod
+    def _delay_minutes(route: RouteInfo) -> int:
+        """Return the delay of a route in whole minutes, 0 if unknown."""
+        try:
+            return int(route.delay or 0)
+        except (TypeError, ValueError):
+            return 0
+
     async def _check_car_travel(
         self,
         person_entity: str,
@@ -228,39 +637,38 @@ class FamilyTransportTracker:
         lon: float,
         speed: float,
         driving: bool,
-        route_state: State,
+        route: RouteInfo,
+        progress: ProgressInfo | None,
+        address: str | None = None,
     ) -> dict | None:
         """Check if person is traveling by car instead of public transport."""
         current_time = dt_util.now()
         
         # Get expected departure and destination
-        # Dutch Public Transport uses 'coordinates', not 'route_coordinates'
-        route_coords = route_state.attributes.get("coordinates") or route_state.attributes.get("route_coordinates", [])
-        if not route_coords:
+        if not route.coordinates:
             return None
         
-        origin_coords = route_coords[0]
-        dest_coords = route_coords[-1]
+        origin_coords = route.origin_coords
+        dest_coords = route.destination_coords
         
         # Check if person is driving
         is_driving = driving or speed > SPEED_THRESHOLD_DRIVING
         
+        # Every fix feeds stop detection, so moving on ends a stop
+        stop_status = await self._check_stop(person_entity, lat, lon, address)
+        
         if not is_driving:
             # Check if stopped somewhere
             if speed < SPEED_THRESHOLD_STOPPED:
-                return await self._check_stop(person_entity, lat, lon)
+                return stop_status
             return None
         
         # Person is driving - check if they left origin area
         station_radius = self.config_entry.data.get("station_radius", 100)
-        distance_from_origin = calculate_distance(
-            lat, lon, origin_coords[0], origin_coords[1]
-        )
-        
         left_on_time = False
-        if distance_from_origin > station_radius:
+        if not within_distance(lat, lon, origin_coords[0], origin_coords[1], station_radius):
             # They left the origin area
-            departure_time_str = route_state.attributes.get("departure_time")
+            departure_time_str = route.departure_time
             if departure_time_str:
                 # Check if they left around the expected time
                 left_on_time = True  # Simplified
@@ -270,16 +678,14 @@ class FamilyTransportTracker:
             lat, lon, dest_coords[0], dest_coords[1]
         )
         
-        # Estimate arrival (simplified: assume 50 km/h average)
-        if speed > 0:
-            hours_remaining = (distance_to_dest / 1000) / 50
-            eta = current_time + timedelta(hours=hours_remaining)
-        else:
-            eta = None
+        # Estimate arrival, to the minute so the ETA sensor stays steady
+        eta = self.eta.update(
+            person_entity, route, progress, distance_to_dest, speed, current_time
+        )
+        eta = (eta + timedelta(seconds=30)).replace(second=0, microsecond=0)
         
-        # Check if this is a detour
-        distance_to_route = self._distance_to_route_line(lat, lon, route_coords)
-        is_detour = distance_to_route > 1000  # 1km off route
+        # Check if this is a detour: no match within DETOUR_DISTANCE
+        is_detour = progress is None
         
         if is_detour:
             self.detour_locations[person_entity] = {
@@ -287,64 +693,72 @@ class FamilyTransportTracker:
                 "lon": lon,
                 "time": current_time,
             }
+            self._changes += 1
         
         return {
             "status": STATUS_DETOURED if is_detour else STATUS_BY_CAR,
             "travel_mode": "car",
             "left_on_time": left_on_time,
             "driving_speed": speed,
-            "car_eta": eta.isoformat() if eta else None,
+            "car_eta": eta.isoformat(),
             "confidence": 90,
             "detour_location": self.detour_locations.get(person_entity),
         }
 
-    async def _check_stop(self, person_entity: str, lat: float, lon: float) -> dict | None:
-        """Check if person has stopped at a location."""
+    async def _check_stop(
+        self, person_entity: str, lat: float, lon: float, address: str | None = None
+    ) -> dict | None:
+        """Follow a person's stops and report the one they are at, if any."""
         current_time = dt_util.now()
         
-        if person_entity not in self.stop_times:
-            self.stop_times[person_entity] = {
-                "lat": lat,
-                "lon": lon,
-                "time": current_time,
+        detector = self.stops.get(person_entity)
+        if detector is None:
+            detector = self.stops[person_entity] = StopDetector()
+            if saved := self.stop_times.get(person_entity):
+                detector.restore(saved["lat"], saved["lon"], saved["time"])
+        
+        ended = detector.update(current_time, lat, lon, address)
+        if ended:
+            self.places.learn(ended)
+            self._changes += 1
+        
+        # Kept in stop_times so an ongoing stop survives a restart
+        saved = self.stop_times.get(person_entity)
+        if detector.stop:
+            record = {
+                "lat": round(detector.stop.lat, 5),
+                "lon": round(detector.stop.lon, 5),
+                "time": detector.stop.start,
             }
-            return None
-        
-        stop_data = self.stop_times[person_entity]
-        
-        # Check if still at same location
-        distance_moved = calculate_distance(
-            lat, lon, stop_data["lat"], stop_data["lon"]
-        )
-        
-        if distance_moved < 50:  # Still within 50m
-            duration = (current_time - stop_data["time"]).total_seconds() / 60
-            
-            if duration > 5:  # Stopped for more than 5 minutes
-                # Get address via reverse geocoding (simplified - just use Life360's address)
-                return {
-                    "status": STATUS_STOPPED,
-                    "travel_mode": "stopped",
-                    "stop_duration": int(duration),
-                    "confidence": 95,
-                }
-        else:
-            # Moved - reset stop timer
+            if record != saved:
+                self.stop_times[person_entity] = record
+                self._changes += 1
+        elif saved:
             del self.stop_times[person_entity]
+            self._changes += 1
         
-        return None
-
-    def _distance_to_route_line(self, lat: float, lon: float, route_coords: list) -> float:
-        """Calculate minimum distance from point to route line."""
-        if not route_coords:
-            return float('inf')
-        
-        min_distance = float('inf')
-        for coord in route_coords:
-            dist = calculate_distance(lat, lon, coord[0], coord[1])
-            min_distance = min(min_distance, dist)
+        stop = detector.dwelling
+        if stop is None:
+            return None
         
-        return min_distance
+        # Zones and learned places instead of reverse geocoding
+        self.places.sync_zones(self.hass.states.async_all(ZONE_DOMAIN))
+        place = self.places.find(stop.lat, stop.lon)
+        return {
+            "status": STATUS_STOPPED,
+            "travel_mode": "stopped",
+            "stop_duration": int(stop.duration / 60),
+            "stop_place": place.name if place else None,
+            "unexpected_stop": place is None,
+            "confidence": 95,
+        }
+
+    @property
+    def _executor_threshold(self) -> int:
+        """Return the route size from which routes are indexed in the executor."""
+        return self.config_entry.data.get(
+            CONF_EXECUTOR_THRESHOLD, DEFAULT_EXECUTOR_THRESHOLD
+        )
 
     def _get_default_data(self) -> dict:
         """Return default tracking data."""
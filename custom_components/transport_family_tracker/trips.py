@@ -0,0 +1,125 @@
+"""Split a person's track into trips."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from .geometry import planar_distance, within_distance
+
+MOVE_DISTANCE = 200  # meters from where they were still that counts as leaving
+TRIP_END_DWELL = 300  # seconds still before a trip counts as ended
+TRACK_SPACING = 200  # meters between kept track points
+MAX_TRACK_POINTS = 500
+MIN_TRIP_DISTANCE = 500  # meters - shorter trips are GPS wander, not travel
+
+
+@dataclass
+class Trip:
+    """One trip of a person, from leaving a place until staying at the next."""
+
+    person: str
+    start: datetime
+    end: datetime | None = None
+    start_address: str | None = None
+    end_address: str | None = None
+    # Down-sampled (lat, lon) points, at least TRACK_SPACING apart
+    track: list[tuple[float, float]] = field(default_factory=list)
+    distance: float = 0.0
+    # (time, status, travel mode) at every status change
+    statuses: list[tuple[datetime, str, str | None]] = field(default_factory=list)
+    # Route travelled (detected, else planned) and the largest delay seen
+    route: str | None = None
+    delay: int = 0
+
+    @property
+    def mode(self) -> str | None:
+        """Return the travel mode seen longest during the trip."""
+        durations: dict[str, float] = {}
+        ends = [time for time, _, _ in self.statuses[1:]] + [self.end or self.start]
+        for (time, _, mode), until in zip(self.statuses, ends):
+            if mode and mode != "unknown":
+                durations[mode] = durations.get(mode, 0.0) + (until - time).total_seconds()
+        return max(durations, key=durations.get) if durations else None
+
+
+class TripSegmenter:
+    """Detect the trips of one person from their smoothed positions.
+
+    A trip starts once the person is more than MOVE_DISTANCE from where
+    they were last still and ends when they stay within MOVE_DISTANCE of
+    one spot for TRIP_END_DWELL. Positions only, so it works whatever the
+    speed reporting of the tracker.
+    """
+
+    def __init__(self, person: str) -> None:
+        """Initialize without a position."""
+        self.person = person
+        self.trip: Trip | None = None
+        # Where the person is (or may be) staying: lat, lon, since, last seen
+        self._still: tuple[float, float, datetime, datetime] | None = None
+        self._address: str | None = None
+
+    def update(
+        self, now: datetime, lat: float, lon: float, address: str | None = None
+    ) -> Trip | None:
+        """Feed a position and return the trip that just ended, if any."""
+        if self._still is None:
+            self._still = (lat, lon, now, now)
+            self._address = address
+            return None
+
+        still_lat, still_lon, since, _ = self._still
+        if within_distance(lat, lon, still_lat, still_lon, MOVE_DISTANCE):
+            self._still = (still_lat, still_lon, since, now)
+            if self.trip and (now - since).total_seconds() >= TRIP_END_DWELL:
+                return self._finish(since, address)
+            return None
+
+        if self.trip is None:
+            # Left the place: the trip started when they were last seen there
+            self.trip = Trip(
+                self.person, self._still[3], start_address=self._address,
+                track=[(still_lat, still_lon)],
+            )
+        self._still = (lat, lon, now, now)
+        self._address = address
+        self._add_point(lat, lon)
+        return None
+
+    def record_status(self, now: datetime, person_data: dict) -> None:
+        """Record the status, route and delay of the ongoing trip."""
+        if self.trip is None:
+            return
+        status, mode = person_data["status"], person_data.get("travel_mode")
+        if not self.trip.statuses or self.trip.statuses[-1][1:] != (status, mode):
+            self.trip.statuses.append((now, status, mode))
+        if route := person_data.get("detected_route") or person_data.get("planned_route"):
+            self.trip.route = route
+        delay = person_data.get("delay_minutes")
+        if isinstance(delay, int) and delay > self.trip.delay:
+            self.trip.delay = delay
+
+    def _add_point(self, lat: float, lon: float) -> None:
+        """Add a track point if it is far enough from the last one."""
+        last_lat, last_lon = self.trip.track[-1]
+        distance = planar_distance(lat, lon, last_lat, last_lon)
+        if distance >= TRACK_SPACING:
+            self.trip.distance += distance
+            if len(self.trip.track) < MAX_TRACK_POINTS:
+                self.trip.track.append((lat, lon))
+            else:
+                self.trip.track[-1] = (lat, lon)
+
+    def _finish(self, end: datetime, address: str | None) -> Trip | None:
+        """End the ongoing trip, dropping it if it was too short to be one."""
+        trip, self.trip = self.trip, None
+        trip.end = end
+        trip.end_address = address
+        still = self._still[:2]
+        if trip.track[-1] != still:
+            trip.distance += planar_distance(*trip.track[-1], *still)
+            trip.track.append(still)
+        self._address = address
+        if trip.distance < MIN_TRIP_DISTANCE:
+            return None
+        return trip
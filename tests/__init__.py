@@ -0,0 +1 @@
+"""Tests for Family Transport Tracker."""
@@ -0,0 +1,91 @@
+"""Tests for the missed and delayed departure state machine."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from custom_components.transport_family_tracker.const import STATUS_DELAYED, STATUS_MISSED
+from custom_components.transport_family_tracker.departure import (
+    ASSUMED_APPROACH_SPEED,
+    MISS_MARGIN,
+    DepartureMonitor,
+)
+
+DEPARTURE = datetime(2024, 1, 8, 8, 30, tzinfo=timezone.utc)
+WINDOW = 5  # minutes
+RADIUS = 100  # meters
+
+
+def evaluate(
+    monitor: DepartureMonitor,
+    now: datetime,
+    delay: int = 0,
+    at_station: bool = False,
+    left_station: bool = False,
+    distance: float = 0.0,
+    closing_speed: float = 0.0,
+) -> str | None:
+    """Evaluate the monitor for the departure at DEPARTURE."""
+    return monitor.evaluate(
+        now, DEPARTURE, delay, WINDOW, at_station, left_station, distance, RADIUS, closing_speed
+    )
+
+
+def test_waiting_at_the_station_until_the_deadline() -> None:
+    """Waiting is fine until the departure window has passed."""
+    monitor = DepartureMonitor()
+    deadline = DEPARTURE + timedelta(minutes=WINDOW)
+
+    assert evaluate(monitor, DEPARTURE, at_station=True) is None
+    assert monitor.next_deadline == deadline
+    assert evaluate(monitor, deadline, at_station=True) is None
+    assert evaluate(monitor, deadline + timedelta(seconds=1), at_station=True) == STATUS_MISSED
+
+
+def test_delay_moves_the_deadline() -> None:
+    """A delayed train is reported as Delayed and can still be caught later."""
+    monitor = DepartureMonitor()
+    late = DEPARTURE + timedelta(minutes=WINDOW + 5)
+
+    assert evaluate(monitor, late, delay=10, at_station=True) == STATUS_DELAYED
+    assert monitor.next_deadline == DEPARTURE + timedelta(minutes=10 + WINDOW)
+    # Boarding after the scheduled time sticks until the next departure
+    assert evaluate(monitor, late, delay=10, left_station=True) == STATUS_DELAYED
+    assert evaluate(monitor, late + timedelta(hours=1), delay=10) == STATUS_DELAYED
+    assert monitor.boarded
+
+
+def test_miss_is_predicted_after_the_margin() -> None:
+    """Missed is reported once the station cannot be reached, MISS_MARGIN late."""
+    monitor = DepartureMonitor()
+    distance = RADIUS + 3000
+    needed = timedelta(seconds=3000 / (ASSUMED_APPROACH_SPEED / 3.6))
+    latest_start = DEPARTURE + timedelta(minutes=WINDOW) - needed
+    reported = latest_start + timedelta(seconds=MISS_MARGIN)
+
+    assert evaluate(monitor, latest_start, distance=distance) is None
+    assert monitor.next_deadline == reported
+    assert evaluate(monitor, reported, distance=distance) is None
+    assert evaluate(monitor, reported + timedelta(seconds=1), distance=distance) == STATUS_MISSED
+
+
+def test_heading_to_the_station_faster_recovers() -> None:
+    """A predicted miss clears when they approach fast enough, before the deadline."""
+    monitor = DepartureMonitor()
+    now = DEPARTURE
+    assert evaluate(monitor, now, distance=RADIUS + 3000) == STATUS_MISSED
+    assert monitor.next_deadline == DEPARTURE + timedelta(minutes=WINDOW)
+    assert evaluate(monitor, now, distance=RADIUS + 3000, closing_speed=60) is None
+
+
+def test_missed_sticks_until_the_next_departure() -> None:
+    """After the deadline Missed stays, a new departure starts over."""
+    monitor = DepartureMonitor()
+    after = DEPARTURE + timedelta(minutes=WINDOW, seconds=1)
+    assert evaluate(monitor, after, distance=RADIUS + 50) == STATUS_MISSED
+    assert evaluate(monitor, after, at_station=True) == STATUS_MISSED
+
+    next_departure = DEPARTURE + timedelta(minutes=15)
+    assert monitor.evaluate(
+        after, next_departure, 0, WINDOW, True, False, 0.0, RADIUS, 0.0
+    ) is None
+    assert not monitor.missed
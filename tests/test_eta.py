@@ -0,0 +1,94 @@
+"""Tests for the car ETA estimator."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from math import isnan
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.transport_family_tracker.eta import (
+    BIN_LENGTH,
+    LEARNING_RATE,
+    MAX_GAP,
+    EtaEstimator,
+)
+from custom_components.transport_family_tracker.progress import ProgressInfo
+
+START = datetime(2024, 1, 8, 7, 30, tzinfo=timezone.utc)
+LENGTH = 5000  # meters
+
+
+def route() -> SimpleNamespace:
+    """Return the parts of a RouteInfo the estimator uses."""
+    return SimpleNamespace(entity_id="sensor.route_work", index=SimpleNamespace(length=LENGTH))
+
+
+def progress(travelled: float) -> ProgressInfo:
+    """Return a match at a distance along the route."""
+    return ProgressInfo(0, 0.0, travelled, LENGTH - travelled, travelled / LENGTH * 100, None)
+
+
+def drive(estimator: EtaEstimator, fixes: list[tuple[float, float]]) -> datetime:
+    """Feed (seconds since START, meters travelled) fixes, return the last ETA."""
+    for seconds, travelled in fixes:
+        eta = estimator.update(
+            "person.dad", route(), progress(travelled), 0.0, 36.0,
+            START + timedelta(seconds=seconds),
+        )
+    return eta
+
+
+def test_pace_is_learned_in_the_bins_driven() -> None:
+    """Driving 1000 m in 100 s records 0.1 s/m in the first two bins only."""
+    estimator = EtaEstimator()
+    drive(estimator, [(0, 0), (100, 2 * BIN_LENGTH)])
+
+    paces = estimator.segment_times["sensor.route_work"].paces
+    assert len(paces) == LENGTH // BIN_LENGTH
+    assert paces[0] == pytest.approx(0.1)
+    assert paces[1] == pytest.approx(0.1)
+    assert all(isnan(pace) for pace in paces[2:])
+
+
+def test_later_trips_blend_into_the_learned_pace() -> None:
+    """A slower trip moves the pace by LEARNING_RATE of the difference."""
+    estimator = EtaEstimator()
+    drive(estimator, [(0, 0), (100, BIN_LENGTH)])
+    # Going backwards along the route starts a new trip
+    drive(estimator, [(1000, 0), (1200, BIN_LENGTH)])
+
+    expected = 0.2 + (0.4 - 0.2) * LEARNING_RATE
+    assert estimator.segment_times["sensor.route_work"].paces[0] == pytest.approx(expected)
+
+
+def test_long_gaps_are_not_learned() -> None:
+    """Progress over a gap longer than MAX_GAP is skipped."""
+    estimator = EtaEstimator()
+    drive(estimator, [(0, 0), (MAX_GAP + 1, BIN_LENGTH)])
+
+    assert all(isnan(pace) for pace in estimator.segment_times["sensor.route_work"].paces)
+
+
+def test_learned_pace_is_used_for_the_remaining_distance() -> None:
+    """Beyond the live distance the ETA follows the learned pace."""
+    estimator = EtaEstimator()
+    # 0.2 s/m, in steps shorter than MAX_GAP
+    drive(estimator, [(step * 200, step * 1000) for step in range(LENGTH // 1000 + 1)])
+    eta = drive(estimator, [(10000, 0)])
+
+    # The first 2000 m blended with the live 10 m/s, then the learned 0.2 s/m
+    expected = 2000 * (0.2 + 0.1) / 2 + (LENGTH - 2000) * 0.2
+    assert (eta - (START + timedelta(seconds=10000))).total_seconds() == pytest.approx(expected)
+
+
+def test_segment_times_round_trip() -> None:
+    """Stored paces restore to the same segment times."""
+    estimator = EtaEstimator()
+    drive(estimator, [(0, 0), (100, 2 * BIN_LENGTH)])
+    stored = estimator.as_dict()
+
+    restored = EtaEstimator()
+    restored.restore(stored)
+    assert restored.as_dict() == stored
+    assert stored["sensor.route_work"][2] is None
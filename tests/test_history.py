@@ -0,0 +1,99 @@
+"""Tests for the binary trip log."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import os
+from pathlib import Path
+
+import pytest
+
+from custom_components.transport_family_tracker.const import STATUS_MISSED, STATUS_ON_ROUTE
+from custom_components.transport_family_tracker.history import MAGIC, TripLog
+from custom_components.transport_family_tracker.trips import Trip
+
+START = datetime(2024, 1, 8, 7, 30, tzinfo=timezone.utc)
+
+
+def make_trip(person: str, day: int, missed: bool = False) -> Trip:
+    """Return a finished train trip on a day after START."""
+    start = START + timedelta(days=day)
+    return Trip(
+        person=person,
+        start=start,
+        end=start + timedelta(minutes=40),
+        start_address="Home",
+        end_address="Utrecht Centraal",
+        track=[(52.0 + step * 0.01, 5.0 + step * 0.005) for step in range(5)],
+        distance=4321.5,
+        statuses=[
+            (start, STATUS_MISSED if missed else STATUS_ON_ROUTE, "train"),
+            (start + timedelta(minutes=10), STATUS_ON_ROUTE, "train"),
+        ],
+        route="Sprinter Utrecht",
+        delay=4,
+    )
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> str:
+    """Return the path of a trip log in a new directory."""
+    return str(tmp_path / "history" / "trips.bin")
+
+
+def test_round_trip(path: str) -> None:
+    """Trips read back equal to what was written, also after reopening."""
+    trips = [make_trip("person.dad", 0), make_trip("person.mom", 0), make_trip("person.dad", 1, True)]
+    log = TripLog(path)
+    log.append(trips[:2])
+    log.append(trips[2:])
+    assert log.trips() == trips
+    log.close()
+
+    reopened = TripLog(path)
+    assert reopened.trips() == trips
+    assert reopened.trips("person.mom") == [trips[1]]
+    assert reopened.trips(since=START + timedelta(days=1)) == [trips[2]]
+    assert reopened.trips("person.nobody") == []
+
+    stats = reopened.aggregate("person.dad", group_by="route")["Sprinter Utrecht"]
+    assert stats.trips == 2
+    assert stats.missed == 1
+    assert stats.distance == pytest.approx(2 * 4321.5)
+    reopened.close()
+
+
+def test_truncated_tail_is_dropped(path: str) -> None:
+    """A record cut short by a crash is dropped and new trips follow on."""
+    log = TripLog(path)
+    log.append([make_trip("person.dad", 0)])
+    log.close()
+    intact = os.path.getsize(path)
+    log = TripLog(path)
+    log.append([make_trip("person.dad", 1)])
+    log.close()
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) - 7)
+
+    log = TripLog(path)
+    assert log.trips() == [make_trip("person.dad", 0)]
+    assert os.path.getsize(path) == intact
+    log.append([make_trip("person.dad", 2)])
+    log.close()
+
+    reopened = TripLog(path)
+    assert reopened.trips() == [make_trip("person.dad", 0), make_trip("person.dad", 2)]
+    reopened.close()
+
+
+def test_unreadable_file_is_set_aside(path: str) -> None:
+    """A file that is not a trip log is renamed and a new log started."""
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as file:
+        file.write(b"not a trip log")
+
+    log = TripLog(path)
+    assert log.trips() == []
+    log.close()
+    assert os.path.exists(f"{path}.bad")
+    with open(path, "rb") as file:
+        assert file.read() == MAGIC
@@ -0,0 +1,82 @@
+"""Tests for the learned commute profiles."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from custom_components.transport_family_tracker.profiles import (
+    MAX_PROFILES,
+    CommuteProfiles,
+)
+from custom_components.transport_family_tracker.trips import Trip
+
+START = datetime(2024, 1, 8, 7, 30, tzinfo=timezone.utc)
+
+
+def make_trip(number: int, start: datetime = START) -> Trip:
+    """Return a straight trip northwards, each number on its own track."""
+    lon = 4.0 + number * 0.05
+    return Trip(
+        person="person.dad",
+        start=start,
+        end=start + timedelta(minutes=30),
+        track=[(52.0 + step * 0.01, lon) for step in range(10)],
+    )
+
+
+def test_repeated_trip_merges_into_one_profile() -> None:
+    """The same trip twice is one profile with two trips."""
+    profiles = CommuteProfiles()
+    first = profiles.learn(make_trip(0), {})
+    second = profiles.learn(make_trip(0, START + timedelta(days=1)), {})
+
+    assert second is first
+    assert first.trips == 2
+    assert len(profiles.profiles["person.dad"]) == 1
+
+
+def test_new_commute_survives_until_it_repeats() -> None:
+    """With the list full, new commutes replace old profiles, not each other."""
+    profiles = CommuteProfiles()
+    for number in range(MAX_PROFILES):
+        profiles.learn(make_trip(number), {})
+        profiles.learn(make_trip(number), {})
+
+    later = START + timedelta(days=90)
+    new = profiles.learn(make_trip(MAX_PROFILES, later), {})
+    other = profiles.learn(make_trip(MAX_PROFILES + 1, later + timedelta(days=1)), {})
+    learned = profiles.profiles["person.dad"]
+    assert new in learned
+    assert other in learned
+
+    # The second occurrence is merged into the profile that was kept
+    again = profiles.learn(make_trip(MAX_PROFILES, later + timedelta(days=2)), {})
+    assert again is new
+    assert new.trips == 2
+    assert len(learned) == MAX_PROFILES
+
+
+def test_recent_commutes_outweigh_old_frequent_ones() -> None:
+    """A profile not travelled for months is dropped before a recent one."""
+    profiles = CommuteProfiles()
+    for _ in range(5):
+        profiles.learn(make_trip(0), {})
+    for number in range(1, MAX_PROFILES):
+        profiles.learn(make_trip(number, START + timedelta(days=180)), {})
+
+    profiles.learn(make_trip(MAX_PROFILES, START + timedelta(days=181)), {})
+    learned = profiles.profiles["person.dad"]
+    assert len(learned) == MAX_PROFILES
+    assert all(profile.trips == 1 for profile in learned)
+
+
+def test_profiles_round_trip() -> None:
+    """Stored profiles restore with their trips and last trip time."""
+    profiles = CommuteProfiles()
+    profiles.learn(make_trip(0), {})
+    restored = CommuteProfiles()
+    restored.restore(profiles.as_dict())
+
+    profile = restored.profiles["person.dad"][0]
+    assert profile.trips == 1
+    assert profile.last_trip == START.timestamp()
+    assert restored.as_dict() == profiles.as_dict()
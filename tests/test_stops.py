@@ -0,0 +1,103 @@
+"""Tests for stop detection and place matching."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.core import State
+
+from custom_components.transport_family_tracker.geometry import METERS_PER_DEGREE
+from custom_components.transport_family_tracker.stops import (
+    LEARN_DURATION,
+    MIN_STOP_DURATION,
+    PlaceIndex,
+    Stop,
+    StopDetector,
+)
+
+START = datetime(2024, 1, 8, 7, 30, tzinfo=timezone.utc)
+LAT, LON = 52.09, 5.11
+
+
+def at(minutes: float) -> datetime:
+    """Return a time minutes after START."""
+    return START + timedelta(minutes=minutes)
+
+
+def north(meters: float) -> float:
+    """Return the latitude meters north of LAT."""
+    return LAT + meters / METERS_PER_DEGREE
+
+
+def test_dwell_becomes_a_stop() -> None:
+    """Fixes close together form a stop that ends on leaving."""
+    detector = StopDetector()
+    for minute in range(8):
+        assert detector.update(at(minute), north(minute % 3 * 10), LON) is None
+    assert detector.dwelling is not None
+    assert detector.dwelling.fixes == 8
+
+    ended = detector.update(at(9), north(500), LON)
+    assert ended is None  # one fix away is taken as noise
+    ended = detector.update(at(10), north(1000), LON)
+    assert ended is not None
+    assert ended.duration == 7 * 60
+    # The center is the mean of all eight fixes
+    assert abs(ended.lat - north(70 / 8)) < 1e-9
+    assert detector.dwelling is None
+
+
+def test_single_outlier_does_not_end_a_stop() -> None:
+    """A stray fix in the middle of a dwell is ignored."""
+    detector = StopDetector()
+    for minute in range(3):
+        detector.update(at(minute), LAT, LON)
+    detector.update(at(3), north(400), LON)
+    assert detector.dwelling is None
+    for minute in range(4, 7):
+        detector.update(at(minute), LAT, LON)
+
+    assert detector.dwelling is not None
+    assert detector.dwelling.start == START
+
+
+def test_short_dwell_is_not_a_stop() -> None:
+    """A dwell shorter than MIN_STOP_DURATION is not reported."""
+    detector = StopDetector()
+    minutes = MIN_STOP_DURATION / 60 - 1
+    detector.update(at(0), LAT, LON)
+    detector.update(at(minutes), LAT, LON)
+    assert detector.dwelling is None
+    detector.update(at(minutes + 1), north(1000), LON)
+    assert detector.update(at(minutes + 2), north(2000), LON) is None
+
+
+def test_stop_matches_the_closest_zone() -> None:
+    """A point inside overlapping zones matches the closest one."""
+    places = PlaceIndex()
+    places.sync_zones([
+        State("zone.home", "0", {"friendly_name": "Home", "latitude": LAT, "longitude": LON, "radius": 200}),
+        State("zone.school", "0", {"friendly_name": "School", "latitude": north(150), "longitude": LON, "radius": 100}),
+        State("zone.broken", "0", {"friendly_name": "No location"}),
+    ])
+
+    assert places.find(north(50), LON).zone == "zone.home"
+    assert places.find(north(120), LON).zone == "zone.school"
+    assert places.find(north(1000), LON) is None
+
+
+def test_places_are_learned_after_repeated_visits() -> None:
+    """A long stop outside zones becomes a known place on the second visit."""
+    places = PlaceIndex()
+    visit = Stop(LAT, LON, START, START + timedelta(seconds=LEARN_DURATION), address="Gym")
+    places.learn(visit)
+    assert places.find(LAT, LON) is None
+
+    places.learn(Stop(north(20), LON, START, START + timedelta(seconds=LEARN_DURATION)))
+    place = places.find(north(10), LON)
+    assert place is not None
+    assert place.name == "Gym"
+    assert place.visits == 2
+
+    restored = PlaceIndex()
+    restored.restore(places.as_dict())
+    assert restored.find(north(10), LON).name == "Gym"